@@ -1,18 +1,53 @@
-from fastapi import FastAPI, Body, HTTPException
+import time
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, Body, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from backend.graphs.pos_graph import compiled as pos_graph
-from backend.graphs.calender_agent import get_all_events
-from backend.integrations.notion_client import get_pending_tasks
-from backend.graphs.report_agent import handle_report
-from backend.memory.pinecone_db import add_previous_convos, get_all_long_term_mems
-import google.generativeai as genai
+from fastapi.responses import StreamingResponse, PlainTextResponse
+from backend.graphs.pos_graph import build_graph
+from backend.graphs.nodes.memory_node import memory_node
+from backend.graphs.calender_agent import get_all_events, handle_calendar_bulk, calendar_cache
+from backend.integrations.notion_client import get_pending_tasks, notion_limiter
+from backend.graphs.report_agent import handle_report, handle_report_history
+from backend.graphs.email_agent import mail_stats
+from backend.graphs.task_agent import handle_tasks_bulk
+from backend.memory.pinecone_db import get_all_long_term_mems
+from backend.memory.xp_ledger import xp_ledger
+from backend.memory.session_store import SessionRegistry, open_checkpointer, session_config, DEFAULT_SESSION
+from backend.utils.admission import AdmissionRejected, from_env as admission_from_env
+from backend.utils.response_cache import response_cache, is_write_call
+from backend.utils.metrics import metrics, metrics_callbacks, render_stats, timed
+from backend.utils import clients, google_clients
 from dotenv import load_dotenv
 import os
 import json
+import asyncio
+from contextlib import asynccontextmanager
 
 load_dotenv()
 
-app = FastAPI(title="POS API", version="2.0")
+pos_graph = build_graph()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Recompile the graph with the SQLite checkpointer so history is stored per session,
+    and optionally warm the upstream clients in the background (POS_WARMUP=1).
+    """
+    global pos_graph
+    checkpointer, conn = await open_checkpointer()
+    pos_graph = build_graph(checkpointer)
+    if os.getenv("POS_WARMUP", "0") == "1":
+        # Not awaited: /health must answer while clients connect
+        asyncio.get_running_loop().run_in_executor(None, clients.warmup)
+    try:
+        yield
+    finally:
+        await conn.close()
+
+
+app = FastAPI(title="POS API", version="2.0", lifespan=lifespan)
 
 # CORS configuration
 app.add_middleware(
@@ -23,10 +58,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize Gemini for persona styling
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-model = genai.GenerativeModel("gemini-2.5-flash")
-conversational_history = []
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    """
+    Per-endpoint request latency for /metrics.
+    """
+    start = time.perf_counter()
+    error = True
+    try:
+        response = await call_next(request)
+        error = response.status_code >= 500
+        return response
+    finally:
+        # Unmatched paths (404 scans) share one label so they can't grow the registry
+        route = request.scope.get("route")
+        name = f"{request.method} {getattr(route, 'path', '<unmatched>')}"
+        metrics.observe("http", name, time.perf_counter() - start, error=error)
+
+
+# Per-session locks with LRU eviction of idle sessions
+sessions = SessionRegistry()
+
+# Bounds concurrent graph runs; excess requests queue briefly, then get a 503
+admission = admission_from_env()
 
 # Persona definitions
 PERSONAS = {
@@ -66,67 +120,149 @@ def apply_persona_styling(response: str, agent: str) -> str:
     persona_instruction = PERSONAS.get(agent, PERSONAS["default"])
     
     try:
-        styled = model.generate_content(
-            f"""
-            Rewrite this assistant response in the tone of {persona_instruction}.
-            keep it concise, natural, and conversational and don't lose any important details from the response.
-            Use plain text only - no bold, italics, or special formatting.
+        with timed("llm", "app.apply_persona_styling"):
+            styled = clients.gemini_model(clients.PERSONA_MODEL).generate_content(
+                f"""
+                Rewrite this assistant response in the tone of {persona_instruction}.
+                keep it concise, natural, and conversational and don't lose any important details from the response.
+                Use plain text only - no bold, italics, or special formatting.
             
-            Response to rewrite:
-            {response}
-            """
-        )
+                Response to rewrite:
+                {response}
+                """
+            )
         
         return styled.text.strip()
     except Exception as e:
         return response  
 
 
+def _run_config(session_id: str) -> dict:
+    return {**session_config(session_id), "callbacks": [metrics_callbacks]}
+
+
+def _graph_input(prompt: str) -> dict:
+    """
+    Graph input for a new turn. Per-turn keys are reset explicitly because the
+    checkpointer carries the previous turn's state forward.
+    """
+    return {"prompt": prompt, "error": None, "tool_calls": [], "intent": ""}
+
+
+def _build_query_payload(result: dict, session_id: str) -> dict:
+    """
+    Shape the final graph state into the /query response.
+    """
+    # Extract response and metadata
+    base_response = result.get("response", "I couldn't process that request.")
+    tool_calls = result.get("tool_calls", [])
+    intent = result.get("intent", "unknown")
+    error = result.get("error")
+    
+    if error:
+        return {
+            "message": f"I encountered an issue: {error}",
+            "intent": "error",
+            "tool_calls": [],
+            "session_id": session_id
+        }
+    
+    # Detect which agent persona to use
+    agent = detect_agent_from_response(base_response, tool_calls)
+    
+    return {
+        "message": base_response,
+        "intent": intent,
+        "agent": agent,
+        "tool_calls": [tc.get("tool") for tc in tool_calls],
+        "raw_response": base_response,
+        "session_id": session_id
+    }
+
+
+async def _cached_payload(prompt: str, session_id: str):
+    """
+    The cached response for this turn, or None. A failing lookup (e.g. the
+    embedding call) counts as a miss so the query still runs.
+    """
+    try:
+        if response_cache.semantic:
+            # Embedding lookups hit the network
+            payload = await asyncio.to_thread(response_cache.get, prompt, session_id)
+        else:
+            payload = response_cache.get(prompt, session_id)
+    except Exception as e:
+        print(f"[WARN] Response cache lookup failed, treating as a miss: {e}")
+        return None
+    if payload is None:
+        return None
+    await _record_cached_turn(prompt, payload, session_id)
+    return {**payload, "session_id": session_id, "cached": True}
+
+
+async def _record_cached_turn(prompt: str, payload: dict, session_id: str):
+    """
+    A cache hit skips the graph; add the turn to the session's history the way
+    the memory node would have.
+    """
+    config = session_config(session_id)
+    try:
+        async with sessions.lock(session_id):
+            state = await pos_graph.aget_state(config)
+            values = state.values if state and state.values else {}
+            update = await asyncio.to_thread(
+                memory_node, {**values, "prompt": prompt, "response": payload.get("message", "")}
+            )
+            if update:
+                await pos_graph.aupdate_state(config, update, as_node="memory")
+    except Exception as e:
+        print(f"[WARN] Could not record cached turn in session history: {e}")
+
+
+async def _store_payload(prompt: str, session_id: str, result: dict, payload: dict, generation: int):
+    """
+    Cache read-only turns; anything that errored or ran a write tool must re-run next time.
+    """
+    if result.get("error"):
+        return
+    if any(is_write_call(tc.get("tool"), tc.get("args")) for tc in result.get("tool_calls", [])):
+        return
+    await asyncio.to_thread(response_cache.put, prompt, payload, generation, session_id)
+
+
 @app.post("/query")
-async def query_pos(prompt: str = Body(..., embed=True)):
+async def query_pos(
+    prompt: str = Body(..., embed=True),
+    session_id: str = Body(DEFAULT_SESSION, embed=True),
+    use_cache: bool = Body(True, embed=True)
+):
     """
     Main query endpoint - processes user input through LangGraph.
     """
     if not prompt or not prompt.strip():
         raise HTTPException(status_code=400, detail="Prompt cannot be empty")
 
-    global conversational_history
     try:
-        if len(conversational_history) >= 50: 
-            conversational_history = conversational_history[-5:]
-            to_add = "\n\n".join(conversational_history)
-            add_previous_convos(to_add)
-        # Execute the LangGraph
-        prev = conversational_history[-5:]
-        history = "\n\n".join(prev)
-        result = pos_graph.invoke({"prompt": prompt,"memory":history})
-
-        conversational_history.append(f"User:{result["prompt"]}\n Response: {result["response"]}")
-        
-        # Extract response and metadata
-        base_response = result.get("response", "I couldn't process that request.")
-        tool_calls = result.get("tool_calls", [])
-        intent = result.get("intent", "unknown")
-        error = result.get("error")
-        
-        if error:
-            return {
-                "message": f"I encountered an issue: {error}",
-                "intent": "error",
-                "tool_calls": []
-            }
-        
-        # Detect which agent persona to use
-        agent = detect_agent_from_response(base_response, tool_calls)
-        
-        return {
-            "message": base_response,
-            "intent": intent,
-            "agent": agent,
-            "tool_calls": [tc.get("tool") for tc in tool_calls],
-            "raw_response": base_response
-        }
+        if use_cache:
+            cached = await _cached_payload(prompt, session_id)
+            if cached is not None:
+                return cached
+
+        generation = response_cache.generation
+        async with sessions.lock(session_id), admission.slot():
+            # Execute the LangGraph without blocking the event loop
+            result = await pos_graph.ainvoke(_graph_input(prompt), config=_run_config(session_id))
+
+        payload = _build_query_payload(result, session_id)
+        await _store_payload(prompt, session_id, result, payload, generation)
+        return payload
         
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -135,15 +271,172 @@ async def query_pos(prompt: str = Body(..., embed=True)):
             detail=f"Failed to process query: {str(e)}"
         )
 
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _chunk_text(chunk) -> str:
+    """
+    Text of a streamed chat chunk; Gemini may send content as a list of parts.
+    """
+    content = getattr(chunk, "content", "")
+    if isinstance(content, list):
+        return "".join(
+            part.get("text", "") if isinstance(part, dict) else str(part)
+            for part in content
+        )
+    return content or ""
+
+
+async def _stream_cached(payload: dict):
+    yield _sse("final", payload)
+
+
+async def _stream_query_events(prompt: str, session_id: str):
+    """
+    Run the graph with astream_events and translate it into SSE frames:
+    `token` for LLM output, `tool_start`/`tool_end` around tool runs,
+    then `final` with the same payload /query returns (or `error`).
+    Runs inside an admission slot owned by `_AdmittedStream`.
+    """
+    try:
+        result = None
+        generation = response_cache.generation
+        async with sessions.lock(session_id):
+            events = pos_graph.astream_events(
+                _graph_input(prompt), config=_run_config(session_id), version="v2"
+            )
+            async for event in events:
+                kind = event["event"]
+                if kind == "on_chat_model_stream":
+                    text = _chunk_text(event["data"].get("chunk"))
+                    if text:
+                        yield _sse("token", {"text": text})
+                elif kind == "on_tool_start":
+                    yield _sse("tool_start", {"tool": event["name"], "input": event["data"].get("input")})
+                elif kind == "on_tool_end":
+                    yield _sse("tool_end", {"tool": event["name"]})
+                elif kind == "on_chain_end" and not event.get("parent_ids"):
+                    # Root run finished - this is the final graph state
+                    result = event["data"].get("output")
+
+        if not isinstance(result, dict):
+            raise RuntimeError("Graph finished without a final state")
+        payload = _build_query_payload(result, session_id)
+        await _store_payload(prompt, session_id, result, payload, generation)
+        yield _sse("final", payload)
+
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        yield _sse("error", {"detail": f"Failed to process query: {str(e)}"})
+
+
+class _AdmittedStream(StreamingResponse):
+    """
+    Streaming response holding an admission slot. The slot is released when the
+    response ends for any reason, including a client that disconnects before the
+    body generator ever starts.
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            admission.release()
+
+
+@app.post("/query/stream")
+async def query_pos_stream(
+    prompt: str = Body(..., embed=True),
+    session_id: str = Body(DEFAULT_SESSION, embed=True),
+    use_cache: bool = Body(True, embed=True)
+):
+    """
+    Streaming variant of /query (Server-Sent Events).
+    Emits partial tokens and tool events as they happen; the terminal
+    `final` event carries the regular /query response.
+    """
+    if not prompt or not prompt.strip():
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty")
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if use_cache:
+        cached = await _cached_payload(prompt, session_id)
+        if cached is not None:
+            return StreamingResponse(_stream_cached(cached), media_type="text/event-stream", headers=headers)
+
+    try:
+        # Reject before the stream opens so saturated clients get a real 503
+        await admission.acquire()
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
+
+    return _AdmittedStream(
+        _stream_query_events(prompt, session_id),
+        media_type="text/event-stream",
+        headers=headers
+    )
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    """
+    Hit/miss counters of the /query response cache.
+    """
+    return response_cache.stats()
+
+@app.get("/startup")
+def get_startup_report():
+    """
+    Cold-start timings: app import time and per-client initialization.
+    """
+    return clients.startup_report(IMPORT_SECONDS)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Prometheus metrics: latency histograms and p50/p95/p99 per graph node, tool,
+    LLM call and upstream API call, plus cache and admission gauges.
+    """
+    body = (
+        metrics.render()
+        + render_stats("pos_cache", response_cache.stats())
+        + render_stats("pos_admission", admission.stats())
+        + render_stats("pos_sessions", sessions.stats())
+        + render_stats("pos_notion_limiter", notion_limiter.stats())
+        + render_stats("pos_google", google_clients.stats())
+        + render_stats("pos_calendar_cache", calendar_cache.stats())
+        + render_stats("pos_mail", mail_stats())
+    )
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+@app.get("/sessions/{session_id}/history")
+async def get_session_history(session_id: str):
+    """
+    Conversation turns stored for a session.
+    """
+    state = await pos_graph.aget_state(session_config(session_id))
+    history = state.values.get("history", []) if state and state.values else []
+    return {
+        "session_id": session_id,
+        "history": history,
+        "count": len(history)
+    }
+
 @app.get("/tasks")
-async def get_tasks():
+def get_tasks():
     """
     Get all tasks from Notion database.
     """
     try:
         tasks = get_pending_tasks()
         return {
-            "tasks": tasks,
+            "tasks": [t.to_dict() for t in tasks],
             "count": len(tasks)
         }
     except Exception as e:
@@ -152,8 +445,31 @@ async def get_tasks():
             detail=f"Failed to fetch tasks: {str(e)}"
         )
 
+@app.post("/tasks/bulk")
+def create_tasks_bulk(prompt: str = Body(..., embed=True)):
+    """
+    Create many tasks from one list/brain dump: one parse call, one XP call,
+    concurrent Notion writes.
+    """
+    if not prompt or not prompt.strip():
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty")
+
+    try:
+        result = handle_tasks_bulk(prompt)
+        response_cache.invalidate("POST /tasks/bulk")
+        return {
+            "message": result.get("message", ""),
+            "success": result.get("success", False),
+            "data": result.get("data", {})
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to create tasks: {str(e)}"
+        )
+
 @app.get("/events")
-async def get_events():
+def get_events():
     """
     Get all events in 24 hrs from Google Calender.
     """
@@ -169,8 +485,30 @@ async def get_events():
             detail=f"Failed to fetch events: {str(e)}"
         )
 
+@app.post("/events/bulk")
+def create_events_bulk(prompt: str = Body(..., embed=True)):
+    """
+    Create several calendar events from one prompt in a single Google batch request.
+    """
+    if not prompt or not prompt.strip():
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty")
+
+    try:
+        result = handle_calendar_bulk(prompt)
+        response_cache.invalidate("POST /events/bulk")
+        return {
+            "message": result.get("message", ""),
+            "success": result.get("success", False),
+            "data": result.get("data", {})
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to create events: {str(e)}"
+        )
+
 @app.get("/memories")
-async def get_memories():
+def get_memories():
     """
     Get all memories in the vectorDB
     """
@@ -186,7 +524,7 @@ async def get_memories():
         )
 
 @app.get("/report")
-async def get_report():
+def get_report():
     """
     Generate a comprehensive productivity report.
     """
@@ -210,11 +548,34 @@ async def get_report():
             detail=f"Failed to generate report: {str(e)}"
         )
 
+@app.get("/report/history")
+def get_report_history(days: int = 30):
+    """
+    Productivity trends from the daily report snapshots.
+    """
+    try:
+        result = handle_report_history(days)
+        return {
+            "message": result.get("message", ""),
+            "success": result.get("success", True),
+            "data": result.get("data", {})
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to generate report history: {str(e)}"
+        )
+
 @app.get("/xp_info")
-async def get_xp():
-    with open("backend/data/xp_memory.json","r") as f:
-       xp_data = json.load(f)
-    return {"data":xp_data}
+def get_xp():
+    return {"data": xp_ledger().totals()}
+
+@app.get("/xp_info/history")
+def get_xp_history(avatar: str = "", limit: int = 50):
+    """
+    Most recent XP awards, newest first.
+    """
+    return {"entries": xp_ledger().history(avatar=avatar or None, limit=limit)}
 
 @app.get("/health")
 async def health_check():
@@ -224,7 +585,9 @@ async def health_check():
     return {
         "status": "healthy",
         "version": "2.0",
-        "framework": "LangGraph"
+        "framework": "LangGraph",
+        "admission": admission.stats(),
+        "sessions": sessions.stats()
     }
     
 @app.get("/healthz")
@@ -243,8 +606,18 @@ async def root():
         "framework": "LangGraph + FastAPI",
         "endpoints": {
             "POST /query": "Process user queries through LangGraph",
+            "POST /query/stream": "Stream tokens and tool events for a query (SSE)",
+            "GET /sessions/{session_id}/history": "Conversation history of a session",
+            "GET /cache/stats": "Response cache hit/miss counters",
+            "GET /metrics": "Prometheus latency metrics per component",
+            "GET /startup": "Cold-start timing report",
             "GET /tasks": "Get all tasks from Notion",
+            "POST /tasks/bulk": "Create many tasks from one prompt",
             "GET /report": "Generate productivity report",
+            "GET /report/history": "Productivity trends over the last N days",
             "GET /health": "Health check"
         }
     }
+
+
+IMPORT_SECONDS = time.perf_counter() - _import_started
@@ -0,0 +1,565 @@
+"""
+Local stand-ins for Gemini, Notion, Google Calendar/Gmail and Pinecone.
+
+`install(config)` patches the client libraries so that importing `backend.app`
+afterwards builds fakes instead of real clients. Every fake call sleeps for the
+configured latency, so the benchmark exercises the same concurrency behaviour
+as production without spending API quota.
+"""
+import asyncio
+import datetime
+import itertools
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+
+
+@dataclass
+class FakeConfig:
+    # Simulated round-trip latency per upstream, in milliseconds
+    llm_ms: float = 400.0
+    notion_ms: float = 150.0
+    google_ms: float = 120.0
+    pinecone_ms: float = 80.0
+    # Relative jitter applied to every latency (0.2 = +/-20%)
+    jitter: float = 0.2
+    # Size of the fake data sets
+    tasks: int = 200
+    events: int = 8
+    emails: int = 20
+    memories: int = 20
+    # Padding added to text fields to simulate larger payloads
+    payload_bytes: int = 0
+    # Notion page size (its API maximum is 100)
+    notion_page_size: int = 100
+    seed: int = 7
+    calls: dict = field(default_factory=dict)
+
+
+CONFIG = FakeConfig()
+
+
+def _count(kind: str):
+    CONFIG.calls[kind] = CONFIG.calls.get(kind, 0) + 1
+
+
+def _delay(ms: float) -> float:
+    return max(0.0, ms * (1 + random.uniform(-CONFIG.jitter, CONFIG.jitter))) / 1000
+
+
+def _sleep(kind: str, ms: float):
+    _count(kind)
+    time.sleep(_delay(ms))
+
+
+async def _asleep(kind: str, ms: float):
+    _count(kind)
+    await asyncio.sleep(_delay(ms))
+
+
+def _pad(text: str) -> str:
+    return text + (" " + "x" * CONFIG.payload_bytes if CONFIG.payload_bytes else "")
+
+
+# ---------------------------------------------------------------- Gemini ---
+
+class _FakeGenerated:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """
+    Replacement for `genai.GenerativeModel`; answers the structured prompts
+    used by the agents with well-formed JSON.
+    """
+
+    def __init__(self, model_name="fake", *args, **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, prompt, *args, **kwargs):
+        _sleep("llm", CONFIG.llm_ms)
+        text = prompt if isinstance(prompt, str) else json.dumps(prompt, default=str)
+        if '"xp_assigned": [' in text:
+            count = text.count("| Priority:")
+            return _FakeGenerated(json.dumps({"xp_assigned": [random.randint(5, 30) for _ in range(count)]}))
+        if "xp_assigned" in text:
+            return _FakeGenerated(json.dumps({"xp_assigned": random.randint(5, 30), "reason": "Fake estimate"}))
+        if '"tasks"' in text:
+            return _FakeGenerated(json.dumps({"tasks": [
+                {"task": f"Bulk task {i}", "priority": "Medium", "avatar": "Producer",
+                 "suggested_time": "10:00-11:00", "xp": 12}
+                for i in range(3)
+            ]}))
+        if '"events"' in text:
+            tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+            return _FakeGenerated(json.dumps({"events": [
+                {"title": "Focus time", "date": (tomorrow + datetime.timedelta(days=i)).isoformat(),
+                 "start_time": "09:00", "end_time": "11:00"}
+                for i in range(5)
+            ]}))
+        if '"start_time"' in text:
+            tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+            return _FakeGenerated(json.dumps({
+                "title": "Fake meeting", "date": tomorrow.isoformat(),
+                "start_time": "15:00", "end_time": "16:00",
+            }))
+        if '"suggested_time"' in text:
+            return _FakeGenerated(json.dumps({
+                "task": "Fake task", "priority": random.choice(["High", "Medium", "Low"]),
+                "avatar": "Producer", "suggested_time": "10:00-11:00",
+            }))
+        return _FakeGenerated(_pad("Here is a fake rewritten response."))
+
+
+def fake_embed_content(model=None, content="", **kwargs):
+    _sleep("llm", CONFIG.llm_ms / 4)
+    rnd = random.Random(hash(content))
+    return {"embedding": [rnd.random() for _ in range(16)]}
+
+
+# Keyword -> (tool name, args) used by the fake ReAct chat model
+TOOL_ROUTES = [
+    ("report", "report_tool", {}),
+    ("pending", "task_tool", {"action": "get_pending"}),
+    ("completed", "task_tool", {"action": "get_completed"}),
+    ("free", "calendar_tool", {"prompt": "", "action": "free"}),
+    ("busy", "calendar_tool", {"prompt": "", "action": "busy"}),
+    ("schedule", "calendar_tool", {"prompt": "meeting tomorrow at 3pm", "action": "add"}),
+    ("email", "email_tool", {"action": "read", "query": "is:unread", "max_results": 5}),
+    ("remember", "search_memory_tool", {"query": "preferences"}),
+    ("add task", "task_tool", {"action": "add", "prompt": "write the weekly update"}),
+]
+
+
+def make_fake_chat_model(**kwargs):
+    """
+    Factory replacing `ChatGoogleGenerativeAI`: the first turn calls the tool
+    picked from the user's message, the turn after the tool result answers.
+    """
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage, ToolMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+
+    class FakeChatModel(BaseChatModel):
+
+        @property
+        def _llm_type(self) -> str:
+            return "fake-gemini"
+
+        def bind_tools(self, tools, **kwargs):
+            return self
+
+        def _respond(self, messages):
+            if messages and isinstance(messages[-1], ToolMessage):
+                return AIMessage(content=_pad(f"Done. Result: {str(messages[-1].content)[:200]}"))
+            text = str(messages[-1].content).lower() if messages else ""
+            for keyword, tool, args in TOOL_ROUTES:
+                if keyword in text:
+                    return AIMessage(content="", tool_calls=[
+                        {"name": tool, "args": args, "id": f"call_{uuid.uuid4().hex[:8]}"}
+                    ])
+            return AIMessage(content=_pad("Hello! How can I help?"))
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            _sleep("llm", CONFIG.llm_ms)
+            return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+            await _asleep("llm", CONFIG.llm_ms)
+            return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    return FakeChatModel()
+
+
+# ---------------------------------------------------------------- Notion ---
+
+def _notion_page(i: int, name: str = None, status: str = None, **props) -> dict:
+    rnd = random.Random(CONFIG.seed + i)
+    edited = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(minutes=i)
+    return {
+        "id": str(uuid.UUID(int=rnd.getrandbits(128))),
+        "created_time": edited.isoformat(),
+        "last_edited_time": edited.isoformat(),
+        "properties": {
+            "Name": {"title": [{"plain_text": name or _pad(f"Task {i}")}]},
+            "Avatar": {"select": {"name": props.get("avatar") or rnd.choice(
+                ["Producer", "Administrator", "Entrepreneur", "Integrator"])}},
+            "Priority": {"select": {"name": props.get("priority") or rnd.choice(["High", "Medium", "Low"])}},
+            "Status": {"select": {"name": status or rnd.choice(["Pending", "Completed"])}},
+            "Suggested Time": {"rich_text": [{"plain_text": props.get("suggested_time", "10:00-11:00")}]},
+            "XP": {"number": props.get("xp", rnd.randint(5, 30))},
+        },
+    }
+
+
+def _select(page, prop):
+    sel = page["properties"][prop]["select"]
+    return sel["name"] if sel else None
+
+
+def _matches(page, flt) -> bool:
+    if not flt:
+        return True
+    if "and" in flt:
+        return all(_matches(page, f) for f in flt["and"])
+    if "or" in flt:
+        return any(_matches(page, f) for f in flt["or"])
+    if flt.get("timestamp") == "last_edited_time":
+        return page["last_edited_time"] >= flt["last_edited_time"].get("on_or_after", "")
+    prop = flt.get("property")
+    if "select" in flt:
+        return _select(page, prop) == flt["select"].get("equals")
+    if "title" in flt:
+        title = page["properties"][prop]["title"]
+        value = title[0]["plain_text"] if title else ""
+        cond = flt["title"]
+        if "equals" in cond:
+            return value == cond["equals"]
+        if "contains" in cond:
+            return cond["contains"].lower() in value.lower()
+    return True
+
+
+class _FakePages:
+    def __init__(self, db):
+        self.db = db
+
+    def create(self, parent=None, properties=None, **kwargs):
+        _sleep("notion", CONFIG.notion_ms)
+        props = properties or {}
+        page = _notion_page(
+            len(self.db.rows) + 1,
+            name=props["Name"]["title"][0]["text"]["content"],
+            status=props.get("Status", {}).get("select", {}).get("name", "Pending"),
+            avatar=props.get("Avatar", {}).get("select", {}).get("name"),
+            priority=props.get("Priority", {}).get("select", {}).get("name"),
+            xp=props.get("XP", {}).get("number", 0),
+        )
+        page["last_edited_time"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        self.db.rows.append(page)
+        return page
+
+    def update(self, page_id=None, properties=None, **kwargs):
+        _sleep("notion", CONFIG.notion_ms)
+        for page in self.db.rows:
+            if page["id"] == page_id:
+                for key, value in (properties or {}).items():
+                    page["properties"][key] = value
+                page["last_edited_time"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+                return page
+        raise KeyError(page_id)
+
+
+class _FakeDataSources:
+    def __init__(self, db):
+        self.db = db
+
+    def query(self, data_source_id=None, filter=None, sorts=None, start_cursor=None, page_size=None, **kwargs):
+        _sleep("notion", CONFIG.notion_ms)
+        rows = [p for p in self.db.rows if _matches(p, filter)]
+        for sort in reversed(sorts or []):
+            key = sort.get("timestamp") or sort.get("property")
+            rows.sort(
+                key=lambda p: p.get(key) or str(p["properties"].get(key, "")),
+                reverse=sort.get("direction") == "descending",
+            )
+        size = min(page_size or CONFIG.notion_page_size, CONFIG.notion_page_size)
+        offset = int(start_cursor or 0)
+        chunk = rows[offset:offset + size]
+        has_more = offset + size < len(rows)
+        return {
+            "object": "list",
+            "results": chunk,
+            "has_more": has_more,
+            "next_cursor": str(offset + size) if has_more else None,
+        }
+
+
+class FakeNotionClient:
+    """
+    Replacement for `notion_client.Client` backed by an in-memory task database.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.rows = [_notion_page(i) for i in range(CONFIG.tasks)]
+        self.pages = _FakePages(self)
+        self.data_sources = _FakeDataSources(self)
+
+
+# ---------------------------------------------------------------- Google ---
+
+class _Request:
+    def __init__(self, kind, fn):
+        self.kind = kind
+        self.fn = fn
+
+    def execute(self, *args, **kwargs):
+        _sleep("google", CONFIG.google_ms)
+        return self.fn()
+
+
+class _FakeBatch:
+    """
+    Stand-in for `BatchHttpRequest`: one round trip for all queued requests.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        self.requests.append((request_id or str(len(self.requests)), request, callback or self.callback))
+
+    def execute(self, *args, **kwargs):
+        _sleep("google", CONFIG.google_ms)
+        for request_id, request, callback in self.requests:
+            try:
+                response, error = request.fn(), None
+            except Exception as e:
+                response, error = None, e
+            if callback:
+                callback(request_id, response, error)
+
+
+def _fake_events():
+    tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+    events = []
+    for i in range(CONFIG.events):
+        start = datetime.datetime.combine(tomorrow, datetime.time(8 + i % 12, 0))
+        events.append({
+            "id": f"evt{i}",
+            "status": "confirmed",
+            "summary": _pad(f"Event {i}"),
+            "start": {"dateTime": start.isoformat() + "+05:30"},
+            "end": {"dateTime": (start + datetime.timedelta(minutes=45)).isoformat() + "+05:30"},
+        })
+    return events
+
+
+class _FakeEvents:
+    def __init__(self, service):
+        self.service = service
+
+    def list(self, **kwargs):
+        def run():
+            body = {"items": list(self.service.items), "nextSyncToken": "sync-1"}
+            if kwargs.get("syncToken"):
+                body["items"] = []
+            return body
+        return _Request("events.list", run)
+
+    def insert(self, calendarId=None, body=None, **kwargs):
+        def run():
+            event = {"id": uuid.uuid4().hex, "status": "confirmed", **(body or {})}
+            self.service.items.append(event)
+            return event
+        return _Request("events.insert", run)
+
+
+class _FakeFreebusy:
+    def __init__(self, service):
+        self.service = service
+
+    def query(self, body=None, **kwargs):
+        def run():
+            busy = [{"start": e["start"]["dateTime"], "end": e["end"]["dateTime"]}
+                    for e in self.service.items if "dateTime" in e["start"]]
+            return {"calendars": {item["id"]: {"busy": busy} for item in (body or {}).get("items", [])}}
+        return _Request("freebusy.query", run)
+
+
+class FakeCalendarService:
+    def __init__(self):
+        self.items = _fake_events()
+
+    def events(self):
+        return _FakeEvents(self)
+
+    def freebusy(self):
+        return _FakeFreebusy(self)
+
+    def new_batch_http_request(self, callback=None):
+        return _FakeBatch(callback)
+
+
+def _fake_message(i: int) -> dict:
+    return {
+        "id": f"msg{i}",
+        "threadId": f"thr{i}",
+        "historyId": str(1000 + i),
+        "internalDate": str(int(time.time() * 1000) - i * 60000),
+        "labelIds": ["INBOX"] + (["UNREAD"] if i % 3 == 0 else []),
+        "snippet": _pad(f"Snippet of message {i}"),
+        "payload": {"headers": [
+            {"name": "Subject", "value": f"Subject {i}"},
+            {"name": "From", "value": f"Sender {i % 5} <sender{i % 5}@example.com>"},
+            {"name": "To", "value": "me@example.com"},
+            {"name": "Date", "value": "Mon, 1 Jan 2024 10:00:00 +0000"},
+        ]},
+    }
+
+
+class _FakeMessages:
+    def __init__(self, mailbox):
+        self.mailbox = mailbox
+
+    def list(self, userId="me", q=None, maxResults=100, pageToken=None, **kwargs):
+        def run():
+            offset = int(pageToken or 0)
+            chunk = self.mailbox[offset:offset + maxResults]
+            body = {"messages": [{"id": m["id"], "threadId": m["threadId"]} for m in chunk]}
+            if offset + maxResults < len(self.mailbox):
+                body["nextPageToken"] = str(offset + maxResults)
+            return body
+        return _Request("messages.list", run)
+
+    def get(self, userId="me", id=None, **kwargs):
+        return _Request("messages.get", lambda: next(m for m in self.mailbox if m["id"] == id))
+
+    def send(self, userId="me", body=None, **kwargs):
+        return _Request("messages.send", lambda: {"id": uuid.uuid4().hex})
+
+
+class _FakeHistory:
+    def __init__(self, mailbox):
+        self.mailbox = mailbox
+
+    def list(self, userId="me", startHistoryId=None, **kwargs):
+        return _Request("history.list", lambda: {"history": [], "historyId": str(1000 + len(self.mailbox))})
+
+
+class _FakeUsers:
+    def __init__(self, mailbox):
+        self.mailbox = mailbox
+
+    def messages(self):
+        return _FakeMessages(self.mailbox)
+
+    def history(self):
+        return _FakeHistory(self.mailbox)
+
+    def getProfile(self, userId="me", **kwargs):
+        return _Request("getProfile", lambda: {"emailAddress": "me@example.com",
+                                               "historyId": str(1000 + len(self.mailbox))})
+
+
+class FakeGmailService:
+    def __init__(self):
+        self.mailbox = [_fake_message(i) for i in range(CONFIG.emails)]
+
+    def users(self):
+        return _FakeUsers(self.mailbox)
+
+    def new_batch_http_request(self, callback=None):
+        return _FakeBatch(callback)
+
+
+_google_services = {}
+
+
+def fake_build(service_name, version=None, *args, **kwargs):
+    """
+    Replacement for `googleapiclient.discovery.build`; one shared fake per API.
+    """
+    if service_name not in _google_services:
+        _google_services[service_name] = FakeCalendarService() if service_name == "calendar" else FakeGmailService()
+    return _google_services[service_name]
+
+
+class FakeCredentials:
+    expired = False
+    valid = True
+    refresh_token = "fake"
+    token = "fake"
+    expiry = None
+
+    def refresh(self, request):
+        _sleep("google", CONFIG.google_ms)
+
+
+# -------------------------------------------------------------- Pinecone ---
+
+class _Obj:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class FakeIndex:
+    def __init__(self):
+        self.namespaces = {"long_term": {}, "short_term": {}}
+        for i in range(CONFIG.memories):
+            self.namespaces["long_term"][f"mem{i}"] = {"text": _pad(f"Memory {i}"), "type": "preference"}
+
+    def upsert_records(self, namespace, records):
+        _sleep("pinecone", CONFIG.pinecone_ms)
+        ns = self.namespaces.setdefault(namespace, {})
+        for r in records:
+            ns[r["id"]] = {k: v for k, v in r.items() if k != "id"}
+
+    def search(self, namespace=None, query=None, **kwargs):
+        _sleep("pinecone", CONFIG.pinecone_ms)
+        top_k = (query or {}).get("top_k", 3)
+        hits = [{"_id": k, "fields": {"text": v.get("text", ""), "type": v.get("type", "")}}
+                for k, v in itertools.islice(self.namespaces.get(namespace, {}).items(), top_k)]
+        return {"result": {"hits": hits}}
+
+    def delete(self, namespace=None, delete_all=False, **kwargs):
+        _sleep("pinecone", CONFIG.pinecone_ms)
+        if delete_all:
+            self.namespaces[namespace] = {}
+
+    def list(self, namespace=None, limit=100, **kwargs):
+        _sleep("pinecone", CONFIG.pinecone_ms)
+        ids = list(self.namespaces.get(namespace, {}))
+        for i in range(0, len(ids), limit):
+            yield ids[i:i + limit]
+
+    def fetch(self, ids=None, namespace=None, **kwargs):
+        _sleep("pinecone", CONFIG.pinecone_ms)
+        ns = self.namespaces.get(namespace, {})
+        return _Obj(vectors={i: _Obj(metadata=ns[i]) for i in ids or [] if i in ns})
+
+
+class FakePinecone:
+    def __init__(self, *args, **kwargs):
+        self._index = FakeIndex()
+
+    def Index(self, name=None, *args, **kwargs):
+        return self._index
+
+
+# --------------------------------------------------------------- install ---
+
+def install(config: FakeConfig = None):
+    """
+    Patch the client libraries. Must run before `backend.app` is imported.
+    """
+    import os
+    import google.generativeai as genai
+    import googleapiclient.discovery
+    import langchain_google_genai
+    import notion_client
+    import pinecone
+    from google.oauth2.credentials import Credentials
+
+    global CONFIG
+    if config is not None:
+        CONFIG = config
+    random.seed(CONFIG.seed)
+
+    genai.configure = lambda *args, **kwargs: None
+    genai.GenerativeModel = FakeGenerativeModel
+    genai.embed_content = fake_embed_content
+    langchain_google_genai.ChatGoogleGenerativeAI = make_fake_chat_model
+    notion_client.Client = FakeNotionClient
+    pinecone.Pinecone = FakePinecone
+    googleapiclient.discovery.build = fake_build
+    Credentials.from_authorized_user_info = classmethod(lambda cls, *args, **kwargs: FakeCredentials())
+
+    os.environ.setdefault("GOOGLE_CREDENTIALS_JSON", "{}")
+    os.environ.setdefault("GOOGLE_TOKEN_JSON", "{}")
+    os.environ.setdefault("NOTION_DATA_SOURCE_ID", "fake-data-source")
+    os.environ.setdefault("NOTION_TASK_DB", "fake-db")
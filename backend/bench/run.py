@@ -0,0 +1,165 @@
+"""
+Offline throughput/latency benchmark for the POS API.
+
+Runs the real FastAPI app in-process against the fakes in `backend.bench.fakes`,
+so no API quota is used:
+
+    python -m backend.bench.run --concurrency 8 --requests 200
+    python -m backend.bench.run --endpoints query --llm-ms 800 --json
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from backend.bench import fakes
+
+QUERY_PROMPTS = [
+    "what's pending?",
+    "give me my report",
+    "am I free tomorrow?",
+    "what does my day look busy like tomorrow?",
+    "any new email from the team?",
+    "do you remember my coffee preference?",
+    "hello there",
+]
+
+ENDPOINTS = {
+    "query": ("POST", "/query"),
+    "tasks": ("GET", "/tasks"),
+    "events": ("GET", "/events"),
+    "memories": ("GET", "/memories"),
+    "report": ("GET", "/report"),
+}
+
+
+def percentile(samples, q):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def _drive(client, endpoint, total, concurrency, use_cache):
+    method, path = ENDPOINTS[endpoint]
+    latencies, errors = [], 0
+    counter = iter(range(total))
+
+    async def worker(worker_id):
+        nonlocal errors
+        for i in counter:
+            body = None
+            if method == "POST":
+                body = {
+                    "prompt": QUERY_PROMPTS[i % len(QUERY_PROMPTS)],
+                    "session_id": f"bench-{worker_id}",
+                    "use_cache": use_cache,
+                }
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                if response.status_code >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "endpoint": f"{method} {path}",
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1) if latencies else 0.0,
+    }
+
+
+async def run_benchmark(args):
+    import httpx
+
+    # Fakes must be in place before the app (and its clients) are imported
+    fakes.install(fakes.FakeConfig(
+        llm_ms=args.llm_ms,
+        notion_ms=args.notion_ms,
+        google_ms=args.google_ms,
+        pinecone_ms=args.pinecone_ms,
+        jitter=args.jitter,
+        tasks=args.tasks,
+        events=args.events,
+        emails=args.emails,
+        payload_bytes=args.payload_bytes,
+    ))
+    workdir = tempfile.mkdtemp(prefix="pos-bench-")
+    # Every local store lives in the workdir so fake data never reaches backend/data
+    os.environ.setdefault("POS_SESSION_DB", os.path.join(workdir, "sessions.sqlite"))
+    os.environ.setdefault("POS_TASK_DB", os.path.join(workdir, "tasks.sqlite"))
+    os.environ.setdefault("POS_XP_DB", os.path.join(workdir, "xp.sqlite"))
+    os.environ.setdefault("POS_EVENT_DB", os.path.join(workdir, "events.sqlite"))
+    os.environ.setdefault("POS_MAIL_DB", os.path.join(workdir, "mail.sqlite"))
+
+    from backend.app import app
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for endpoint in args.endpoints:
+                results.append(await _drive(client, endpoint, args.requests, args.concurrency, args.cache))
+    return results, dict(fakes.CONFIG.calls)
+
+
+def _print_table(results, calls):
+    header = f"{'endpoint':<16}{'reqs':>6}{'conc':>6}{'err':>5}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['endpoint']:<16}{r['requests']:>6}{r['concurrency']:>6}{r['errors']:>5}"
+            f"{r['throughput_rps']:>9}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}{r['max_ms']:>9}"
+        )
+    print("\nUpstream calls: " + ", ".join(f"{k}={v}" for k, v in sorted(calls.items())))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline POS API benchmark with fake upstreams")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS),
+                        type=lambda s: [e.strip() for e in s.split(",") if e.strip()],
+                        help="comma separated subset of: " + ", ".join(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=50, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--cache", action="store_true", help="allow /query response cache hits")
+    parser.add_argument("--llm-ms", type=float, default=400.0)
+    parser.add_argument("--notion-ms", type=float, default=150.0)
+    parser.add_argument("--google-ms", type=float, default=120.0)
+    parser.add_argument("--pinecone-ms", type=float, default=80.0)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--tasks", type=int, default=200, help="rows in the fake Notion database")
+    parser.add_argument("--events", type=int, default=8, help="events in the fake calendar")
+    parser.add_argument("--emails", type=int, default=20, help="messages in the fake mailbox")
+    parser.add_argument("--payload-bytes", type=int, default=0, help="padding added to text fields")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    unknown = [e for e in args.endpoints if e not in ENDPOINTS]
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(unknown)}")
+
+    results, calls = asyncio.run(run_benchmark(args))
+    if args.json:
+        print(json.dumps({"results": results, "upstream_calls": calls}, indent=2))
+    else:
+        _print_table(results, calls)
+
+
+if __name__ == "__main__":
+    main()
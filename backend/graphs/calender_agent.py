@@ -1,61 +1,47 @@
 from __future__ import print_function
-import datetime,os
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+import datetime,os,re,threading,time
 from backend.graphs.base_agent import make_response
-import google.generativeai as genai
+from backend.utils.metrics import timed
+from backend.utils import clients, google_clients
+from backend.utils.ttl_cache import TTLCache
+from backend.utils import availability
+from backend.integrations.event_store import EventStore
+from backend.utils.datetime_parser import parse_event_prompt
+from zoneinfo import ZoneInfo
+import numpy as np
 from dotenv import load_dotenv
 import json
 
 load_dotenv()
 
-genai.configure(api_key=os.getenv("GEMINI_API_KEY")) #type:ignore
-model = genai.GenerativeModel("gemini-2.0-flash") #type:ignore
-
-
-SCOPES = ["https://www.googleapis.com/auth/calendar",
-          "https://www.googleapis.com/auth/gmail.readonly",
-          "https://www.googleapis.com/auth/gmail.send",
-        ]
 
 def _get_service():
-  creds_json = os.getenv("GOOGLE_CREDENTIALS_JSON")
-  token_json = os.getenv("GOOGLE_TOKEN_JSON")
+  """
+  This thread's cached Calendar service (shared, auto-refreshed credentials)
+  """
+  return google_clients.service("calendar", "v3")
 
-  if creds_json and token_json:
-    try:
-        creds_data = json.loads(token_json)
-        creds = Credentials.from_authorized_user_info(creds_data, scopes=SCOPES)
-
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-            try:
-              service = build("calendar", "v3", credentials=creds)
-              return service
-            except Exception as e:
-              raise RuntimeError(f"Failed to build Google Calendar service: {e}")
-        try:
-          service = build("calendar", "v3", credentials=creds)
-          return service
-        except Exception as e:
-          raise RuntimeError(f"Failed to build Google Calendar service: {e}")
-    except Exception as e:
-        print(f"[WARN] Failed to load Google credentials from env vars: {e}")
-        raise RuntimeError(f"Failed to load Google credentials from env vars: {e}")
 
-  
+# "local": try the deterministic parser first and only ask Gemini when it isn't sure.
+# "llm": always ask Gemini.
+EVENT_PARSER_MODE = os.getenv("POS_EVENT_PARSER", "local").lower()
+
 
 def _parse_event(prompt:str):
   """
-  Use Gemini to create a clean, structured event object.
+  Turn a scheduling request into {"title", "date", "start_time", "end_time"} in local time.
+  Simple requests are parsed locally; the rest go to Gemini.
   """
-  now = datetime.datetime.now(datetime.timezone(datetime.timedelta(hours=5, minutes=30)))  # Asia/Kolkata
+  now = datetime.datetime.now(_zone())
+  local = parse_event_prompt(prompt, now)
+  if local and local["confident"] and EVENT_PARSER_MODE != "llm":
+    return local
+
   today_str = now.strftime("%Y-%m-%d %H:%M")
   prompt_text = f"""
   You are an assistant creating concise, human-friendly calendar events.
   
-  Current local date and time: {today_str}
+  Current local date and time: {today_str} ({TIMEZONE})
 
   Convert this user request into structured JSON:
   {{ "title": "", "date": "", "start_time": "", "end_time": ""}}
@@ -68,139 +54,474 @@ def _parse_event(prompt:str):
   User request: "{prompt}"
   """
   try:
-    result= model.generate_content(prompt_text)
+    with timed("llm", "calender_agent._parse_event"):
+      result= clients.gemini_model().generate_content(prompt_text)
     text = result.text.strip()
     start, end = text.find("{"), text.rfind("}") + 1
     data = json.loads(text[start:end])
   except Exception:
-    now = datetime.datetime.now(datetime.timezone.utc)
-    data = {
+    # Best local guess, in local time like the event itself
+    data = local or {
       "title": prompt.capitalize(),
       "date": now.date().isoformat(),
-      "start_time": (now + datetime.timedelta(hours=1)).time().strftime("%H:%M"),
-      "end_time": (now + datetime.timedelta(hours=2)).time().strftime("%H:%M"),
+      "start_time": (now + datetime.timedelta(hours=1)).strftime("%H:%M"),
+      "end_time": (now + datetime.timedelta(hours=2)).strftime("%H:%M"),
     }
   return data
+
+
+# Google accepts at most 50 calls in one batch request
+BATCH_MAX_EVENTS = 50
+_LINE_SPLIT = re.compile(r"\s*(?:\n|;)\s*(?:[-*•]\s*|\d+[.)]\s*)?")
+
+
+def _parse_events_bulk(prompt:str):
+  """
+  Turn a request for several events (a list, or a recurring block like
+  "focus time every morning this week") into a list of event dicts.
+  A list whose lines all parse locally skips Gemini; anything else is one Gemini call.
+  """
+  now = datetime.datetime.now(_zone())
+  lines = [l for l in _LINE_SPLIT.split(prompt or "") if l.strip()]
+  local = [parse_event_prompt(l, now) for l in lines]
+  if len(lines) > 1 and EVENT_PARSER_MODE != "llm" and all(e and e["confident"] for e in local):
+    return local
+
+  today_str = now.strftime("%Y-%m-%d %H:%M (%A)")
+  prompt_text = f"""
+  You are an assistant creating concise, human-friendly calendar events.
+
+  Current local date and time: {today_str} ({TIMEZONE})
+
+  Split this request into individual calendar events. Expand anything recurring
+  ("every morning this week", "Mon/Wed/Fri at 7") into one event per occurrence,
+  at most {BATCH_MAX_EVENTS} events.
+
+  Respond ONLY with valid JSON (no markdown, no backticks):
+  {{ "events": [ {{ "title": "", "date": "YYYY-MM-DD", "start_time": "HH:MM", "end_time": "HH:MM" }} ] }}
+
+  Rules:
+  - Title should be short and meaningful (e.g., "Focus time" not "Block focus time")
+  - If times are missing, assume a 1-hour duration.
+  - "Every day" without an end means the next 7 days.
+
+  User request: "{prompt}"
+  """
+  try:
+    with timed("llm", "calender_agent._parse_events_bulk"):
+      result = clients.gemini_model().generate_content(prompt_text)
+    text = result.text.strip()
+    start, end = text.find("{"), text.rfind("}") + 1
+    events = json.loads(text[start:end]).get("events", [])
+    events = [e for e in events if isinstance(e, dict) and e.get("title") and e.get("date")]
+  except Exception as e:
+    print(f"[WARN] Bulk event parse failed, using local parse: {e}")
+    events = [e for e in local if e]
+  return events[:BATCH_MAX_EVENTS]
   
   
+# Every calendar read in a turn (free, busy, /events) shares one events().list per window
+CALENDAR_CACHE_TTL = float(os.getenv("POS_CALENDAR_CACHE_TTL", "60"))
+calendar_cache = TTLCache(ttl=CALENDAR_CACHE_TTL)
+# Local timezone for availability and new events
+TIMEZONE = os.getenv("POS_TIMEZONE", "Asia/Kolkata")
+
+
+def _zone():
+  return ZoneInfo(TIMEZONE)
+
+
+def _tomorrow_window():
+  """
+  Tomorrow as [local midnight, next local midnight) in TIMEZONE
+  """
+  tomorrow = datetime.datetime.now(_zone()).date() + datetime.timedelta(days=1)
+  start = datetime.datetime.combine(tomorrow, datetime.time(0), _zone())
+  return start, start + datetime.timedelta(days=1)
+
+
+def list_events(time_min, time_max, calendar_id="primary"):
+  """
+  Events in [time_min, time_max) (RFC 3339 strings), cached for CALENDAR_CACHE_TTL seconds.
+  """
+  def fetch():
+    with timed("google", "events.list"):
+      events_result = _get_service().events().list(
+          calendarId=calendar_id,
+          timeMin=time_min, timeMax=time_max,
+          singleEvents=True, orderBy='startTime'
+      ).execute()
+    return events_result.get("items", [])
+
+  return calendar_cache.get_or_load((calendar_id, time_min, time_max), fetch)
+
+
+def _epoch(value):
+  return int(datetime.datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
+
+
+def _event_bounds(e):
+  """
+  (start, end) epoch seconds of an event; all-day events span whole local days.
+  (None, None) for events without times (e.g. cancelled ones in a sync).
+  """
+  start, end = e.get("start") or {}, e.get("end") or {}
+  if "dateTime" in start:
+    return _epoch(start["dateTime"]), _epoch(end["dateTime"])
+  if "date" in start:
+    day_start = datetime.datetime.combine(datetime.date.fromisoformat(start["date"]), datetime.time(0), _zone())
+    day_end = datetime.datetime.combine(datetime.date.fromisoformat(end["date"]), datetime.time(0), _zone())
+    return int(day_start.timestamp()), int(day_end.timestamp())
+  return None, None
+
+
+def _busy_spans(events):
+  """
+  Busy (starts, ends) epoch arrays. All-day events block whole local days;
+  events marked "free" (transparent) don't block anything.
+  """
+  starts, ends = [], []
+  for e in events:
+    if e.get("transparency") == "transparent" or e.get("status") == "cancelled":
+      continue
+    start, end = _event_bounds(e)
+    if start is not None:
+      starts.append(start)
+      ends.append(end)
+  return np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64)
+
+
+# Local event mirror: reads are served from SQLite, kept current with syncToken incremental syncs
+EVENT_MIRROR_ENABLED = os.getenv("POS_EVENT_MIRROR", "1") == "1"
+EVENT_SYNC_INTERVAL = float(os.getenv("POS_EVENT_SYNC_INTERVAL", "60"))
+EVENT_FULL_SYNC_INTERVAL = float(os.getenv("POS_EVENT_FULL_SYNC_INTERVAL", "21600"))
+# How far back a full sync downloads
+EVENT_SYNC_PAST_DAYS = int(os.getenv("POS_EVENT_SYNC_PAST_DAYS", "30"))
+MIRRORED_CALENDAR = "primary"
+
+_event_sync_lock = threading.Lock()
+_event_sync_thread = None
+
+
+def event_store():
+  return clients.get_or_create("event_store", EventStore)
+
+
+def _entry(e):
+  return (e, *_event_bounds(e))
+
+
+def _list_all(**kwargs):
+  """
+  Follow `nextPageToken` through an events().list; returns (items, nextSyncToken).
+  """
+  items = []
+  while True:
+    with timed("google", "events.list"):
+      page = _get_service().events().list(**kwargs).execute()
+    items.extend(page.get("items", []))
+    if not page.get("nextPageToken"):
+      return items, page.get("nextSyncToken")
+    kwargs["pageToken"] = page["nextPageToken"]
+
+
+def sync_events(calendar_id=MIRRORED_CALENDAR, full=False):
+  """
+  Bring the local event mirror up to date.
+  Incremental syncs send the stored syncToken and only receive changed or
+  cancelled events; an expired token (410 Gone) falls back to a full sync.
+  """
+  with _event_sync_lock:
+    store = event_store()
+    token_key = f"sync_token:{calendar_id}"
+    token = None if full else store.get_meta(token_key)
+    started = time.time()
+    mode = "incremental"
+    items = None
+
+    if token:
+      try:
+        items, next_token = _list_all(calendarId=calendar_id, singleEvents=True, syncToken=token)
+        count = store.apply(calendar_id, (_entry(e) for e in items))
+      except Exception as e:
+        if getattr(getattr(e, "resp", None), "status", None) != 410:
+          raise
+        print("📅 Calendar sync token expired, running a full sync")
+        items = None
+
+    if items is None:
+      mode = "full"
+      time_min = (datetime.datetime.now(_zone()) - datetime.timedelta(days=EVENT_SYNC_PAST_DAYS)).isoformat()
+      items, next_token = _list_all(calendarId=calendar_id, singleEvents=True, timeMin=time_min)
+      count = store.replace_all(calendar_id, (_entry(e) for e in items))
+      store.set_meta("last_full_sync", started)
+
+    if next_token:
+      store.set_meta(token_key, next_token)
+    store.set_meta("last_sync", started)
+    if items:
+      # freebusy results for other calendars may include the changed events
+      calendar_cache.invalidate()
+    print(f"📅 Synced {count} calendar events ({mode})")
+    return count
+
+
+def _event_sync_loop():
+  while True:
+    time.sleep(EVENT_SYNC_INTERVAL)
+    try:
+      last_full = float(event_store().get_meta("last_full_sync", 0) or 0)
+      sync_events(full=time.time() - last_full > EVENT_FULL_SYNC_INTERVAL)
+    except Exception as e:
+      print(f"[WARN] Background calendar sync failed: {e}")
+
+
+def _event_mirror():
+  """
+  The event mirror. Only the very first read waits for Calendar; afterwards a
+  background thread keeps it current.
+  """
+  global _event_sync_thread
+  store = event_store()
+  if not store.get_meta("last_sync"):
+    sync_events(full=True)
+  if _event_sync_thread is None:
+    with _event_sync_lock:
+      if _event_sync_thread is None:
+        _event_sync_thread = threading.Thread(target=_event_sync_loop, name="calendar-sync", daemon=True)
+        _event_sync_thread.start()
+  return store
+
+
+def window_events(start, end):
+  """
+  Primary calendar events overlapping [start, end) (aware datetimes), ordered by start.
+  Served from the local mirror; live (cached) API reads when it is disabled or unavailable.
+  """
+  if EVENT_MIRROR_ENABLED:
+    try:
+      return _event_mirror().query(MIRRORED_CALENDAR, int(start.timestamp()), int(end.timestamp()))
+    except Exception as e:
+      print(f"[WARN] Event mirror unavailable, reading Calendar directly: {e}")
+  return list_events(start.isoformat(), end.isoformat())
+
+
+def _tomorrow_events():
+  return window_events(*_tomorrow_window())
+
+
+def _iso_pairs(starts, ends):
+  return [(s.isoformat(), e.isoformat()) for s, e in availability.to_datetimes(starts, ends, _zone())]
+
+
+@timed("google", "get_free_slots")
 def get_free_slots():
-    service = _get_service()
-    now = datetime.datetime.utcnow()
-    tomorrow = now + datetime.timedelta(days=1)
-    
-    # Create timezone-aware datetimes or keep everything naive
-    start = datetime.datetime(tomorrow.year, tomorrow.month, tomorrow.day, 0, 0, 0).isoformat() + 'Z'
-    end = datetime.datetime(tomorrow.year, tomorrow.month, tomorrow.day, 23, 59, 0).isoformat() + 'Z'
-    
-    events_result = service.events().list(
-        calendarId="primary",
-        timeMin=start, timeMax=end,
-        singleEvents=True, orderBy='startTime'
-    ).execute()
-    
-    events = events_result.get("items", [])
-    busy_slots = []
-    
-    for e in events:
-        if "dateTime" in e["start"]:
-            # Parse and strip timezone info to keep everything naive
-            start_dt = datetime.datetime.fromisoformat(e["start"]["dateTime"].replace('Z', '+00:00')).replace(tzinfo=None)
-            end_dt = datetime.datetime.fromisoformat(e["end"]["dateTime"].replace('Z', '+00:00')).replace(tzinfo=None)
-            busy_slots.append((start_dt, end_dt))
-    
-    free_windows = []
-    day_start = datetime.datetime(tomorrow.year, tomorrow.month, tomorrow.day, 0, 0, 0)
-    day_end = datetime.datetime(tomorrow.year, tomorrow.month, tomorrow.day, 23, 59, 0)
-    current_time = day_start
-    
-    for start_time, end_time in busy_slots:
-        if current_time < start_time:
-            free_windows.append((current_time.isoformat(), start_time.isoformat()))
-        current_time = max(current_time, end_time)  # Handle overlapping events
-    
-    if current_time < day_end:
-        free_windows.append((current_time.isoformat(), day_end.isoformat()))
-    
-    return free_windows
+    """
+    Free windows of tomorrow (local time), from the shared events window.
+    """
+    day_start, day_end = _tomorrow_window()
+    windows = (np.array([int(day_start.timestamp())]), np.array([int(day_end.timestamp())]))
+    return _iso_pairs(*availability.free_slots(windows, _busy_spans(_tomorrow_events())))
 
 
+@timed("google", "get_busy_slots")
 def get_busy_slots():
-    service = _get_service()
-    now = datetime.datetime.utcnow()
-    tomorrow = now + datetime.timedelta(days=1)
-    
-    start = datetime.datetime(tomorrow.year, tomorrow.month, tomorrow.day, 0, 0, 0).isoformat() + 'Z'
-    end = datetime.datetime(tomorrow.year, tomorrow.month, tomorrow.day, 23, 59, 0).isoformat() + 'Z'
-    
-    events_result = service.events().list(
-        calendarId="primary",
-        timeMin=start, timeMax=end,
-        singleEvents=True, orderBy='startTime'
-    ).execute()
-    
-    events = events_result.get("items", [])
-    busy_windows = []
-    
-    for e in events:
-        if "dateTime" in e["start"]:
-            start_dt = datetime.datetime.fromisoformat(e["start"]["dateTime"].replace('Z', '+00:00')).replace(tzinfo=None)
-            end_dt = datetime.datetime.fromisoformat(e["end"]["dateTime"].replace('Z', '+00:00')).replace(tzinfo=None)
-            busy_windows.append((start_dt.isoformat(), end_dt.isoformat()))
-            
-    return busy_windows
+    """
+    Busy windows of tomorrow (local time), overlapping events merged.
+    """
+    return _iso_pairs(*availability.merge(*_busy_spans(_tomorrow_events())))
+
+
+def get_busy_intervals(calendars, time_min, time_max):
+  """
+  Busy (starts, ends) across `calendars` from one freebusy query (cached like events).
+  """
+  calendars = tuple(calendars)
+
+  def fetch():
+    with timed("google", "freebusy.query"):
+      result = _get_service().freebusy().query(body={
+        "timeMin": time_min,
+        "timeMax": time_max,
+        "timeZone": TIMEZONE,
+        "items": [{"id": c} for c in calendars],
+      }).execute()
+    busy = [b for c in calendars for b in result.get("calendars", {}).get(c, {}).get("busy", [])]
+    return (
+      np.array([_epoch(b["start"]) for b in busy], dtype=np.int64),
+      np.array([_epoch(b["end"]) for b in busy], dtype=np.int64),
+    )
+
+  return calendar_cache.get_or_load(("freebusy", calendars, time_min, time_max), fetch)
+
+
+@timed("google", "find_free_slots")
+def find_free_slots(days=7, duration_minutes=30, work_start="09:00", work_end="18:00",
+                    buffer_minutes=0, calendars=None, start_date=None, weekdays_only=False):
+  """
+  Free slots of at least `duration_minutes` within working hours over the next
+  `days` days (from today, or `start_date`), across `calendars`.
+  Busy time is padded by `buffer_minutes` on both sides. The primary calendar
+  is read from the local mirror; other calendars take one freebusy call.
+  """
+  zone = _zone()
+  today = datetime.datetime.now(zone).date()
+  first_day = start_date or today
+  windows = availability.working_windows(
+    first_day, max(1, int(days)), zone,
+    datetime.time.fromisoformat(work_start), datetime.time.fromisoformat(work_end),
+    weekdays=range(5) if weekdays_only else None,
+  )
+  # Today's window starts no earlier than now
+  now = int(datetime.datetime.now(zone).timestamp())
+  keep = windows[1] > now
+  windows = (np.maximum(windows[0][keep], now), windows[1][keep])
+  if not len(windows[0]):
+    return []
+
+  time_min = datetime.datetime.fromtimestamp(int(windows[0].min()), zone)
+  time_max = datetime.datetime.fromtimestamp(int(windows[1].max()), zone)
+  calendars = list(calendars or [MIRRORED_CALENDAR])
+  if EVENT_MIRROR_ENABLED and calendars == [MIRRORED_CALENDAR]:
+    busy = _busy_spans(window_events(time_min, time_max))
+  else:
+    busy = get_busy_intervals(calendars, time_min.isoformat(), time_max.isoformat())
+  slots = availability.free_slots(windows, busy, buffer_minutes * 60, duration_minutes * 60)
+  return availability.to_datetimes(*slots, zone)
       
+def _event_body(event_data):
+  """
+  Calendar API body for a parsed event, plus its local (start, end).
+  """
+  date = event_data.get("date")
+  start_time = event_data.get("start_time", "10:00")
+  end_time = event_data.get("end_time", "11:00")
+
+  start_dt = datetime.datetime.fromisoformat(f"{date}T{start_time}")
+  end_dt = datetime.datetime.fromisoformat(f"{event_data.get('end_date', date)}T{end_time}")
+  if end_dt <= start_dt:
+    # e.g. 23:00 - 00:30
+    end_dt += datetime.timedelta(days=1)
+
+  event = {
+    "summary": event_data["title"],
+    "start": {"dateTime":start_dt.isoformat(), "timeZone": TIMEZONE},
+    "end": {"dateTime": end_dt.isoformat(), "timeZone": TIMEZONE}
+  }
+  return event, start_dt, end_dt
+
+
+def _remember_created(created):
+  calendar_cache.invalidate()
+  if EVENT_MIRROR_ENABLED and created:
+    try:
+      event_store().apply(MIRRORED_CALENDAR, [_entry(e) for e in created])
+    except Exception as e:
+      print(f"[WARN] Could not update local event mirror: {e}")
+
+
 def handle_calendar(prompt):
   """
   Parse simple natural-language scheduling and create an event
   """
   try:
     event_data = _parse_event(prompt)
-    
-    date = event_data.get("date")
-    start_time = event_data.get("start_time", "10:00")
-    end_time = event_data.get("end_time", "11:00")
-    
-    start_dt = datetime.datetime.fromisoformat(f"{date}T{start_time}")
-    end_dt = datetime.datetime.fromisoformat(f"{date}T{end_time}")
+    event, start_dt, end_dt = _event_body(event_data)
     
     service = _get_service()
     
-    event = {
-      "summary": event_data["title"],
-      "start": {"dateTime":start_dt.isoformat(), "timeZone": "Asia/Kolkata"},
-      "end": {"dateTime": end_dt.isoformat(), "timeZone": "Asia/Kolkata"}
-    }
-    
-    created = service.events().insert(calendarId="primary", body=event).execute()
+    with timed("google", "events.insert"):
+      created = service.events().insert(calendarId="primary", body=event).execute()
+    _remember_created([created])
     msg = (
       f"Event created:{event_data['title']}\n"
-      f"Time: {start_time} - {end_time} UTC"
+      f"Time: {start_dt.strftime('%H:%M')} - {end_dt.strftime('%H:%M')} ({TIMEZONE})"
     )
     return make_response("CalendarAgent", True, msg, created)
   
   except Exception as e:
     return make_response("CalendarAgent", False, f"Failed to schedule {e}")
-  
-def get_all_events():
+
+
+def _insert_batch(bodies):
+  """
+  Insert event bodies through Google batch requests (up to 50 per round trip).
+  Returns one (created_event, error) pair per body, in order.
+  """
   service = _get_service()
-  now = datetime.datetime.utcnow()
-  tomorrow = now + datetime.timedelta(days=1)
+  results = [(None, "no response")] * len(bodies)
+
+  def on_response(request_id, response, exception):
+    i = int(request_id)
+    results[i] = (None, str(exception)) if exception is not None else (response, None)
+
+  for first in range(0, len(bodies), BATCH_MAX_EVENTS):
+    batch = service.new_batch_http_request(callback=on_response)
+    for i in range(first, min(first + BATCH_MAX_EVENTS, len(bodies))):
+      batch.add(service.events().insert(calendarId="primary", body=bodies[i]), request_id=str(i))
+    try:
+      with timed("google", "events.batch_insert"):
+        batch.execute()
+    except Exception as e:
+      # The whole round trip failed; mark whatever didn't answer
+      for i in range(first, min(first + BATCH_MAX_EVENTS, len(bodies))):
+        if results[i][0] is None:
+          results[i] = (None, str(e))
+  return results
 
-  start = datetime.datetime(tomorrow.year, tomorrow.month, tomorrow.day, 0, 0, 0).isoformat() + 'Z'
-  end = datetime.datetime(tomorrow.year, tomorrow.month, tomorrow.day, 23, 59, 0).isoformat() + 'Z'
 
-  events_result = service.events().list(
-      calendarId="primary",
-      timeMin=start,
-      timeMax=end,
-      singleEvents=True,
-      orderBy="startTime"
-  ).execute()
+def handle_calendar_bulk(prompt):
+  """
+  Create several events at once: one parse, one batch request to Google,
+  and a per-event success/failure report.
+  """
+  try:
+    parsed = _parse_events_bulk(prompt)
+    if not parsed:
+      return make_response("CalendarAgent", False, "❌ No events found in the request")
 
-  events = events_result.get("items", [])
+    items, bodies = [], []
+    created, failed = [], []
+    for event_data in parsed:
+      try:
+        body, start_dt, end_dt = _event_body(event_data)
+      except Exception as e:
+        failed.append({"title": event_data.get("title", ""), "error": f"invalid date/time: {e}"})
+        continue
+      items.append({
+        "title": body["summary"],
+        "date": start_dt.date().isoformat(),
+        "start_time": start_dt.strftime("%H:%M"),
+        "end_time": end_dt.strftime("%H:%M"),
+      })
+      bodies.append(body)
+
+    results = _insert_batch(bodies) if bodies else []
+    for item, (event, error) in zip(items, results):
+      if error:
+        failed.append({**item, "error": error})
+      else:
+        created.append({**item, "id": event.get("id"), "link": event.get("htmlLink")})
+    _remember_created([event for event, error in results if not error])
+
+    lines = [f"  • {e['title']}: {e['date']} {e['start_time']} - {e['end_time']}" for e in created]
+    lines += [f"  ✗ {e['title']}: {e['error']}" for e in failed]
+    msg = (
+      f"✅ Created {len(created)} of {len(parsed)} events ({TIMEZONE})\n\n" + "\n".join(lines)
+    )
+    return make_response("CalendarAgent", bool(created), msg, {
+      "created": created,
+      "failed": failed
+    })
+
+  except Exception as e:
+    return make_response("CalendarAgent", False, f"❌ Failed to schedule events: {e}")
+  
+@timed("google", "get_all_events")
+def get_all_events():
   busy_slots = []
 
-  for e in events:
+  for e in _tomorrow_events():
       start_time = e["start"].get("dateTime", e["start"].get("date"))
       end_time = e["end"].get("dateTime", e["end"].get("date"))
       summary = e.get("summary", "No Title")
@@ -1,91 +1,471 @@
 from __future__ import print_function
+import datetime
 import os
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+import re
+import threading
+import time
 from dotenv import load_dotenv
+from backend.utils.metrics import timed
+from backend.utils import clients, google_clients
+from backend.integrations.mail_index import MailIndex
 from email.mime.text import MIMEText
+from email.utils import getaddresses
+from zoneinfo import ZoneInfo
 import json
 import base64
 
 load_dotenv()
-SCOPES = ["https://www.googleapis.com/auth/calendar",
-          "https://www.googleapis.com/auth/gmail.readonly",
-          "https://www.googleapis.com/auth/gmail.send",
-        ]
 
 
 def _get_service():
-  creds_json = os.getenv("GOOGLE_CREDENTIALS_JSON")
-  token_json = os.getenv("GOOGLE_TOKEN_JSON")
-
-  if creds_json and token_json:
-      try:
-          # Load both JSONs
-          creds_data = json.loads(token_json)
-          creds = Credentials.from_authorized_user_info(creds_data, scopes=SCOPES)
-
-          # Refresh token if expired
-          if creds and creds.expired and creds.refresh_token:
-              creds.refresh(Request())
-              try:
-                service = build("gmail","v1",credentials=creds)
-                return service
-              except Exception as e:
-                raise RuntimeError(f"Failed to build Gmail service: {e}")
-          try:
-            service = build("gmail","v1",credentials=creds)
-            return service
-          except Exception as e:
-            raise RuntimeError(f"Failed to build Gmail service: {e}")
-      except Exception as e:
-          print(f"[WARN] Failed to load Google credentials from env vars: {e}")
-          raise RuntimeError(f"Failed to load Google Credentials from env vars: {e}")
+  """
+  This thread's cached Gmail service (shared, auto-refreshed credentials)
+  """
+  return google_clients.service("gmail", "v1")
+
+@timed("google", "send_email")
+def _send_email(to: str, subject: str, body: str):
+  service = _get_service()
+  message = MIMEText(body)
+  message["to"] = to
+  message["subject"] = subject
+  
+  raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode()
+  service.users().messages().send(
+    userId ="me",body ={"raw": raw_message}
+  ).execute()
+  
+  return f"Email sent to {to} with subject{subject}"
 
 def send_email(to: str, subject: str, body: str):
+  # Errors are caught here, outside `timed`, so they still count as failures in /metrics
   try:
-    service = _get_service()
-    message = MIMEText(body)
-    message["to"] = to
-    message["subject"] = subject
-    
-    raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode()
-    service.users().messages().send(
-      userId ="me",body ={"raw": raw_message}
-    ).execute()
-    
-    return f"Email sent to {to} with subject{subject}"
+    return _send_email(to, subject, body)
   except Exception as e:
     return f"Could not send email. Error - {e}"
 
-def read_email(query: str, max_results: int = 3):
-  try:
+# Only these headers are downloaded when reading mail
+METADATA_HEADERS = ["Subject", "From"]
+# Gmail allows 100 calls per batch but starts rate limiting above ~50
+MAIL_BATCH_SIZE = int(os.getenv("POS_MAIL_BATCH_SIZE", "50"))
+# messages.list returns at most 500 ids per page
+LIST_PAGE_SIZE = 500
+# Calls inside a batch that hit rate limits or server errors are retried this many times
+MAIL_FETCH_RETRIES = int(os.getenv("POS_MAIL_FETCH_RETRIES", "2"))
+RETRY_STATUSES = {429, 500, 502, 503}
+
+
+def _list_message_ids(service, query: str, max_results: int):
+  """
+  Ids of the newest `max_results` messages matching `query`, following pages.
+  """
+  ids, page_token = [], None
+  while len(ids) < max_results:
+    kwargs = {"userId": "me", "q": query, "maxResults": min(max_results - len(ids), LIST_PAGE_SIZE)}
+    if page_token:
+      kwargs["pageToken"] = page_token
+    with timed("google", "messages.list"):
+      results = service.users().messages().list(**kwargs).execute()
+    ids += [m["id"] for m in results.get("messages", [])]
+    page_token = results.get("nextPageToken")
+    if not page_token:
+      break
+  return ids[:max_results]
+
+
+def _status(e):
+  return getattr(getattr(e, "resp", None), "status", None)
+
+
+def _fetch_metadata(service, ids, headers=METADATA_HEADERS):
+  """
+  Metadata (`headers`, snippet, labels) of each message, fetched in batch requests.
+  Calls that were rate limited are retried with backoff.
+  Returns ({id: message}, [(id, exception)]).
+  """
+  found, failed = _fetch_batches(service, ids, headers)
+  for attempt in range(MAIL_FETCH_RETRIES):
+    retry = [i for i, e in failed if _status(e) in RETRY_STATUSES]
+    if not retry:
+      break
+    time.sleep(2 ** attempt)
+    failed = [(i, e) for i, e in failed if _status(e) not in RETRY_STATUSES]
+    more, failed_again = _fetch_batches(service, retry, headers)
+    found.update(more)
+    failed += failed_again
+  return found, failed
+
+
+def _fetch_batches(service, ids, headers):
+  found = {}
+  failed = []
+
+  def on_response(request_id, response, exception):
+    if exception is not None:
+      failed.append((request_id, exception))
+    else:
+      found[request_id] = response
+
+  for first in range(0, len(ids), MAIL_BATCH_SIZE):
+    batch = service.new_batch_http_request(callback=on_response)
+    for msg_id in ids[first:first + MAIL_BATCH_SIZE]:
+      batch.add(
+        service.users().messages().get(
+          userId="me", id=msg_id, format="metadata", metadataHeaders=headers
+        ),
+        request_id=msg_id,
+      )
+    with timed("google", "messages.batch_get"):
+      batch.execute()
+  return found, failed
+
+
+def _get_metadata(service, ids, headers=METADATA_HEADERS):
+  """
+  Like `_fetch_metadata`, but returns the messages in the order of `ids`;
+  ones that failed are skipped.
+  """
+  found, failed = _fetch_metadata(service, ids, headers)
+  if failed:
+    print(f"[WARN] Could not fetch {len(failed)} of {len(ids)} emails: {failed[0][1]}")
+  return [found[i] for i in ids if i in found]
+
+
+def _header(msg_data, name, default):
+  headers = msg_data.get("payload", {}).get("headers", [])
+  return next((h["value"] for h in headers if h["name"].lower() == name.lower()), default)
+
+
+def _format(sender, subject, snippet):
+  return f"From: {sender}\n Subject: {subject}\n Snippet:{snippet[:100]}"
+
+
+# Local mail index: message metadata and snippets, kept current with Gmail's history.list
+MAIL_INDEX_ENABLED = os.getenv("POS_MAIL_INDEX", "1") == "1"
+MAIL_SYNC_INTERVAL = float(os.getenv("POS_MAIL_SYNC_INTERVAL", "60"))
+MAIL_FULL_SYNC_INTERVAL = float(os.getenv("POS_MAIL_FULL_SYNC_INTERVAL", "86400"))
+# What a full sync downloads: the last N days, capped at this many messages
+MAIL_INDEX_DAYS = int(os.getenv("POS_MAIL_INDEX_DAYS", "90"))
+MAIL_INDEX_MAX = int(os.getenv("POS_MAIL_INDEX_MAX", "2000"))
+# An index that hasn't synced for this long is not trusted for answers
+MAIL_INDEX_MAX_AGE = float(os.getenv("POS_MAIL_INDEX_MAX_AGE", "600"))
+INDEX_HEADERS = ["Subject", "From", "To", "Cc"]
+HISTORY_TYPES = ["messageAdded", "messageDeleted", "labelAdded", "labelRemoved"]
+TIMEZONE = os.getenv("POS_TIMEZONE", "Asia/Kolkata")
+
+_mail_sync_lock = threading.Lock()
+_mail_sync_thread = None
+_mail_stats = {"local_answers": 0, "api_answers": 0}
+
+
+def mail_index():
+  return clients.get_or_create("mail_index", MailIndex)
+
+
+def _record(msg):
+  recipients = ", ".join(v for v in (_header(msg, "To", ""), _header(msg, "Cc", "")) if v)
+  return {
+    "id": msg["id"],
+    "thread_id": msg.get("threadId"),
+    "ts": int(msg.get("internalDate", 0)) // 1000,
+    "sender": _header(msg, "From", ""),
+    "recipients": recipients,
+    "subject": _header(msg, "Subject", ""),
+    "snippet": msg.get("snippet", ""),
+    "labels": msg.get("labelIds", []),
+  }
+
+
+def _full_mail_sync(service, index):
+  # Take the history id first so changes made while downloading are replayed next time
+  history_id = service.users().getProfile(userId="me").execute()["historyId"]
+  ids = _list_message_ids(service, f"newer_than:{MAIL_INDEX_DAYS}d", MAIL_INDEX_MAX)
+  found, failed = _fetch_metadata(service, ids, INDEX_HEADERS)
+  records = [_record(found[i]) for i in ids if i in found]
+  covers_from = time.time() - MAIL_INDEX_DAYS * 86400
+  # `ids` is newest first: the index is only complete down to the first gap
+  missing = {i for i, _ in failed}
+  first_gap = next((n for n, i in enumerate(ids) if i in missing), None)
+  if first_gap is None and len(ids) >= MAIL_INDEX_MAX:
+    first_gap = len(ids)
+  if first_gap is not None:
+    complete = [_record(found[i]) for i in ids[:first_gap]]
+    # Strictly newer than the last complete message, so ties with the gap aren't trusted
+    covers_from = (min(r["ts"] for r in complete) + 1) if complete else time.time()
+  if failed:
+    print(f"[WARN] Mail index is missing {len(failed)} of {len(ids)} emails: {failed[0][1]}")
+  count = index.replace_all(records)
+  index.set_meta("covers_from", covers_from)
+  index.set_meta("last_full_sync", time.time())
+  return history_id, count
+
+
+def _incremental_mail_sync(service, index, history_id):
+  """
+  Replay history since `history_id`. Returns (new history id, messages changed),
+  or None when Gmail no longer has that history (404).
+  """
+  changed, deleted = set(), set()
+  kwargs = {"userId": "me", "startHistoryId": history_id, "historyTypes": HISTORY_TYPES}
+  latest = history_id
+  while True:
+    try:
+      with timed("google", "history.list"):
+        page = service.users().history().list(**kwargs).execute()
+    except Exception as e:
+      if _status(e) == 404:
+        return None
+      raise
+    for record in page.get("history", []):
+      for key in ("messagesAdded", "labelsAdded", "labelsRemoved"):
+        changed.update(item["message"]["id"] for item in record.get(key, []))
+      deleted.update(item["message"]["id"] for item in record.get("messagesDeleted", []))
+    latest = page.get("historyId", latest)
+    if not page.get("nextPageToken"):
+      break
+    kwargs["pageToken"] = page["nextPageToken"]
+
+  changed -= deleted
+  found, failed = _fetch_metadata(service, sorted(changed), INDEX_HEADERS)
+  # Gone since the history entry was written
+  deleted.update(i for i, e in failed if _status(e) == 404)
+  index.apply([_record(m) for m in found.values()], deleted)
+  if any(_status(e) != 404 for _, e in failed):
+    # Keep the old history id so the failed messages are fetched again next time
+    print(f"[WARN] Mail sync could not fetch {len(failed)} messages, will retry")
+    latest = history_id
+  return latest, len(found) + len(deleted)
+
+
+def sync_mail(full=False):
+  """
+  Bring the local mail index up to date.
+  Incremental syncs replay Gmail's history since the stored historyId; an
+  expired history id falls back to a full sync.
+  """
+  with _mail_sync_lock:
+    index = mail_index()
     service = _get_service()
-    results = service.users().messages().list(
-      userId = "me", q = query, maxResults = max_results
-    ).execute()
-    messages = results.get("messages",[])
-    
-    if not messages:
+    history_id = None if full else index.get_meta("history_id")
+    started = time.time()
+    result = _incremental_mail_sync(service, index, history_id) if history_id else None
+    mode = "incremental"
+    if result is None:
+      if history_id:
+        print("📧 Gmail history expired, running a full sync")
+      mode = "full"
+      result = _full_mail_sync(service, index)
+    new_history_id, count = result
+    index.set_meta("history_id", new_history_id)
+    index.set_meta("last_sync", started)
+    print(f"📧 Synced {count} emails ({mode})")
+    return count
+
+
+def _mail_sync_loop():
+  while True:
+    try:
+      last_full = float(mail_index().get_meta("last_full_sync", 0) or 0)
+      sync_mail(full=time.time() - last_full > MAIL_FULL_SYNC_INTERVAL)
+    except Exception as e:
+      print(f"[WARN] Background mail sync failed: {e}")
+    time.sleep(MAIL_SYNC_INTERVAL)
+
+
+def _mail_index():
+  """
+  The mail index if it is recent enough to answer from, else None.
+  The first call starts the background sync instead of waiting on a full download.
+  """
+  global _mail_sync_thread
+  if not MAIL_INDEX_ENABLED:
+    return None
+  try:
+    index = mail_index()
+  except Exception as e:
+    print(f"[WARN] Mail index unavailable: {e}")
+    return None
+  if _mail_sync_thread is None:
+    with _mail_sync_lock:
+      if _mail_sync_thread is None:
+        _mail_sync_thread = threading.Thread(target=_mail_sync_loop, name="mail-sync", daemon=True)
+        _mail_sync_thread.start()
+  last_sync = float(index.get_meta("last_sync", 0) or 0)
+  return index if time.time() - last_sync < MAIL_INDEX_MAX_AGE else None
+
+
+_QUERY_TOKEN = re.compile(r'(-?)(?:(\w+):)?("[^"]*"|\S+)')
+_AGE_UNITS = {"d": 86400, "m": 30 * 86400, "y": 365 * 86400}
+_IS_LABELS = {"unread": "UNREAD", "starred": "STARRED", "important": "IMPORTANT"}
+_IN_LABELS = {"inbox": "INBOX", "sent": "SENT", "starred": "STARRED", "important": "IMPORTANT", "drafts": "DRAFT"}
+
+
+def _fts_terms(value):
+  words = re.findall(r"\w+", value.strip('"'))
+  if not words:
+    return None
+  if value.startswith('"'):
+    return '"' + " ".join(words) + '"'
+  return " ".join(f'"{w}"' for w in words)
+
+
+def _date_ts(value):
+  if value.isdigit():
+    return int(value)
+  day = datetime.date.fromisoformat(value.replace("/", "-"))
+  return datetime.datetime.combine(day, datetime.time(), ZoneInfo(TIMEZONE)).timestamp()
+
+
+def _index_query(query: str):
+  """
+  Translate a Gmail search query into `MailIndex.search` arguments, or None
+  when it uses anything the index can't answer exactly (negation, OR,
+  attachments, user labels, spam/trash, ...).
+  """
+  args = {"text": [], "subject": [], "senders": [], "recipients": [], "labels": [],
+          "exclude_labels": ["SPAM", "TRASH"], "after_ts": None, "before_ts": None}
+  try:
+    for negated, op, value in _QUERY_TOKEN.findall(query or ""):
+      op = op.lower()
+      if negated or value in ("OR", "AND") or re.search(r"[{}()]", value):
+        return None
+      plain = value.strip('"')
+      if not op:
+        terms = _fts_terms(value)
+        if terms:
+          args["text"].append(terms)
+      elif op == "from":
+        args["senders"].append(plain)
+      elif op in ("to", "cc"):
+        args["recipients"].append(plain)
+      elif op == "subject":
+        terms = _fts_terms(value)
+        if terms:
+          args["subject"].append(terms)
+      elif op == "is" and plain.lower() in _IS_LABELS:
+        args["labels"].append(_IS_LABELS[plain.lower()])
+      elif op == "is" and plain.lower() == "read":
+        args["exclude_labels"].append("UNREAD")
+      elif op in ("in", "label") and plain.lower() in _IN_LABELS:
+        args["labels"].append(_IN_LABELS[plain.lower()])
+      elif op in ("newer_than", "older_than"):
+        m = re.fullmatch(r"(\d+)([dmy])", plain.lower())
+        if not m:
+          return None
+        ts = time.time() - int(m.group(1)) * _AGE_UNITS[m.group(2)]
+        args["after_ts" if op == "newer_than" else "before_ts"] = ts
+      elif op in ("after", "before"):
+        args["after_ts" if op == "after" else "before_ts"] = _date_ts(plain)
+      else:
+        return None
+  except ValueError:
+    return None
+  args["text"] = " AND ".join(args["text"]) or None
+  args["subject"] = " AND ".join(args["subject"]) or None
+  return args
+
+
+def _search_index(index, query: str, max_results: int):
+  """
+  Answer a Gmail query from the index, or None if the index can't be sure.
+  Free text always goes to Gmail, which also searches message bodies. Other
+  queries are answered when all `max_results` hits fall inside the complete
+  span of the index, or when the query itself starts inside it.
+  """
+  args = _index_query(query)
+  if args is None or args["text"]:
+    return None
+  hits = index.search(**args, limit=max_results)
+  covers_from = float(index.get_meta("covers_from", time.time()))
+  bounded = args["after_ts"] is not None and args["after_ts"] >= covers_from
+  if bounded or (len(hits) >= max_results and hits[-1]["ts"] >= covers_from):
+    return hits
+  return None
+
+
+@timed("google", "read_email")
+def _read_email(query: str, max_results: int):
+  index = _mail_index()
+  hits = _search_index(index, query, max_results) if index else None
+  if hits is not None:
+    _mail_stats["local_answers"] += 1
+    if not hits:
       return "No matching emails found"
+    return "\n\n".join(_format(h["sender"], h["subject"], h["snippet"]) for h in hits)
+
+  _mail_stats["api_answers"] += 1
+  service = _get_service()
+  ids = _list_message_ids(service, query, max_results)
+  
+  if not ids:
+    return "No matching emails found"
+  
+  found, failed = _fetch_metadata(service, ids)
+  if failed and not found:
+    raise RuntimeError(failed[0][1])
+  
+  summaries = []
+  for msg_data in (found[i] for i in ids if i in found):
+    subject = _header(msg_data, "Subject", "(no subject)")
+    sender = _header(msg_data, "From", "(unknown sender)")
+    summaries.append(_format(sender, subject, msg_data.get("snippet","")))
+  if failed:
+    summaries.append(f"({len(failed)} of {len(ids)} matching emails could not be fetched: {failed[0][1]})")
     
-    summaries = []
-    for msg in messages:
-      msg_data = service.users().messages().get(
-        userId="me",id=msg["id"]
-      ).execute()
-      
-      headers = msg_data["payload"]["headers"]
-      subject = next(
-        (h["value"] for h in headers if h["name"]== "Subject"),"(no subject)"
-      )
-      sender = next(
-        (h["value"] for h in headers if h["name"]=="From"), "(unknown sender)"
-      )
-      snippet = msg_data.get("snippet","")[:100]
-      summaries.append(f"From: {sender}\n Subject: {subject}\n Snippet:{snippet}")
-      
-    return "\n\n".join(summaries)
+  return "\n\n".join(summaries)
+
+
+def read_email(query: str, max_results: int = 3):
+  try:
+    return _read_email(query, max_results)
   except Exception as e:
     return f"Could not read emails. Error - {e}"
 
+
+@timed("google", "find_contacts")
+def _find_contacts(name: str, max_results: int):
+  index = _mail_index()
+  people = index.addresses(name.strip(), max_results) if index else []
+  if not people:
+    # Not indexed (yet): look at recent mail with this person instead
+    service = _get_service()
+    # Quoted so multi-word names stay one term; Gmail has no escape for inner quotes
+    phrase = name.replace('"', " ").strip()
+    ids = _list_message_ids(service, f'from:"{phrase}" OR to:"{phrase}"', 20)
+    seen = {}
+    for msg in _get_metadata(service, ids, INDEX_HEADERS):
+      fields = [_header(msg, h, "") for h in ("From", "To", "Cc")]
+      for person, email in getaddresses(fields):
+        if "@" in email and (name.lower() in email.lower() or name.lower() in person.lower()):
+          entry = seen.setdefault(email.lower(), {"email": email.lower(), "name": person, "messages": 0})
+          entry["messages"] += 1
+    people = sorted(seen.values(), key=lambda p: -p["messages"])[:max_results]
+  if not people:
+    return f"No contacts found matching {name}"
+  return "\n".join(
+    f"{p['name']} <{p['email']}> ({p['messages']} emails)" if p["name"] else f"{p['email']} ({p['messages']} emails)"
+    for p in people
+  )
+
+
+def find_contacts(name: str, max_results: int = 5):
+  """
+  Email addresses of people whose name or address contains `name`,
+  most frequently seen first.
+  """
+  if not name or not name.strip():
+    return "Please provide a name or part of an address to look up"
+  try:
+    return _find_contacts(name, max_results)
+  except Exception as e:
+    return f"Could not look up contacts. Error - {e}"
+
+
+def mail_stats() -> dict:
+  stats = dict(_mail_stats)
+  if MAIL_INDEX_ENABLED:
+    try:
+      stats.update(mail_index().stats())
+    except Exception:
+      pass
+  return stats
@@ -1,7 +1,18 @@
+from backend.memory.pinecone_db import add_previous_convos
+from backend.memory.session_store import HISTORY_MAX, HISTORY_CONTEXT
+
 def memory_node(state):
     prompt = state.get("prompt", "")
     response = state.get("response", "")
 
     if prompt and response:
+        entry = f"User:{prompt}\n Response: {response}"
+        turns = (state.get("turns") or 0) + 1
+
+        # Each time the session ring buffer fills up, archive its recent turns to Pinecone
+        if turns % HISTORY_MAX == 0:
+            recent = ((state.get("history") or []) + [entry])[-HISTORY_CONTEXT:]
+            add_previous_convos("\n\n".join(recent))
+
         print(f"💬 updated short-term semantic memory")
-        return {"memory_status": "Memory updated."}
+        return {"memory_status": "Memory updated.", "history": [entry], "turns": 1}
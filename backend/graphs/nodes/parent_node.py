@@ -1,7 +1,5 @@
-import os,json
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langgraph.prebuilt import create_react_agent
-from dotenv import load_dotenv
+import json
+from langchain_core.runnables import RunnableConfig
 
 from backend.graphs.tools.task_tool import task_tool
 from backend.graphs.tools.calendar_tool import calendar_tool
@@ -9,28 +7,97 @@ from backend.graphs.tools.report_tool import report_tool
 from backend.graphs.tools.memory_tool import add_memory_tool
 from backend.graphs.tools.search_memory_tool import search_memory_tool
 from backend.graphs.tools.email_tool import email_tool
+from backend.memory.session_store import HISTORY_CONTEXT
+from backend.utils import clients
+
+
+def build_agent(llm):
+    """
+    Create the React agent with all tools. Built lazily through the client registry.
+    """
+    from langgraph.prebuilt import create_react_agent
+
+    return create_react_agent(
+        llm,
+        tools=[
+            task_tool,           # Creates tasks in Notion with XP
+            calendar_tool,       # Schedules events in Google Calendar
+            report_tool,         # Generates productivity reports
+            add_memory_tool,     # Stores memories in vector DB
+            search_memory_tool,
+            email_tool
+        ]
+    )
+
+
+ADDITIONAL_INSTRUCTIONS = """
+        Cater to the users rquest and use the tools given to you whenever needed to give the best possible answer to the user.
+        Call multiple tools if needed to gather more context related to the user needs and give the best possible answer.
+        """
+
+
+def _recent_memory(state):
+    """
+    Short-term context for the agent: the last few turns of this session's history,
+    or an explicit `memory` string when the graph runs without a checkpointer.
+    """
+    history = state.get("history") or []
+    if history:
+        return "\n\n".join(history[-HISTORY_CONTEXT:])
+    return state.get("memory", "")
+
+
+def _error_result(prompt, e):
+    import traceback
+    traceback.print_exc()
+
+    return {
+        "intent": "error",
+        "error": str(e),
+        "response": f"I encountered an error: {str(e)}",
+        "prompt": prompt
+    }
+
+
+def _build_result(result, prompt, prev_memory):
+    """
+    Turn the React agent output into the graph state update.
+    """
+    # Extract messages from result
+    messages = result.get("messages", [])
+    final_message = messages[-1] if messages else None
+    response_text = final_message.content if final_message else "No response generated"
+    
+    # Track which tools were called
+    tool_calls = []
+    for msg in messages:
+        if hasattr(msg, 'tool_calls') and msg.tool_calls:
+            for tc in msg.tool_calls:
+                tool_calls.append({
+                    "tool": tc.get("name"),
+                    "args": tc.get("args")
+                })
+    
+    new_entry = f"USER: {prompt}\nASSISTANT: {response_text}"
+    new_memory = prev_memory + "\n" + new_entry
+    
+    intent = "" 
+    try: 
+        start, end = final_message.content.find("{"),final_message.content.rfind("}") +1
+        res_json = json.loads(final_message.content[start:end])
+        intent = res_json["intent"]
+    except Exception:
+        intent = "direct_response"
+    
+    return {
+        "intent": intent if intent else "direct_response",
+        "response": response_text,
+        "tool_calls": tool_calls,
+        "messages": messages,
+        "prompt": prompt,
+        "memory": new_memory
+    }
 
-load_dotenv()
-
-# Initialize LangChain's Gemini wrapper
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    google_api_key=os.getenv("GEMINI_API_KEY"),
-    temperature=0.7
-)
-
-# Create React agent with all tools
-agent = create_react_agent(
-    llm,
-    tools=[
-        task_tool,           # Creates tasks in Notion with XP
-        calendar_tool,       # Schedules events in Google Calendar
-        report_tool,         # Generates productivity reports
-        add_memory_tool,     # Stores memories in vector DB
-        search_memory_tool,
-        email_tool
-    ]
-)
 
 def parent_node(state):
     """
@@ -38,7 +105,7 @@ def parent_node(state):
     The agent automatically decides which tools to call based on user input.
     """
     prompt = state.get("prompt", "")
-    prev_memory = state.get("memory", "")
+    prev_memory = _recent_memory(state)
 
     reasoning_input = f"{prev_memory}\n\nUser: {prompt}"
     
@@ -50,57 +117,41 @@ def parent_node(state):
             "prompt": prompt
         }
     
-    try:        
-        additional_instructions = f"""
-        Cater to the users rquest and use the tools given to you whenever needed to give the best possible answer to the user.
-        Call multiple tools if needed to gather more context related to the user needs and give the best possible answer.
-        """
-        
+    try:
         # Invoke agent - it handles tool calling automatically
-        result = agent.invoke({"messages": [("user",  additional_instructions + reasoning_input)]})
-        
-        # Extract messages from result
-        messages = result.get("messages", [])
-        final_message = messages[-1] if messages else None
-        response_text = final_message.content if final_message else "No response generated"
-        
-        # Track which tools were called
-        tool_calls = []
-        for msg in messages:
-            if hasattr(msg, 'tool_calls') and msg.tool_calls:
-                for tc in msg.tool_calls:
-                    tool_calls.append({
-                        "tool": tc.get("name"),
-                        "args": tc.get("args")
-                    })
-        
-        new_entry = f"USER: {prompt}\nASSISTANT: {response_text}"
-        new_memory = prev_memory + "\n" + new_entry
-        
-        intent = "" 
-        try: 
-            start, end = final_message.content.find("{"),final_message.content.rfind("}") +1
-            res_json = json.loads(final_message.content[start:end])
-            intent = res_json["intent"]
-        except Exception:
-            intent = "direct_response"
-        
-        return {
-            "intent": intent if intent else "direct_response",
-            "response": response_text,
-            "tool_calls": tool_calls,
-            "messages": messages,
-            "prompt": prompt,
-            "memory": new_memory
-        }
+        result = clients.react_agent().invoke({"messages": [("user",  ADDITIONAL_INSTRUCTIONS + reasoning_input)]})
+        return _build_result(result, prompt, prev_memory)
         
     except Exception as e:
-        import traceback
-        traceback.print_exc()
-        
+        return _error_result(prompt, e)
+
+
+async def aparent_node(state, config: RunnableConfig = None):
+    """
+    Async variant of parent_node used by `ainvoke`/`astream_events`.
+    The agent awaits Gemini directly and runs the sync tools in worker threads,
+    so a slow turn never blocks the event loop. The graph config is forwarded so
+    token and tool events of the inner agent reach the outer stream.
+    """
+    prompt = state.get("prompt", "")
+    prev_memory = _recent_memory(state)
+
+    reasoning_input = f"{prev_memory}\n\nUser: {prompt}"
+    
+    if not prompt.strip():
         return {
             "intent": "error",
-            "error": str(e),
-            "response": f"I encountered an error: {str(e)}",
+            "response": "No input provided",
+            "error": "Empty prompt",
             "prompt": prompt
-        }
\ No newline at end of file
+        }
+    
+    try:
+        result = await clients.react_agent().ainvoke(
+            {"messages": [("user",  ADDITIONAL_INSTRUCTIONS + reasoning_input)]},
+            config=config
+        )
+        return _build_result(result, prompt, prev_memory)
+        
+    except Exception as e:
+        return _error_result(prompt, e)
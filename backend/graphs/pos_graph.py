@@ -1,15 +1,25 @@
 from langgraph.graph import StateGraph, END
+from langchain_core.runnables import RunnableLambda
 from backend.graphs.pos_state import PosState
-from backend.graphs.nodes.parent_node import parent_node
+from backend.graphs.nodes.parent_node import parent_node, aparent_node
 from backend.graphs.nodes.memory_node import memory_node
 
-  
-graph = StateGraph(PosState)
-graph.add_node("parent", parent_node)
-graph.add_node("memory", memory_node)
 
-graph.add_edge( "parent", "memory")
-graph.add_edge("memory", END)
-graph.set_entry_point("parent")
+def build_graph(checkpointer=None):
+    """
+    Compile the POS graph. With a checkpointer, state (including session history)
+    is persisted per `thread_id` in the run config.
+    """
+    graph = StateGraph(PosState)
+    # Sync and async implementations, so both invoke() and ainvoke() work natively
+    graph.add_node("parent", RunnableLambda(parent_node, afunc=aparent_node))
+    graph.add_node("memory", memory_node)
 
-compiled = graph.compile()
+    graph.add_edge( "parent", "memory")
+    graph.add_edge("memory", END)
+    graph.set_entry_point("parent")
+
+    return graph.compile(checkpointer=checkpointer)
+
+
+compiled = build_graph()
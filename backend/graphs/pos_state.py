@@ -1,4 +1,6 @@
-from typing import TypedDict, List, Optional,Optional
+import operator
+from typing import TypedDict, List, Optional, Annotated
+from backend.memory.session_store import bounded_history
 
 class PosState(TypedDict, total=False):
     prompt: str
@@ -8,4 +10,7 @@ class PosState(TypedDict, total=False):
     memory: str
     messages: str
     memory_status: str
-    error: Optional[str]
\ No newline at end of file
+    error: Optional[str]
+    # Per-session turns, persisted by the checkpointer and bounded to HISTORY_MAX
+    history: Annotated[List[str], bounded_history]
+    turns: Annotated[int, operator.add]
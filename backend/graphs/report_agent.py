@@ -1,4 +1,7 @@
-from backend.integrations.notion_client import get_all_tasks
+import numpy as np
+from backend.integrations.notion_client import get_task_summary
+from backend.integrations.report_history import report_history, AVATAR_COLUMNS
+from backend.integrations.task_model import AVATARS, PRIORITIES
 from datetime import datetime
 from backend.graphs.base_agent import make_response
 
@@ -7,38 +10,23 @@ def handle_report():
     Generates a comprehensive task report with stats and XP breakdown.
     """
     try:
-        tasks = get_all_tasks()
+        summary = get_task_summary()
         
-        if not tasks:
+        if not summary["total_tasks"]:
             return make_response(
                 "ReportAgent", 
                 True, 
                 "📊 No tasks found in your Notion database yet. Create your first task to get started!"
             )
         
-        total = len(tasks)
-        done = [t for t in tasks if t.get("status", "").lower() == "completed"]
-        pending = total - len(done)
-        completion_rate = (len(done) / total * 100) if total > 0 else 0
-        
-        
-        avatars = {}
-        total_xp = 0
-        for t in tasks:
-            avatar = t.get("avatar") or "Unknown"
-            xp = t.get("xp") or 0
-            avatars[avatar] = avatars.get(avatar, 0) + xp
-            total_xp += xp
-        
-       
-        earned_xp = sum(t.get("xp", 0) for t in done)
-        
-       
-        priorities = {"High": 0, "Medium": 0, "Low": 0}
-        for t in tasks:
-            priority = t.get("priority", "Medium")
-            if priority in priorities:
-                priorities[priority] += 1
+        total = summary["total_tasks"]
+        completed = summary["completed"]
+        pending = summary["pending"]
+        completion_rate = summary["completion_rate"]
+        total_xp = summary["total_xp"]
+        earned_xp = summary["earned_xp"]
+        avatars = summary["avatars"]
+        priorities = summary["priorities"]
         
         
         avatar_breakdown = "\n".join([
@@ -51,7 +39,7 @@ def handle_report():
             f"📊 **Productivity Report** - {datetime.now().strftime('%B %d, %Y')}\n\n"
             f"📝 **Task Overview:**\n"
             f"  • Total Tasks: {total}\n"
-            f"  • Completed: {len(done)} ({completion_rate:.1f}%)\n"
+            f"  • Completed: {completed} ({completion_rate:.1f}%)\n"
             f"  • Pending: {pending}\n\n"
             f"🎯 **Priority Breakdown:**\n"
             f"  • High: {priorities['High']}\n"
@@ -64,16 +52,7 @@ def handle_report():
             f"👤 **XP by Avatar:**\n{avatar_breakdown}"
         )
         
-        return make_response("ReportAgent", True, msg, {
-            "total_tasks": total,
-            "completed": len(done),
-            "pending": pending,
-            "completion_rate": completion_rate,
-            "total_xp": total_xp,
-            "earned_xp": earned_xp,
-            "avatars": avatars,
-            "priorities": priorities
-        })
+        return make_response("ReportAgent", True, msg, summary)
         
     except Exception as e:
         import traceback
@@ -83,4 +62,107 @@ def handle_report():
             "ReportAgent", 
             False, 
             f"❌ Failed to generate report: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+def _streaks(active):
+    """
+    (current, longest) runs of consecutive active days. Today doesn't break the
+    current streak until it is over.
+    """
+    if not len(active):
+        return 0, 0
+    edges = np.diff(np.concatenate(([0], active.astype(np.int8), [0])))
+    runs = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+    longest = int(runs.max()) if len(runs) else 0
+
+    ongoing = active if active[-1] else active[:-1]
+    gaps = np.flatnonzero(~ongoing)
+    current = len(ongoing) - (int(gaps[-1]) + 1 if len(gaps) else 0)
+    return current, longest
+
+
+def _change(current, previous):
+    if not previous:
+        return "n/a"
+    return f"{(current - previous) / previous * 100:+.0f}%"
+
+
+def handle_report_history(days: int = 30):
+    """
+    Trends over the daily report snapshots: completions and XP over the last
+    `days`, week over week change, streaks and XP earned per avatar.
+    """
+    try:
+        days = max(1, int(days))
+        history = report_history().columns()
+        if not len(history):
+            return make_response(
+                "ReportAgent",
+                True,
+                "📈 No report history yet. Daily snapshots start with the next task sync."
+            )
+
+        completed_daily = history.daily("completed")
+        xp_daily = history.daily("earned_xp")
+        window = slice(-min(days, len(history)), None)
+
+        done_in_window = int(completed_daily[window].sum())
+        xp_in_window = int(xp_daily[window].sum())
+        this_week, last_week = int(completed_daily[-7:].sum()), int(completed_daily[-14:-7].sum())
+        xp_this_week, xp_last_week = int(xp_daily[-7:].sum()), int(xp_daily[-14:-7].sum())
+        current_streak, longest_streak = _streaks(completed_daily[window] > 0)
+        best = int(np.argmax(completed_daily[window]))
+        best_day = str(history.days[window][best])
+
+        avatars = {
+            avatar: int(history.daily(column)[window].sum())
+            for avatar, column in zip(AVATARS + ("Other",), AVATAR_COLUMNS)
+        }
+        avatars = {a: xp for a, xp in avatars.items() if xp}
+        latest = {c: int(v[-1]) for c, v in history.values.items()}
+
+        avatar_breakdown = "\n".join([
+            f"  • {avatar}: {xp} XP"
+            for avatar, xp in sorted(avatars.items(), key=lambda x: x[1], reverse=True)
+        ]) or "  • No XP earned in this period"
+
+        span = len(history.days[window])
+        msg = (
+            f"📈 **Productivity Trends** - last {span} day{'s' if span != 1 else ''}\n\n"
+            f"✅ **Completed:** {done_in_window} tasks ({done_in_window / span:.1f}/day)\n"
+            f"⭐ **XP Earned:** {xp_in_window}\n"
+            f"🏆 **Best Day:** {best_day} ({int(completed_daily[window][best])} tasks)\n\n"
+            f"📅 **Week over Week:**\n"
+            f"  • Tasks: {this_week} vs {last_week} ({_change(this_week, last_week)})\n"
+            f"  • XP: {xp_this_week} vs {xp_last_week} ({_change(xp_this_week, xp_last_week)})\n\n"
+            f"🔥 **Streaks:** current {current_streak} days, longest {longest_streak} days\n\n"
+            f"🎯 **Priority Mix Now:** High {latest['high']}, Medium {latest['medium']}, Low {latest['low']}\n\n"
+            f"👤 **XP Earned by Avatar:**\n{avatar_breakdown}"
+        )
+
+        return make_response("ReportAgent", True, msg, {
+            "days": [str(d) for d in history.days[window]],
+            "completed_per_day": completed_daily[window].tolist(),
+            "xp_per_day": xp_daily[window].tolist(),
+            "pending": (history.values["total"] - history.values["completed"])[window].tolist(),
+            "completed_total": done_in_window,
+            "xp_total": xp_in_window,
+            "week_over_week": {
+                "completed": [this_week, last_week],
+                "xp": [xp_this_week, xp_last_week],
+            },
+            "current_streak": current_streak,
+            "longest_streak": longest_streak,
+            "avatars_earned": avatars,
+            "priorities": {p: latest[p.lower()] for p in PRIORITIES},
+        })
+
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+
+        return make_response(
+            "ReportAgent",
+            False,
+            f"❌ Failed to generate report history: {str(e)}"
+        )
@@ -1,15 +1,27 @@
-from backend.integrations.notion_client import add_task_to_notion
+from backend.integrations.notion_client import add_task_to_notion, BATCH_CONCURRENCY
 from backend.graphs.base_agent import make_response
-from backend.graphs.xp_agent import handle_xp_estimation
-import os
-import google.generativeai as genai
-from dotenv import load_dotenv
+from backend.graphs.xp_agent import handle_xp_estimation, estimate_xp_bulk, record_xp
+from concurrent.futures import ThreadPoolExecutor
+from backend.utils.metrics import timed
+from backend.utils import clients
 import json
 import datetime
 
-load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-model = genai.GenerativeModel("gemini-2.0-flash")
+VALID_AVATARS = ["Producer", "Administrator", "Entrepreneur", "Integrator"]
+
+
+def _validate_task(data: dict) -> dict:
+    # Validate priority
+    if data.get("priority") not in ["High", "Medium", "Low"]:
+        data["priority"] = "Medium"
+    
+    # Validate avatar
+    if data.get("avatar") not in VALID_AVATARS:
+        data["avatar"] = "Producer"
+    
+    data.setdefault("suggested_time", "")
+    return data
+
 
 def _parse_task(prompt: str) -> dict:
     """
@@ -42,7 +54,8 @@ def _parse_task(prompt: str) -> dict:
     """
     
     try:
-        result = model.generate_content(prompt_text)
+        with timed("llm", "task_agent._parse_task"):
+            result = clients.gemini_model().generate_content(prompt_text)
         text = result.text.strip()
         
         # Extract JSON from response
@@ -59,16 +72,7 @@ def _parse_task(prompt: str) -> dict:
         if not all(k in data for k in required):
             raise ValueError("Missing required fields")
         
-        # Validate priority
-        if data["priority"] not in ["High", "Medium", "Low"]:
-            data["priority"] = "Medium"
-        
-        # Validate avatar
-        valid_avatars = ["Producer", "Administrator", "Entrepreneur", "Integrator"]
-        if data["avatar"] not in valid_avatars:
-            data["avatar"] = "Producer"
-        
-        return data
+        return _validate_task(data)
         
     except Exception as e:
         # Fallback with sensible defaults
@@ -90,13 +94,16 @@ def handle_tasks(prompt: str):
         parsed = _parse_task(prompt)
         
         
-        xp_result = handle_xp_estimation(parsed)
+        xp_result = handle_xp_estimation(parsed, record=False)
         xp_value = xp_result.get("xp_assigned", 10) if isinstance(xp_result, dict) else 10
         parsed["xp"] = xp_value
         
         
         
         notion_result = add_task_to_notion(parsed)
+        # Only credit XP once the task actually exists
+        record_xp([(parsed.get("avatar", "Producer"), xp_value, parsed.get("task", ""),
+                    xp_result.get("reason", "") if isinstance(xp_result, dict) else "")])
         
        
         msg = (
@@ -121,4 +128,116 @@ def handle_tasks(prompt: str):
             False, 
             f"❌ Failed to create task: {str(e)}"
         )
-    
\ No newline at end of file
+
+
+def _parse_tasks_bulk(prompt: str) -> list:
+    """
+    Use a single Gemini call to split a brain dump into structured tasks
+    """
+    now = datetime.datetime.now(datetime.timezone(datetime.timedelta(hours=5, minutes=30)))
+    today_str = now.strftime("%Y-%m-%d %H:%M")
+    
+    prompt_text = f"""
+    You are a smart productivity assistant analyzing a list of task requests.
+    
+    Current date/time (Asia/Kolkata): {today_str}
+    
+    Split this input into individual tasks and extract structured data for each:
+    "{prompt}"
+    
+    Respond ONLY with valid JSON (no markdown, no backticks):
+    {{
+      "tasks": [
+        {{
+          "task": "short title (max 6 words)",
+          "priority": "High|Medium|Low",
+          "avatar": "Producer|Administrator|Entrepreneur|Integrator",
+          "suggested_time": "HH:MM-HH:MM format"
+        }}
+      ]
+    }}
+    
+    Avatar guide:
+    - Producer: Creative/building tasks (coding, writing, designing)
+    - Administrator: Organizing, planning, managing
+    - Entrepreneur: Strategic, business, networking
+    - Integrator: Collaboration, communication, team tasks
+    """
+    
+    try:
+        with timed("llm", "task_agent._parse_tasks_bulk"):
+            result = clients.gemini_model().generate_content(prompt_text)
+        text = result.text.strip()
+        
+        start = text.find("{")
+        end = text.rfind("}") + 1
+        if start == -1 or end == 0:
+            raise ValueError("No JSON found in response")
+        
+        tasks = json.loads(text[start:end]).get("tasks", [])
+        return [_validate_task(t) for t in tasks if isinstance(t, dict) and t.get("task")]
+        
+    except Exception as e:
+        # Fallback: one task per non-empty line
+        lines = [l.strip(" -•*\t") for l in prompt.splitlines()]
+        return [
+            {"task": l[:50].capitalize(), "priority": "Medium", "avatar": "Producer", "suggested_time": ""}
+            for l in lines if l
+        ]
+
+
+def handle_tasks_bulk(prompt: str):
+    """
+    Creates many tasks at once: one parse call, XP for the whole batch in one pass,
+    then the Notion pages are created concurrently.
+    """
+    try:
+        parsed = _parse_tasks_bulk(prompt)
+        if not parsed:
+            return make_response("TaskAgent", False, "❌ No tasks found in the request")
+        
+        xp_values, reasons = estimate_xp_bulk(parsed)
+        for task, xp in zip(parsed, xp_values):
+            task["xp"] = xp
+        
+        created, failed = [], []
+        with ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY) as pool:
+            results = list(pool.map(_create_one, parsed))
+        credited = []
+        for (task, error), reason in zip(results, reasons):
+            (failed if error else created).append({**task, "error": error} if error else task)
+            if not error:
+                credited.append((task.get("avatar", "Producer"), task["xp"], task.get("task", ""), reason))
+        # XP is credited only for tasks that made it into Notion
+        record_xp(credited)
+        
+        # Failures first so they are not lost below a long list of created tasks
+        lines = [f"  ✗ {t['task']}: {t['error']}" for t in failed]
+        lines += [f"  • {t['task']} ({t['priority']}, {t['avatar']}, {t['xp']} XP)" for t in created]
+        if created:
+            header = f"✅ Created {len(created)} of {len(parsed)} tasks"
+        else:
+            header = f"❌ Failed to create tasks: none of {len(parsed)} could be added"
+        msg = header + "\n\n" + "\n".join(lines)
+        
+        return make_response("TaskAgent", bool(created), msg, {
+            "created": created,
+            "failed": failed
+        })
+        
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return make_response(
+            "TaskAgent", 
+            False, 
+            f"❌ Failed to create tasks: {str(e)}"
+        )
+
+
+def _create_one(task: dict):
+    try:
+        add_task_to_notion(task)
+        return task, None
+    except Exception as e:
+        return task, str(e)
@@ -1,39 +1,61 @@
 from langchain_core.tools import tool
-from backend.graphs.calender_agent import handle_calendar, get_free_slots, get_busy_slots
+from backend.graphs.calender_agent import handle_calendar, handle_calendar_bulk, get_free_slots, get_busy_slots, find_free_slots
+from backend.utils.response_cache import response_cache
 
 @tool
-def calendar_tool(prompt: str,action: str = "add") -> str:
+def calendar_tool(prompt: str,action: str = "add", days: int = 7, duration_minutes: int = 30,
+                  work_start: str = "09:00", work_end: str = "18:00", buffer_minutes: int = 0,
+                  calendars: str = "primary", weekdays_only: bool = False) -> str:
     """
     Use this tool to interact with the user's Google Calendar for scheduling and availability management.
     Remember to search in memory if user has mentioned their or someone's preferences if they have not been provided expicitly.
-    Supports three primary actions:
+    Supports five primary actions:
     - **"add"**  →  Creates or schedules new calendar events or meetings based on the user's natural language input.
                     Example: "schedule a meeting with Sarah tomorrow at 3pm"
+    - **"add_bulk"** → Creates several events from one prompt (a list, or something recurring like
+                    "block focus time 9-11 every morning this week") in a single batch request.
+                    Reports which events were created and which failed. Prefer this over calling "add" repeatedly.
     - **"free"** →  Retrieves a list of upcoming free time slots from the user's calendar.
                     Returns start → end times for available windows.
     - **"busy"** →  Retrieves a list of upcoming busy or occupied slots from the user's calendar.
                     Returns start → end times for meetings or events already booked.
+    - **"find"** →  Finds free slots across several days in one call, e.g. "a 45-minute slot in the
+                    next two weeks between 9 and 6". Prefer this over calling "free" for each day.
 
     Args:
         prompt (str): A natural language scheduling query or description of the event
-                      (used mainly when `action="add"`).
+                      (used mainly when `action="add"` or `action="add_bulk"`).
         action (str): Determines which calendar function to perform. Accepts one of:
-                      ["add", "free", "busy"]. Defaults to "add".
+                      ["add", "add_bulk", "free", "busy", "find"]. Defaults to "add".
+        days, duration_minutes, work_start, work_end, buffer_minutes, calendars, weekdays_only:
+                      Options for "find": how many days ahead to search (from today), the minimum
+                      slot length, working hours ("HH:MM", local time), padding around existing
+                      events, comma-separated calendar ids, and whether to skip weekends.
 
     Returns:
         str: A human-readable response indicating the result of the action:
-             - Event creation summary (for add)
+             - Event creation summary (for add, per event for add_bulk)
              - List of free slots (for free)
              - List of busy slots (for busy)
              - Or an error message if lookup fails.
 
     Example usage:
         calendar_tool("schedule a call with Alex at 5pm tomorrow", action="add")
+        calendar_tool("focus time 9-11am every weekday morning next week", action="add_bulk")
         calendar_tool("", action="free")
         calendar_tool("", action="busy")
+        calendar_tool("", action="find", days=14, duration_minutes=45, work_start="09:00", work_end="18:00")
     """
     if action.lower() == "add":
         result = handle_calendar(prompt)
+        response_cache.invalidate("calendar_tool add")
+        return str(result)
+    
+    if action.lower() == "add_bulk":
+        result = handle_calendar_bulk(prompt)
+        response_cache.invalidate("calendar_tool add_bulk")
+        if isinstance(result, dict):
+            return result.get("message", str(result))
         return str(result)
     
     if action.lower() == "free":
@@ -52,4 +74,24 @@ def calendar_tool(prompt: str,action: str = "add") -> str:
             return busy_slots_str
         except Exception as e:
             busy_slots_str = f"Calendar lookup failed: {e}"
-            return busy_slots_str
\ No newline at end of file
+            return busy_slots_str
+    
+    if action.lower() == "find":
+        try:
+            slots = find_free_slots(
+                days=days,
+                duration_minutes=duration_minutes,
+                work_start=work_start,
+                work_end=work_end,
+                buffer_minutes=buffer_minutes,
+                calendars=[c.strip() for c in calendars.split(",") if c.strip()],
+                weekdays_only=weekdays_only,
+            )
+            return "\n".join(
+                f"{s.strftime('%a %d %b %H:%M')} → {e.strftime('%H:%M' if e.date() == s.date() else '%a %d %b %H:%M')}"
+                for s, e in slots
+            ) or f"No free slots of {duration_minutes} minutes found."
+        except Exception as e:
+            return f"Calendar lookup failed: {e}"
+    
+    return "❌ Invalid action. Use 'add', 'add_bulk', 'free', 'busy' or 'find'."
@@ -1,5 +1,6 @@
 from langchain_core.tools import tool
-from backend.graphs.email_agent import send_email, read_email
+from backend.graphs.email_agent import send_email, read_email, find_contacts
+from backend.utils.response_cache import response_cache
 
 @tool
 def email_tool(action: str = "send", to: str = "", subject: str = "", body: str = "", query: str = "", max_results: int = 5) ->str:
@@ -9,17 +10,23 @@ def email_tool(action: str = "send", to: str = "", subject: str = "", body: str
 
     Actions:
       - "send": Send an email
-      - "read": Read emails matching a query
+      - "read": Read emails matching a query (Gmail search syntax, e.g. "from:alice newer_than:7d")
+      - "contacts": Look up someone's email address by name or part of the address (put it in `query`).
+                    Use this before "send" when the address is not known.
 
     Args:
       to: recipient email (for send)
       subject: subject line (for send)
       body: message content (for send)
-      query: search query (for read)
-      max_results: number of emails to fetch (for read)
+      query: search query (for read) or name to look up (for contacts)
+      max_results: number of emails/contacts to return (for read and contacts)
     """
   if action == "send":
-      return send_email(to, subject, body)
+      result = send_email(to, subject, body)
+      response_cache.invalidate("email_tool send")
+      return result
   if action == "read":
       return read_email(query, max_results)
-  return "❌ Invalid action. Use 'send' or 'read'."
\ No newline at end of file
+  if action == "contacts":
+      return find_contacts(query, max_results)
+  return "❌ Invalid action. Use 'send', 'read' or 'contacts'."
\ No newline at end of file
@@ -1,5 +1,6 @@
 from langchain_core.tools import tool
 from backend.memory.pinecone_db import add_memory
+from backend.utils.response_cache import response_cache
 from datetime import datetime
 
 @tool
@@ -19,6 +20,7 @@ def add_memory_tool(entry: str, mem_type: str = "conversation") -> str:
         timestamp = datetime.now().isoformat()
         formatted = f"[{mem_type.upper()} @ {timestamp}]\n{entry}"
         add_memory(formatted, mem_type)
+        response_cache.invalidate("add_memory_tool")
         return f"✅ Memory saved: {entry[:50]}... (type: {mem_type})"
     except Exception as e:
         return f"❌ Failed to save memory: {str(e)}"
@@ -1,8 +1,8 @@
 from langchain_core.tools import tool
-from backend.graphs.report_agent import handle_report
+from backend.graphs.report_agent import handle_report, handle_report_history
 
 @tool
-def report_tool() -> str:
+def report_tool(history_days: int = 0) -> str:
     """
     Generates a comprehensive productivity report from Notion tasks.
     Use this when the user asks for a summary, report, progress update, or task statistics.
@@ -14,11 +14,15 @@ def report_tool() -> str:
     - XP breakdown by avatar type
     - Current date context
     
+    Args:
+        history_days: 0 for the current snapshot. For trends ("last 30 days", "this week vs last week",
+                      "my streak"), pass the number of days to look back, e.g. 7 or 30.
+    
     Returns:
         A formatted report with task statistics and completion metrics
     """
     try:
-        result = handle_report()
+        result = handle_report_history(history_days) if history_days else handle_report()
         # Extract message from make_response dict
         if isinstance(result, dict):
             return result.get("message", str(result))
@@ -1,22 +1,28 @@
+from typing import List, Optional
 from langchain_core.tools import tool
-from backend.graphs.task_agent import handle_tasks
-from backend.integrations.notion_client import update_task, get_completed_tasks, get_pending_tasks
+from backend.graphs.task_agent import handle_tasks, handle_tasks_bulk
+from backend.integrations.notion_client import update_task, update_tasks, get_completed_tasks, get_pending_tasks
+from backend.utils.response_cache import response_cache
 
 @tool
-def task_tool(prompt: str= "", action:str = "add", task_name:str = "") -> str:
+def task_tool(prompt: str= "", action:str = "add", task_name:str = "", task_names: Optional[List[str]] = None) -> str:
     """
         Handles task operations in Notion.
 
         Actions:
         - add: Parses `prompt` to create a new task with auto XP, priority, and avatar.
-        - set_complete: Mark `task_name` as completed.
+        - add_bulk: Parses `prompt` containing several tasks (a list or brain dump) and creates all of them at once.
+          Prefer this over calling 'add' repeatedly.
+        - set_complete: Mark `task_name` as completed. Names are matched case-insensitively and approximately.
+        - set_complete_many: Mark every task in `task_names` as completed in one call.
         - get_pending: Return all pending tasks.
         - get_completed: Return all completed tasks.
 
         Args:
-        prompt: Task description (used only for 'add').
-        action: One of {'add', 'set_complete', 'get_pending', 'get_completed'}.
+        prompt: Task description (used only for 'add' and 'add_bulk').
+        action: One of {'add', 'add_bulk', 'set_complete', 'set_complete_many', 'get_pending', 'get_completed'}.
         task_name: Task to update (used only for 'set_complete'), don't add task after the task name.
+        task_names: Tasks to update (used only for 'set_complete_many').
 
         Returns:
         A confirmation or list of tasks, else an error message.
@@ -24,6 +30,7 @@ def task_tool(prompt: str= "", action:str = "add", task_name:str = "") -> str:
     if action.lower() == "add":
         try:
             result = handle_tasks(prompt)
+            response_cache.invalidate("task_tool add")
             # If result is a dict from make_response, extract the message
             if isinstance(result, dict):
                 return result.get("message", str(result))
@@ -31,10 +38,30 @@ def task_tool(prompt: str= "", action:str = "add", task_name:str = "") -> str:
         except Exception as e:
             return f"❌ Task creation failed: {str(e)}"
         
+    if action.lower() == "add_bulk":
+        try:
+            result = handle_tasks_bulk(prompt)
+            response_cache.invalidate("task_tool add_bulk")
+            if isinstance(result, dict):
+                return result.get("message", str(result))
+            return str(result)
+        except Exception as e:
+            return f"❌ Task creation failed: {str(e)}"
+        
     if action.lower() == "set_complete":
         print(f"\nSetting task:{task_name} as complete...")
         try:
             res = update_task(task_name)
+            response_cache.invalidate("task_tool set_complete")
+            return res
+        except Exception as e:
+            return f"❌ Task updation failed: {str(e)}"
+    
+    if action.lower() == "set_complete_many":
+        print(f"\nSetting tasks:{task_names} as complete...")
+        try:
+            res = update_tasks(task_names or [])
+            response_cache.invalidate("task_tool set_complete_many")
             return res
         except Exception as e:
             return f"❌ Task updation failed: {str(e)}"
@@ -44,7 +71,7 @@ def task_tool(prompt: str= "", action:str = "add", task_name:str = "") -> str:
             pending_tasks = get_pending_tasks()
             if pending_tasks == []:
                 return "No pending tasks"
-            return f",".join([task["name"] for task in pending_tasks])
+            return f",".join([task.name for task in pending_tasks])
         except Exception as e:
             return f"Could not get pending tasks {str(e)}"
     
@@ -53,7 +80,7 @@ def task_tool(prompt: str= "", action:str = "add", task_name:str = "") -> str:
             completed_tasks = get_completed_tasks()
             if completed_tasks == []:
                 return "No pending tasks"
-            return f",".join([task["name"] for task in completed_tasks])
+            return f",".join([task.name for task in completed_tasks])
         except Exception as e:
             return f"Could not get completed tasks {str(e)}"
                 
\ No newline at end of file
@@ -1,34 +1,92 @@
 import os
-from dotenv import load_dotenv
-import google.generativeai as genai
 import json
+from backend.utils.metrics import timed
+from backend.utils import clients
+from backend.memory.xp_ledger import xp_ledger
 
-load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY")) #type: ignore
-model = genai.GenerativeModel("gemini-2.0-flash") #type: ignore
+# "local": deterministic rules below (default). "llm": ask Gemini, fall back to the rules on failure
+XP_MODE = os.getenv("POS_XP_MODE", "local").lower()
 
-XP_FILE = "backend/data/xp_memory.json"
+# XP range per priority
+PRIORITY_BANDS = {"Low": (5, 10), "Medium": (10, 20), "High": (20, 30)}
 
 def load_xp_memory():
-  if not os.path.exists(XP_FILE):
-    return {"Producer": 0, "Administrator": 0, "Entrepreneur": 0, "Integrator": 0}
-  with open(XP_FILE, "r") as f:
-    return json.load(f)
+  """
+  Current XP per avatar (cached ledger totals)
+  """
+  return xp_ledger().totals()
+
+def _balances():
+  try:
+    return load_xp_memory()
+  except Exception as e:
+    print(f"[WARN] Could not read XP balances: {e}")
+    return {}
+
+def estimate_xp(avatar, priority, xp_data):
+  """
+  Local XP rule: start mid-band for the priority, then boost toward the top of
+  the band the further the avatar's XP is below the average of all avatars.
+  Deterministic for the same inputs.
+  """
+  low, high = PRIORITY_BANDS.get(priority, PRIORITY_BANDS["Medium"])
+  base = (low + high) // 2
+  balances = list(xp_data.values()) or [0]
+  average = sum(balances) / len(balances)
+  deficit = max(0.0, 1 - xp_data.get(avatar, 0) / average) if average > 0 else 0.0
+  boost = round((high - base) * deficit)
+
+  band = f"{priority if priority in PRIORITY_BANDS else 'Medium'} priority ({low}–{high} XP)"
+  reason = f"{band}, +{boost} balance boost for underrepresented {avatar}" if boost else band
+  return {"xp_assigned": base + boost, "reason": reason}
+
+def _band_xp(value, priority):
+  """
+  An LLM-suggested XP value as an int inside the priority's band; None if it is not a number.
+  """
+  if isinstance(value, bool):
+    return None
+  try:
+    xp = int(round(float(value)))
+  except (TypeError, ValueError, OverflowError):
+    return None
+  low, high = PRIORITY_BANDS.get(priority, PRIORITY_BANDS["Medium"])
+  return min(max(xp, low), high)
+
+def _use_llm(use_llm):
+  return XP_MODE == "llm" if use_llm is None else use_llm
+
+def record_xp(entries):
+  """
+  Add (avatar, xp, task, reason) entries to the ledger; failures are logged, not raised.
+  """
+  try:
+    xp_ledger().record(entries)
+  except Exception as e:
+    print(f"[WARN] Could not record XP: {e}")
+
+def handle_xp_estimation(task_data, use_llm=None, record=True):
+  """
+  Calculates XP for a task and (unless record=False) records it in the ledger.
+  Uses the local rule unless the LLM is enabled (POS_XP_MODE=llm or use_llm=True).
+  """
+  xp_data = _balances()
+  avatar = task_data.get("avatar","Producer")
+  task_name = task_data.get("task","")
+  priority = task_data.get("priority","Medium")
   
-def save_xp_memory(xp_data):
-  with open(XP_FILE, "w") as f:
-    json.dump(xp_data, f , indent=2)
-    
-def handle_xp_estimation(task_data):
+  data = _llm_xp_estimation(task_name, avatar, priority, xp_data) if _use_llm(use_llm) else None
+  if data is None:
+    data = estimate_xp(avatar, priority, xp_data)
+  if record:
+    record_xp([(avatar, data["xp_assigned"], task_name, data["reason"])])
+  return data
+
+def _llm_xp_estimation(task_name, avatar, priority, xp_data):
   """
-  Calculates XP for a task using Gemini's judgement
+  Gemini's judgement of a task's XP; None if the call or its output fails
   """
   try:
-    xp_data = load_xp_memory()
-    avatar = task_data.get("avatar","Producer")
-    task_name = task_data.get("task","")
-    priority = task_data.get("priority","Medium")
-    
     context = f"""
     You are a motivational productivity assistant.
     The user has completed this task:
@@ -49,16 +107,82 @@ def handle_xp_estimation(task_data):
         Return JSON like: {{ "xp_assigned": 15, "reason": "High priority and underrepresented avatar." }}
     """
     
-    result = model.generate_content(context)
+    with timed("llm", "xp_agent.handle_xp_estimation"):
+      result = clients.gemini_model().generate_content(context)
     text = result.text.strip()
     start, end = text.find("{"), text.rfind("}") + 1
     clean_json = text[start:end]
     data = json.loads(clean_json)
-    data.setdefault("xp_assigned",10)
-    data.setdefault("reason","Balanced reward")
-    xp_data[avatar] = xp_data[avatar] + data["xp_assigned"]
-    save_xp_memory(xp_data)
-    return data
+    xp = _band_xp(data.get("xp_assigned"), priority)
+    if xp is None:
+      print(f"[WARN] LLM returned invalid XP {data.get('xp_assigned')!r}, using local rule")
+      return None
+    return {"xp_assigned": xp, "reason": str(data.get("reason") or "Balanced reward")}
+  
+  except Exception as e:
+    print(f"[WARN] LLM XP estimation failed, using local rule: {e}")
+    return None
+
+def estimate_xp_bulk(tasks, use_llm=None):
+  """
+  XP for a whole batch of tasks without recording it: (xp values, reasons), in order.
+  """
+  xp_data = _balances()
+  xp_values = _llm_xp_estimation_bulk(tasks, xp_data) if _use_llm(use_llm) else None
+  reasons = ["LLM bulk estimate"] * len(tasks)
+  if xp_values is None:
+    # Apply the rule task by task so the balance boost sees earlier tasks of the batch
+    running = dict(xp_data)
+    xp_values, reasons = [], []
+    for task in tasks:
+      avatar = task.get("avatar","Producer")
+      data = estimate_xp(avatar, task.get("priority","Medium"), running)
+      running[avatar] = running.get(avatar, 0) + data["xp_assigned"]
+      xp_values.append(data["xp_assigned"])
+      reasons.append(data["reason"])
+  return xp_values, reasons
+
+def _llm_xp_estimation_bulk(tasks, xp_data):
+  """
+  One Gemini call for the whole batch; None if it fails
+  """
+  try:
+    listing = "\n".join(
+      f'{i}. Task: "{t.get("task","")}" | Avatar: {t.get("avatar","Producer")} | Priority: {t.get("priority","Medium")}'
+      for i, t in enumerate(tasks)
+    )
+    
+    context = f"""
+    You are a motivational productivity assistant.
+    The user has created these tasks:
+    {listing}
+    
+    Current XP balance:
+    {json.dumps(xp_data, indent=2)}
+    
+    Estimate how much XP each task *should be worth* when completed
+      Use these guidelines:
+        - Low priority: 5–10 XP
+        - Medium: 10–20 XP
+        - High: 20–30 XP
+        - If the avatar has much less XP than others, boost its XP slightly to motivate balance.
+
+        Return JSON with one value per task, in the same order: {{ "xp_assigned": [15, 10, 25] }}
+    """
+    
+    with timed("llm", "xp_agent.estimate_xp_bulk"):
+      result = clients.gemini_model().generate_content(context)
+    text = result.text.strip()
+    start, end = text.find("{"), text.rfind("}") + 1
+    values = json.loads(text[start:end]).get("xp_assigned", [])
+    if not isinstance(values, list):
+      values = []
+    xp_values = [_band_xp(v, t.get("priority","Medium")) for v, t in zip(values, tasks)]
+    if len(xp_values) < len(tasks) or None in xp_values:
+      print("[WARN] LLM returned missing or invalid XP values, using local rule")
+      return None
+    return xp_values
   
   except Exception as e:
-    return {"xp_assigned": 10, "reason": "Default XP assigned."}
\ No newline at end of file
+    print(f"[WARN] LLM bulk XP estimation failed, using local rule: {e}")
+    return None
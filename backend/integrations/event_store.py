@@ -0,0 +1,102 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+EVENT_DB = os.getenv("POS_EVENT_DB", os.path.join(DATA_DIR, "events.sqlite"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+  calendar_id TEXT NOT NULL,
+  id TEXT NOT NULL,
+  start_ts INTEGER NOT NULL,
+  end_ts INTEGER NOT NULL,
+  body TEXT NOT NULL,
+  PRIMARY KEY (calendar_id, id)
+);
+CREATE INDEX IF NOT EXISTS idx_events_start ON events(calendar_id, start_ts);
+CREATE INDEX IF NOT EXISTS idx_events_end ON events(calendar_id, end_ts);
+CREATE TABLE IF NOT EXISTS meta (
+  key TEXT PRIMARY KEY,
+  value TEXT
+);
+"""
+
+
+class EventStore:
+  """
+  Local SQLite mirror of Google Calendar events, indexed by start/end.
+  Knows nothing about the Calendar API; `calender_agent` feeds it events with
+  their (start, end) as epoch seconds.
+  """
+
+  def __init__(self, path: str = EVENT_DB):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    self._conn = sqlite3.connect(path, check_same_thread=False)
+    self._conn.execute("PRAGMA journal_mode=WAL")
+    self._conn.executescript(SCHEMA)
+    self._lock = threading.Lock()
+
+  def apply(self, calendar_id, entries):
+    """
+    Upsert events and drop cancelled ones. `entries` is an iterable of
+    (event, start_ts, end_ts); cancelled events may have no times.
+    """
+    upserts, deletes = [], []
+    for event, start_ts, end_ts in entries:
+      if event.get("status") == "cancelled" or start_ts is None:
+        deletes.append((calendar_id, event["id"]))
+      else:
+        upserts.append((calendar_id, event["id"], start_ts, end_ts, json.dumps(event)))
+    with self._lock, self._conn:
+      self._conn.executemany("DELETE FROM events WHERE calendar_id = ? AND id = ?", deletes)
+      self._conn.executemany("INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?)", upserts)
+    return len(upserts) + len(deletes)
+
+  def replace_all(self, calendar_id, entries):
+    """
+    Swap a calendar's events for a fresh full download.
+    """
+    rows = [
+      (calendar_id, event["id"], start_ts, end_ts, json.dumps(event))
+      for event, start_ts, end_ts in entries
+      if event.get("status") != "cancelled" and start_ts is not None
+    ]
+    with self._lock, self._conn:
+      self._conn.execute("DELETE FROM events WHERE calendar_id = ?", (calendar_id,))
+      self._conn.executemany("INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?)", rows)
+    return len(rows)
+
+  def query(self, calendar_id, start_ts, end_ts):
+    """
+    Events overlapping [start_ts, end_ts), ordered by start.
+    """
+    with self._lock:
+      rows = self._conn.execute(
+        "SELECT body FROM events WHERE calendar_id = ? AND start_ts < ? AND end_ts > ? ORDER BY start_ts, id",
+        (calendar_id, end_ts, start_ts),
+      ).fetchall()
+    return [json.loads(row[0]) for row in rows]
+
+  def get_meta(self, key: str, default=None):
+    with self._lock:
+      row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+  def set_meta(self, key: str, value):
+    with self._lock, self._conn:
+      self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+  def count(self) -> int:
+    with self._lock:
+      return self._conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+  def stats(self) -> dict:
+    last_sync = float(self.get_meta("last_sync", 0) or 0)
+    return {
+      "events": self.count(),
+      "last_sync_age_seconds": (time.time() - last_sync) if last_sync else None,
+      "last_full_sync": self.get_meta("last_full_sync"),
+    }
@@ -0,0 +1,184 @@
+import os
+import sqlite3
+import threading
+import time
+from email.utils import getaddresses
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+MAIL_DB = os.getenv("POS_MAIL_DB", os.path.join(DATA_DIR, "mail.sqlite"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+  id TEXT PRIMARY KEY,
+  thread_id TEXT,
+  ts INTEGER NOT NULL,
+  sender TEXT,
+  recipients TEXT,
+  subject TEXT,
+  snippet TEXT,
+  labels TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_messages_ts ON messages(ts);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+  subject, sender, recipients, snippet,
+  tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS addresses (
+  message_id TEXT NOT NULL,
+  role TEXT NOT NULL,
+  name TEXT,
+  email TEXT NOT NULL,
+  ts INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_addresses_message ON addresses(message_id);
+CREATE INDEX IF NOT EXISTS idx_addresses_email ON addresses(email);
+CREATE TABLE IF NOT EXISTS meta (
+  key TEXT PRIMARY KEY,
+  value TEXT
+);
+"""
+
+COLUMNS = ("id", "thread_id", "ts", "sender", "recipients", "subject", "snippet", "labels")
+
+
+class MailIndex:
+  """
+  Local SQLite index of mail metadata (headers, snippet, labels) with FTS5
+  search and an address table for contact lookups.
+  Knows nothing about the Gmail API; `email_agent` feeds it flat records:
+  {"id", "thread_id", "ts", "sender", "recipients", "subject", "snippet", "labels"}.
+  """
+
+  def __init__(self, path: str = MAIL_DB):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    self._conn = sqlite3.connect(path, check_same_thread=False)
+    self._conn.execute("PRAGMA journal_mode=WAL")
+    self._conn.executescript(SCHEMA)
+    self._lock = threading.Lock()
+
+  def _delete(self, ids):
+    rows = [(i,) for i in ids]
+    self._conn.executemany(
+      "DELETE FROM messages_fts WHERE rowid = (SELECT rowid FROM messages WHERE id = ?)", rows
+    )
+    self._conn.executemany("DELETE FROM messages WHERE id = ?", rows)
+    self._conn.executemany("DELETE FROM addresses WHERE message_id = ?", rows)
+
+  def _insert(self, records):
+    for r in records:
+      labels = " " + " ".join(r.get("labels") or []) + " "
+      cur = self._conn.execute(
+        "INSERT INTO messages (id, thread_id, ts, sender, recipients, subject, snippet, labels) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (r["id"], r.get("thread_id"), int(r.get("ts") or 0), r.get("sender", ""),
+         r.get("recipients", ""), r.get("subject", ""), r.get("snippet", ""), labels),
+      )
+      # The FTS row shares the message's rowid so searches join without a lookup
+      self._conn.execute(
+        "INSERT INTO messages_fts (rowid, subject, sender, recipients, snippet) VALUES (?, ?, ?, ?, ?)",
+        (cur.lastrowid, r.get("subject", ""), r.get("sender", ""), r.get("recipients", ""), r.get("snippet", "")),
+      )
+      self._conn.executemany(
+        "INSERT INTO addresses (message_id, role, name, email, ts) VALUES (?, ?, ?, ?, ?)",
+        [(r["id"], role, name, email.lower(), int(r.get("ts") or 0))
+         for role, field in (("from", "sender"), ("to", "recipients"))
+         for name, email in getaddresses([r.get(field) or ""]) if "@" in email],
+      )
+
+  def apply(self, records, deleted_ids=()):
+    """
+    Upsert `records` and drop `deleted_ids`.
+    """
+    records = list(records)
+    with self._lock, self._conn:
+      self._delete([r["id"] for r in records] + list(deleted_ids))
+      self._insert(records)
+    return len(records)
+
+  def replace_all(self, records):
+    """
+    Swap the whole index for a fresh download.
+    """
+    records = list(records)
+    with self._lock, self._conn:
+      for table in ("messages", "messages_fts", "addresses"):
+        self._conn.execute(f"DELETE FROM {table}")
+      self._insert(records)
+    return len(records)
+
+  def search(self, text=None, subject=None, senders=(), recipients=(), labels=(), exclude_labels=(),
+             after_ts=None, before_ts=None, limit=10):
+    """
+    Newest messages matching every given condition.
+    `text`/`subject` are FTS5 queries; `senders`/`recipients` match names or
+    addresses by substring; `labels` are Gmail label ids.
+    """
+    where, params = [], []
+    fts = []
+    if text:
+      fts.append(f"({text})")
+    if subject:
+      fts.append(f"subject : ({subject})")
+    if fts:
+      where.append("m.rowid IN (SELECT rowid FROM messages_fts WHERE messages_fts MATCH ?)")
+      params.append(" AND ".join(fts))
+    for role, values in (("from", senders), ("to", recipients)):
+      for value in values:
+        where.append(
+          "m.id IN (SELECT message_id FROM addresses WHERE role = ? AND (email LIKE ? OR name LIKE ?))"
+        )
+        params += [role, f"%{value.lower()}%", f"%{value}%"]
+    for label in labels:
+      where.append("m.labels LIKE ?")
+      params.append(f"% {label} %")
+    for label in exclude_labels:
+      where.append("m.labels NOT LIKE ?")
+      params.append(f"% {label} %")
+    if after_ts is not None:
+      where.append("m.ts >= ?")
+      params.append(int(after_ts))
+    if before_ts is not None:
+      where.append("m.ts < ?")
+      params.append(int(before_ts))
+
+    sql = f"SELECT {', '.join('m.' + c for c in COLUMNS)} FROM messages m"
+    if where:
+      sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY m.ts DESC LIMIT ?"
+    with self._lock:
+      rows = self._conn.execute(sql, params + [int(limit)]).fetchall()
+    return [{**dict(zip(COLUMNS, row)), "labels": row[-1].split()} for row in rows]
+
+  def addresses(self, fragment: str, limit: int = 5):
+    """
+    People whose name or address contains `fragment`, most frequent first:
+    [{"name", "email", "messages", "last_ts"}].
+    """
+    with self._lock:
+      rows = self._conn.execute(
+        "SELECT email, MAX(name), COUNT(*) AS n, MAX(ts) AS last FROM addresses "
+        "WHERE email LIKE ? OR name LIKE ? GROUP BY email ORDER BY n DESC, last DESC LIMIT ?",
+        (f"%{fragment.lower()}%", f"%{fragment}%", int(limit)),
+      ).fetchall()
+    return [{"email": e, "name": n or "", "messages": c, "last_ts": t} for e, n, c, t in rows]
+
+  def get_meta(self, key: str, default=None):
+    with self._lock:
+      row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+  def set_meta(self, key: str, value):
+    with self._lock, self._conn:
+      self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+  def count(self) -> int:
+    with self._lock:
+      return self._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+  def stats(self) -> dict:
+    last_sync = float(self.get_meta("last_sync", 0) or 0)
+    return {
+      "messages": self.count(),
+      "last_sync_age_seconds": (time.time() - last_sync) if last_sync else None,
+      "coverage_days": (time.time() - float(self.get_meta("covers_from", time.time()))) / 86400,
+    }
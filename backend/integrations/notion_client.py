@@ -1,18 +1,89 @@
-from notion_client import Client
 import os
+import threading
+import time
+import datetime
+import difflib
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from backend.utils.metrics import timed
+from backend.utils import clients
+from backend.integrations.task_store import TaskStore
+from backend.integrations.task_model import Task, TaskColumns
+from backend.integrations.task_aggregates import TaskAggregates
+from backend.integrations.report_history import report_history
+from backend.utils.rate_limiter import TokenBucket, RetryingLimiter
 
 load_dotenv()
-notion = Client(auth=os.getenv("NOTION_TOKEN"))
 NOTION_DB_ID = os.getenv("NOTION_TASK_DB")
 NOTION_DATA_SOURCE_ID = os.getenv("NOTION_DATA_SOURCE_ID")
 
+
+def _classify_error(e, idempotent=True):
+  """
+  (retryable, retry_after) for a Notion client error: 429s, 5xx, timeouts and
+  connection errors are retried; a Retry-After header is honoured.
+  For non-idempotent calls (creates) only errors where Notion certainly did not
+  act are retried: 429s and failures to connect. A 5xx or timeout may have
+  created the page already.
+  """
+  status = getattr(e, "status", None)
+  headers = getattr(e, "headers", None) or {}
+  retry_after = None
+  try:
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    retry_after = float(value) if value is not None else None
+  except (TypeError, ValueError):
+    retry_after = None
+
+  if status is not None:
+    return (status == 429 or (idempotent and status >= 500)), retry_after
+  name = type(e).__name__
+  if not idempotent:
+    return name in ("ConnectError", "ConnectTimeout"), None
+  return name in ("RequestTimeoutError", "ConnectError", "ReadTimeout", "ConnectTimeout", "RemoteProtocolError"), None
+
+
+def _classify_create_error(e):
+  return _classify_error(e, idempotent=False)
+
+
+# Shared by every Notion request in the process (Notion allows ~3 requests/second)
+notion_limiter = RetryingLimiter(
+  TokenBucket(
+    rate=float(os.getenv("POS_NOTION_RATE", "3")),
+    capacity=float(os.getenv("POS_NOTION_BURST", "3")),
+  ),
+  classify=_classify_error,
+  max_retries=int(os.getenv("POS_NOTION_MAX_RETRIES", "5")),
+)
+
+
+def notion_call(name, fn, idempotent=True, **kwargs):
+  """
+  Run one Notion API call through the shared rate limiter and retry policy.
+  Pass idempotent=False for creates, which must not be retried after Notion may have acted.
+  """
+  with timed("notion", name):
+    if idempotent:
+      return notion_limiter.call(fn, **kwargs)
+    return notion_limiter.call_with(_classify_create_error, fn, **kwargs)
+
+
+# Local task mirror: reads are served from SQLite, refreshed incrementally
+MIRROR_ENABLED = os.getenv("POS_TASK_MIRROR", "1") == "1"
+SYNC_INTERVAL = float(os.getenv("POS_TASK_SYNC_INTERVAL", "30"))
+FULL_SYNC_INTERVAL = float(os.getenv("POS_TASK_FULL_SYNC_INTERVAL", "900"))
+
+@timed("notion", "add_task_to_notion")
 def add_task_to_notion(task_data):
   """
   Creates a new Notion Page (task) inside the POS Tasks database.
   task_data should contain: task, avatar, priority, suggested_time, status, xp
   """
-  notion.pages.create(
+  page = notion_call(
+    "pages.create",
+    clients.notion().pages.create,
+    idempotent=False,
     parent={"database_id":NOTION_DB_ID},
     properties={
       "Name":{"title":[{"text":{"content":task_data["task"]}}]},
@@ -23,95 +94,344 @@ def add_task_to_notion(task_data):
       "XP":{"number":task_data.get("xp",0)}
     },
   )
+  _mirror_page(page)
   return task_data
 
-def get_all_tasks():
+# Notion caps page_size at 100
+PAGE_SIZE = 100
+DEFAULT_SORTS = [{"timestamp": "created_time", "direction": "ascending"}]
+
+
+def _status_filter(status):
+  return {"property": "Status", "select": {"equals": status}}
+
+
+def query_pages(filter=None, sorts=None, page_size=PAGE_SIZE):
   """
-  Fetch all current tasks from Notion
+  Run a data source query and follow `next_cursor` until Notion reports no more results.
+  Yields the raw `results` list of every response page.
   """
-  
-  res = notion.data_sources.query(data_source_id=NOTION_DATA_SOURCE_ID) #type:ignore
+  kwargs = {"data_source_id": NOTION_DATA_SOURCE_ID, "page_size": page_size}
+  if filter:
+    kwargs["filter"] = filter
+  if sorts:
+    kwargs["sorts"] = sorts
+
+  while True:
+    res = notion_call("data_sources.query", clients.notion().data_sources.query, **kwargs) #type:ignore
+    yield res["results"] #type:ignore
+    if not res.get("has_more") or not res.get("next_cursor"): #type:ignore
+      break
+    kwargs["start_cursor"] = res["next_cursor"] #type:ignore
+
+
+def iter_task_pages(status=None, sorts=None, page_size=PAGE_SIZE):
+  """
+  Stream decoded tasks one Notion page at a time.
+  Status filtering and sorting happen server side.
+  """
+  filter = _status_filter(status) if status else None
+  for results in query_pages(filter=filter, sorts=sorts or DEFAULT_SORTS, page_size=page_size):
+    yield [Task.from_page(page) for page in results]
+
+
+def _collect(status=None):
   tasks = []
-  for page in res["results"]: #type:ignore
-    props = page["properties"]
-    tasks.append({
-      "id": page["id"],
-      "name": props["Name"]["title"][0]["plain_text"] if props["Name"]["title"] else "",
-      "avatar": props["Avatar"]["select"]["name"] if props["Avatar"]["select"] else "",
-      "priority": props["Priority"]["select"]["name"] if props["Priority"]["select"] else "",
-      "status": props["Status"]["select"]["name"] if props["Status"]["select"] else "",
-      "suggested_time": props["Suggested Time"]["rich_text"][0]["plain_text"] if props["Suggested Time"]["rich_text"] else "",
-      "xp": props["XP"]["number"] if props["XP"]["number"] else 0
-    })
-  
+  for batch in iter_task_pages(status=status):
+    tasks.extend(batch)
   return tasks
 
+
+def task_store():
+  return clients.get_or_create("task_store", TaskStore)
+
+
+def _entry(page):
+  return (Task.from_page(page), page.get("created_time", ""), page.get("last_edited_time", ""))
+
+
+def _mirror_page(page):
+  """
+  Write-through: reflect a page returned by pages.create/update in the mirror.
+  """
+  if not MIRROR_ENABLED or not isinstance(page, dict) or "properties" not in page:
+    return
+  try:
+    task_store().upsert([_entry(page)])
+  except Exception as e:
+    print(f"[WARN] Could not update local task mirror: {e}")
+
+
+_sync_lock = threading.Lock()
+
+
+def sync_tasks(full=False):
+  """
+  Bring the local mirror up to date with Notion.
+  Incremental syncs only download pages edited since the last seen `last_edited_time`
+  (Notion rounds it to the minute, so the window overlaps by one minute).
+  Full syncs rebuild the mirror, which also drops pages deleted in Notion.
+  """
+  with _sync_lock:
+    store = task_store()
+    cursor = store.get_meta("cursor")
+    started = time.time()
+
+    # The cursor only advances over pages this sync downloaded; write-through
+    # rows from local creates/updates must not skip unsynced remote edits
+    latest = ""
+    if full or not cursor:
+      entries = [_entry(page) for results in query_pages(sorts=DEFAULT_SORTS) for page in results]
+      latest = max((edited for _, _, edited in entries), default="")
+      before = store.aggregates.snapshot()
+      count = store.replace_all(entries)
+      store.set_meta("last_full_sync", started)
+      if cursor and store.aggregates.snapshot() != before:
+        print("🔄 Report aggregates reconciled against Notion")
+    else:
+      since = datetime.datetime.fromisoformat(cursor.replace("Z", "+00:00")) - datetime.timedelta(minutes=1)
+      filter = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": since.isoformat()}}
+      count = 0
+      for results in query_pages(filter=filter):
+        entries = [_entry(page) for page in results]
+        latest = max([latest] + [edited for _, _, edited in entries])
+        count += store.upsert(entries)
+
+    if latest and (full or not cursor or latest > cursor):
+      store.set_meta("cursor", latest)
+    store.set_meta("last_sync", started)
+    _record_history(store.aggregates.snapshot())
+    print(f"🔄 Synced {count} tasks from Notion ({'full' if full or not cursor else 'incremental'})")
+    return count
+
+
+def _sync_in_background(full=False):
+  if _sync_lock.locked():
+    return
+
+  def run():
+    try:
+      sync_tasks(full=full)
+    except Exception as e:
+      print(f"[WARN] Background task sync failed: {e}")
+
+  threading.Thread(target=run, name="notion-task-sync", daemon=True).start()
+
+
+def _fresh_store():
+  """
+  The mirror, synced if needed. Only the very first read waits for Notion;
+  afterwards stale data is returned while a background sync catches up.
+  """
+  store = task_store()
+  last_sync = float(store.get_meta("last_sync", 0) or 0)
+  if not last_sync:
+    sync_tasks(full=True)
+  else:
+    last_full = float(store.get_meta("last_full_sync", 0) or 0)
+    now = time.time()
+    if now - last_full > FULL_SYNC_INTERVAL:
+      _sync_in_background(full=True)
+    elif now - last_sync > SYNC_INTERVAL:
+      _sync_in_background()
+  return store
+
+
+def _mirrored_tasks(status=None):
+  """
+  Serve tasks from the mirror (or straight from Notion when it is disabled).
+  """
+  if not MIRROR_ENABLED:
+    return _collect(status)
+  return _fresh_store().query(status=status)
+
+
+@timed("tasks", "get_task_columns")
+def get_task_columns(status=None):
+  """
+  Status/avatar/priority/XP columns of the tasks, for reports and aggregates
+  """
+  if not MIRROR_ENABLED:
+    return TaskColumns.from_tasks(_collect(status))
+  return _fresh_store().columns(status=status)
+
+
+@timed("tasks", "get_task_summary")
+def get_task_summary():
+  """
+  Report totals (counts, completion rate, XP by avatar, priority mix).
+  Read from the mirror's running aggregates, so no task rows are scanned.
+  """
+  if MIRROR_ENABLED:
+    # History is recorded by sync_tasks, so reading a report never writes
+    return _fresh_store().aggregates.snapshot()
+  summary = TaskAggregates.from_columns(get_task_columns()).snapshot()
+  # Without the mirror there are no syncs: keep the first snapshot of each day
+  _record_history(summary, once=True)
+  return summary
+
+
+def _record_history(summary, once=False):
+  """
+  Keep today's row of the report history at the latest totals
+  (or only fill it in if it is missing, with `once`).
+  """
+  try:
+    if once:
+      report_history().record_once(summary)
+    else:
+      report_history().record(summary)
+  except Exception as e:
+    print(f"[WARN] Could not record report history: {e}")
+
+
+@timed("tasks", "get_all_tasks")
+def get_all_tasks():
+  """
+  Fetch all current tasks (local mirror of Notion)
+  """
+  return _mirrored_tasks()
+
+@timed("tasks", "get_completed_tasks")
 def get_completed_tasks():
   """
-  Fetch completed tasks from Notion
+  Fetch completed tasks (local mirror of Notion)
   """
-  
-  res = notion.data_sources.query(data_source_id=NOTION_DATA_SOURCE_ID) #type:ignore
-  tasks = []
-  for page in res["results"]: #type:ignore
-    props = page["properties"]
-    if(props["Status"]["select"]["name"] == "Completed"):
-      tasks.append({
-        "id": page["id"],
-        "name": props["Name"]["title"][0]["plain_text"] if props["Name"]["title"] else "",
-        "avatar": props["Avatar"]["select"]["name"] if props["Avatar"]["select"] else "",
-        "priority": props["Priority"]["select"]["name"] if props["Priority"]["select"] else "",
-        "status": props["Status"]["select"]["name"] if props["Status"]["select"] else "",
-        "xp": props["XP"]["number"] if props["XP"]["number"] else 0
-      })
-  
-  return tasks
+  return _mirrored_tasks("Completed")
 
+@timed("tasks", "get_pending_tasks")
 def get_pending_tasks():
   """
-  Fetch completed tasks from Notion
+  Fetch pending tasks (local mirror of Notion)
   """
-  
-  res = notion.data_sources.query(data_source_id=NOTION_DATA_SOURCE_ID) #type:ignore
-  tasks = []
-  for page in res["results"]: #type:ignore
-    props = page["properties"]
-    if(props["Status"]["select"]["name"] == "Pending"):
-      tasks.append({
-        "id": page["id"],
-        "name": props["Name"]["title"][0]["plain_text"] if props["Name"]["title"] else "",
-        "avatar": props["Avatar"]["select"]["name"] if props["Avatar"]["select"] else "",
-        "priority": props["Priority"]["select"]["name"] if props["Priority"]["select"] else "",
-        "status": props["Status"]["select"]["name"] if props["Status"]["select"] else "",
-        "xp": props["XP"]["number"] if props["XP"]["number"] else 0
-      })
-  
-  return tasks
+  return _mirrored_tasks("Pending")
+
+# Similarity needed for a fuzzy name match (difflib ratio)
+FUZZY_CUTOFF = float(os.getenv("POS_TASK_FUZZY_CUTOFF", "0.75"))
+# Concurrent page updates in batch completion (Notion allows ~3 requests/second)
+BATCH_CONCURRENCY = int(os.getenv("POS_NOTION_CONCURRENCY", "3"))
 
+
+def _lookup_notion(task_name):
+  """
+  Exact-title lookup straight against Notion (used when the mirror has no match).
+  """
+  response = notion_call(
+    "data_sources.query",
+    clients.notion().data_sources.query,
+    data_source_id=NOTION_DATA_SOURCE_ID,
+    filter={"property": "Name", "title": {"equals": task_name}}
+  )
+  results = response["results"]
+  return Task.from_page(results[0]) if results else None
+
+
+def resolve_task(task_name, candidates=None):
+  """
+  Map a user supplied name to a task using the mirror's name index:
+  case-insensitive exact match first (pending tasks preferred), then the closest
+  fuzzy match among pending tasks, then an exact-title query against Notion.
+  """
+  name = (task_name or "").strip()
+  if not name:
+    return None
+
+  if MIRROR_ENABLED:
+    if candidates is None:
+      candidates = _mirrored_tasks("Pending")
+    exact = task_store().find_by_name(name)
+    if exact:
+      pending = [t for t in exact if t.status != "Completed"]
+      return (pending or exact)[0]
+
+    by_name = {t.name.lower(): t for t in candidates}
+    close = difflib.get_close_matches(name.lower(), list(by_name), n=1, cutoff=FUZZY_CUTOFF)
+    if close:
+      return by_name[close[0]]
+
+  return _lookup_notion(name)
+
+
+def _complete_page(page_id):
+  page = notion_call(
+    "pages.update",
+    clients.notion().pages.update,
+    page_id=page_id,
+    properties={
+      "Status": {"select": {"name": "Completed"}}
+    }
+  )
+  _mirror_page(page)
+  return page
+
+
+@timed("notion", "update_task")
 def update_task(task_name):
   print(f"\nUpdating {task_name}")
   try:
-    response = response = notion.data_sources.query(
-            data_source_id=NOTION_DATA_SOURCE_ID,
-            filter={
-                "property": "Name",
-                "title": {  # Changed from "title": {"equals": task_name}
-                    "equals": task_name  # This is the correct structure
-                }
-            }
-        )
-    results = response["results"]
-    if results:
-      page_id = results[0]["id"]
-      if not page_id:
-          return None
-
-      notion.pages.update(
-          page_id=page_id,
-          properties={
-              "Status": {"select": {"name": "Completed"}}
-          }
-      )
-    return "Task Not Found"
+    task = resolve_task(task_name)
+    if not task or not task.id:
+      return f"Task Not Found: {task_name}"
+    if task.status == "Completed":
+      return f"Task '{task.name}' is already completed"
+
+    _complete_page(task.id)
+    return f"✅ Marked '{task.name}' as completed"
   except Exception as e:
-    return "Could not update task"
\ No newline at end of file
+    return f"Could not update task: {e}"
+
+
+@timed("notion", "update_tasks")
+def update_tasks(task_names):
+  """
+  Mark several tasks completed in one call.
+  Names are resolved against the local index, then the page updates run concurrently.
+  Returns one result line per requested name, in input order.
+  """
+  names = [n.strip() for n in task_names or [] if n and n.strip()]
+  if not names:
+    return "No task names given"
+
+  try:
+    candidates = _mirrored_tasks("Pending") if MIRROR_ENABLED else None
+  except Exception:
+    candidates = None
+
+  lines, to_update, duplicates = [], {}, []
+  seen_names, resolved_ids = set(), set()
+  for name in names:
+    if name.lower() in seen_names:
+      duplicates.append(name)
+      continue
+    seen_names.add(name.lower())
+    try:
+      task = resolve_task(name, candidates)
+    except Exception as e:
+      lines.append(f"❌ {name}: lookup failed ({e})")
+      continue
+    if not task:
+      lines.append(f"❌ {name}: Task Not Found")
+    elif task.id in resolved_ids:
+      # A different spelling of a task already in this batch
+      duplicates.append(f"{name} (same task as {task.name})")
+    elif task.status == "Completed":
+      resolved_ids.add(task.id)
+      lines.append(f"☑️ {task.name}: already completed")
+    else:
+      resolved_ids.add(task.id)
+      # Keep this name's place; the line is filled in once its update finishes
+      to_update[task.id] = (task, len(lines))
+      lines.append(None)
+
+  with ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY) as pool:
+    futures = [(pool.submit(_complete_page, page_id), task, slot) for page_id, (task, slot) in to_update.items()]
+    for future, task, slot in futures:
+      try:
+        future.result()
+        lines[slot] = f"✅ {task.name}: completed"
+      except Exception as e:
+        lines[slot] = f"❌ {task.name}: could not update ({e})"
+
+  if duplicates:
+    lines.append(f"🔁 Duplicates ignored: {', '.join(duplicates)}")
+  return "\n".join(lines)
@@ -0,0 +1,115 @@
+import datetime
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from backend.integrations.task_model import AVATARS, PRIORITIES
+from backend.integrations.task_store import TASK_DB
+from backend.utils import clients
+
+# One row per day; earned XP is split over the known avatars plus "Other"
+AVATAR_COLUMNS = tuple(f"earned_{a.lower()}" for a in AVATARS) + ("earned_other",)
+PRIORITY_COLUMNS = tuple(p.lower() for p in PRIORITIES)
+VALUE_COLUMNS = ("total", "completed", "total_xp", "earned_xp") + PRIORITY_COLUMNS + AVATAR_COLUMNS
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS report_history (
+  day TEXT PRIMARY KEY,
+  {', '.join(f"{c} INTEGER NOT NULL DEFAULT 0" for c in VALUE_COLUMNS)}
+);
+"""
+
+
+def _row(day, summary):
+  earned = dict(summary.get("avatars_earned") or {})
+  avatar_values = [earned.pop(a, 0) for a in AVATARS]
+  avatar_values.append(sum(earned.values()))
+  return (
+    day, summary["total_tasks"], summary["completed"], summary["total_xp"], summary["earned_xp"],
+    *(summary["priorities"].get(p, 0) for p in PRIORITIES), *avatar_values,
+  )
+
+
+@dataclass(slots=True)
+class HistoryColumns:
+  """
+  The daily snapshots as one array per metric, on a dense day grid.
+  Days without a snapshot carry the previous day's values forward.
+  """
+  days: np.ndarray
+  values: dict
+
+  def __len__(self):
+    return len(self.days)
+
+  @classmethod
+  def from_rows(cls, rows, until=None):
+    if not rows:
+      empty = np.zeros(0, dtype=np.int64)
+      return cls(days=np.array([], dtype="datetime64[D]"), values={c: empty for c in VALUE_COLUMNS})
+    recorded = np.array([r[0] for r in rows], dtype="datetime64[D]")
+    data = np.array([r[1:] for r in rows], dtype=np.int64)
+    last = np.datetime64(until or recorded[-1], "D")
+    days = np.arange(recorded[0], max(last, recorded[-1]) + 1)
+    # Index of the latest snapshot on or before each day
+    idx = np.searchsorted(recorded, days, side="right") - 1
+    return cls(days=days, values={c: data[idx, i] for i, c in enumerate(VALUE_COLUMNS)})
+
+  def daily(self, column):
+    """
+    Per-day increase of a cumulative column (e.g. tasks completed that day).
+    Drops (deleted tasks) count as zero.
+    """
+    values = self.values[column]
+    if not len(values):
+      return values
+    return np.clip(np.diff(values, prepend=values[0]), 0, None)
+
+
+class ReportHistory:
+  """
+  Daily snapshots of the report totals, stored next to the task mirror.
+  """
+
+  def __init__(self, path: str = TASK_DB):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    self._conn = sqlite3.connect(path, check_same_thread=False)
+    self._conn.execute("PRAGMA journal_mode=WAL")
+    self._conn.executescript(SCHEMA)
+    self._lock = threading.Lock()
+
+  def record(self, summary, day=None):
+    """
+    Store `summary` (a TaskAggregates snapshot) as the values for `day` (today by default).
+    Later calls on the same day overwrite it, so each day keeps its closing values.
+    """
+    self._write("REPLACE", summary, day)
+
+  def record_once(self, summary, day=None):
+    """
+    Store `summary` for `day` only if that day has no snapshot yet.
+    """
+    self._write("IGNORE", summary, day)
+
+  def _write(self, conflict, summary, day):
+    day = day or datetime.date.today().isoformat()
+    with self._lock, self._conn:
+      self._conn.execute(
+        f"INSERT OR {conflict} INTO report_history (day, {', '.join(VALUE_COLUMNS)}) "
+        f"VALUES ({', '.join('?' * (len(VALUE_COLUMNS) + 1))})",
+        _row(day, summary),
+      )
+
+  def columns(self, until=None) -> HistoryColumns:
+    with self._lock:
+      rows = self._conn.execute(
+        f"SELECT day, {', '.join(VALUE_COLUMNS)} FROM report_history ORDER BY day"
+      ).fetchall()
+    return HistoryColumns.from_rows(rows, until=until or datetime.date.today().isoformat())
+
+
+def report_history():
+  return clients.get_or_create("report_history", ReportHistory)
@@ -0,0 +1,93 @@
+import threading
+
+import numpy as np
+
+from backend.integrations.task_model import STATUSES, PRIORITIES
+
+
+class TaskAggregates:
+  """
+  Running report totals over the task mirror: counts by status and priority,
+  XP totals, and total/earned XP by avatar. `apply` adjusts them by one task's
+  contribution, `rebuild` recomputes them from a TaskColumns batch.
+  """
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._reset()
+
+  def _reset(self):
+    self.total = 0
+    self.completed = 0
+    self.total_xp = 0
+    self.earned_xp = 0
+    self.priorities = {p: 0 for p in PRIORITIES}
+    self.avatar_xp = {}
+    self.avatar_earned = {}
+    self.avatar_count = {}
+
+  def apply(self, status, avatar, priority, xp, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) one task's contribution.
+    """
+    avatar = avatar or "Unknown"
+    xp = int(xp or 0)
+    with self._lock:
+      self.total += sign
+      self.total_xp += sign * xp
+      if status == "Completed":
+        self.completed += sign
+        self.earned_xp += sign * xp
+        self.avatar_earned[avatar] = self.avatar_earned.get(avatar, 0) + sign * xp
+      if priority in self.priorities:
+        self.priorities[priority] += sign
+      self.avatar_xp[avatar] = self.avatar_xp.get(avatar, 0) + sign * xp
+      self.avatar_count[avatar] = self.avatar_count.get(avatar, 0) + sign
+      if self.avatar_count[avatar] <= 0:
+        del self.avatar_count[avatar]
+        del self.avatar_xp[avatar]
+        self.avatar_earned.pop(avatar, None)
+
+  def rebuild(self, cols):
+    """
+    Recompute everything from a TaskColumns batch (vectorized).
+    """
+    done = cols.status == STATUSES.index("Completed")
+    n_avatars = len(cols.avatar_names)
+    avatar_xp = np.bincount(cols.avatar, weights=cols.xp, minlength=n_avatars)
+    avatar_earned = np.bincount(cols.avatar, weights=cols.xp * done, minlength=n_avatars)
+    avatar_count = np.bincount(cols.avatar, minlength=n_avatars)
+    priorities = np.bincount(cols.priority, minlength=len(PRIORITIES) + 1)
+    with self._lock:
+      self._reset()
+      self.total = len(cols)
+      self.completed = int(done.sum())
+      self.total_xp = int(cols.xp.sum())
+      self.earned_xp = int(cols.xp[done].sum())
+      self.priorities = {p: int(priorities[i]) for i, p in enumerate(PRIORITIES)}
+      for i, name in enumerate(cols.avatar_names):
+        if avatar_count[i]:
+          self.avatar_xp[name] = int(avatar_xp[i])
+          self.avatar_earned[name] = int(avatar_earned[i])
+          self.avatar_count[name] = int(avatar_count[i])
+
+  @classmethod
+  def from_columns(cls, cols):
+    aggregates = cls()
+    aggregates.rebuild(cols)
+    return aggregates
+
+  def snapshot(self) -> dict:
+    with self._lock:
+      total = self.total
+      return {
+        "total_tasks": total,
+        "completed": self.completed,
+        "pending": total - self.completed,
+        "completion_rate": (self.completed / total * 100) if total > 0 else 0,
+        "total_xp": self.total_xp,
+        "earned_xp": self.earned_xp,
+        "avatars": dict(self.avatar_xp),
+        "avatars_earned": {a: xp for a, xp in self.avatar_earned.items() if xp},
+        "priorities": dict(self.priorities),
+      }
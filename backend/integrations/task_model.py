@@ -0,0 +1,116 @@
+from dataclasses import dataclass, asdict
+
+import numpy as np
+
+STATUSES = ("Pending", "Completed")
+AVATARS = ("Producer", "Administrator", "Entrepreneur", "Integrator")
+PRIORITIES = ("High", "Medium", "Low")
+# Status spellings seen in Notion, lowercased, mapped onto STATUSES
+STATUS_ALIASES = {**{s.lower(): s for s in STATUSES}, "done": "Completed"}
+
+
+@dataclass(slots=True)
+class Task:
+  """
+  One row of the POS Tasks database.
+  """
+  id: str
+  name: str = ""
+  avatar: str = ""
+  priority: str = ""
+  status: str = ""
+  suggested_time: str = ""
+  xp: int = 0
+
+  @classmethod
+  def from_page(cls, page):
+    """
+    The single decoder for Notion task pages.
+    """
+    props = page["properties"]
+    name = props["Name"]["title"]
+    suggested = props["Suggested Time"]["rich_text"]
+    return cls(
+      id=page["id"],
+      name=name[0]["plain_text"] if name else "",
+      avatar=_select(props, "Avatar"),
+      priority=_select(props, "Priority"),
+      status=_status(props),
+      suggested_time=suggested[0]["plain_text"] if suggested else "",
+      xp=props["XP"]["number"] or 0,
+    )
+
+  def to_dict(self):
+    return asdict(self)
+
+
+def _select(props, key):
+  select = props[key]["select"]
+  return select["name"] if select else ""
+
+
+def _status(props):
+  """
+  The page's status in the canonical STATUSES spelling; unknown values are kept as-is.
+  """
+  status = _select(props, "Status")
+  return STATUS_ALIASES.get(status.strip().lower(), status)
+
+
+def _codes(values, categories):
+  """
+  Encode strings as category codes; unknown values map to len(categories).
+  """
+  lookup = {c: i for i, c in enumerate(categories)}
+  other = len(categories)
+  return np.fromiter((lookup.get(v, other) for v in values), dtype=np.int16, count=len(values))
+
+
+@dataclass(slots=True)
+class TaskColumns:
+  """
+  Columnar view of many tasks for vectorized aggregation.
+  `status` and `priority` hold codes into STATUSES/PRIORITIES (len(categories) = other);
+  `avatar` holds codes into `avatar_names` (the known avatars, then any others seen,
+  with empty avatars reported as "Unknown").
+  """
+  status: np.ndarray
+  avatar: np.ndarray
+  priority: np.ndarray
+  xp: np.ndarray
+  avatar_names: tuple
+
+  def __len__(self):
+    return len(self.xp)
+
+  @classmethod
+  def from_rows(cls, rows):
+    """
+    Build from (status, avatar, priority, xp) tuples, e.g. straight from SQL.
+    """
+    rows = list(rows)
+    status, avatar, priority, xp = zip(*rows) if rows else ((), (), (), ())
+    avatar = [a or "Unknown" for a in avatar]
+    avatar_names = AVATARS + tuple(sorted(set(avatar) - set(AVATARS)))
+    return cls(
+      status=_codes(status, STATUSES),
+      avatar=_codes(avatar, avatar_names),
+      priority=_codes(priority, PRIORITIES),
+      xp=np.fromiter((int(x or 0) for x in xp), dtype=np.int64, count=len(xp)),
+      avatar_names=avatar_names,
+    )
+
+  @classmethod
+  def from_tasks(cls, tasks):
+    return cls.from_rows((t.status, t.avatar, t.priority, t.xp) for t in tasks)
+
+  @classmethod
+  def from_pages(cls, pages):
+    """
+    Decode a whole batch of Notion pages straight into columns, without Task objects.
+    """
+    return cls.from_rows(
+      (_status(p["properties"]), _select(p["properties"], "Avatar"),
+       _select(p["properties"], "Priority"), p["properties"]["XP"]["number"] or 0)
+      for p in pages
+    )
@@ -0,0 +1,212 @@
+import os
+import sqlite3
+import threading
+import time
+
+from backend.integrations.task_model import Task, TaskColumns, STATUS_ALIASES
+from backend.integrations.task_aggregates import TaskAggregates
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+TASK_DB = os.getenv("POS_TASK_DB", os.path.join(DATA_DIR, "tasks.sqlite"))
+
+# Field order of Task
+COLUMNS = ("id", "name", "avatar", "priority", "status", "suggested_time", "xp")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+  id TEXT PRIMARY KEY,
+  name TEXT NOT NULL DEFAULT '',
+  name_lower TEXT NOT NULL DEFAULT '',
+  avatar TEXT NOT NULL DEFAULT '',
+  priority TEXT NOT NULL DEFAULT '',
+  status TEXT NOT NULL DEFAULT '',
+  suggested_time TEXT NOT NULL DEFAULT '',
+  xp INTEGER NOT NULL DEFAULT 0,
+  created_time TEXT NOT NULL DEFAULT '',
+  last_edited_time TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, created_time);
+CREATE INDEX IF NOT EXISTS idx_tasks_avatar ON tasks(avatar);
+CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks(priority);
+CREATE INDEX IF NOT EXISTS idx_tasks_name ON tasks(name_lower);
+CREATE TABLE IF NOT EXISTS meta (
+  key TEXT PRIMARY KEY,
+  value TEXT
+);
+"""
+
+
+class TaskStore:
+  """
+  Local SQLite mirror of the POS Tasks Notion database.
+  Knows nothing about Notion itself; `notion_client` feeds it decoded tasks.
+  `aggregates` holds the report totals, kept current by every write. Other
+  worker processes share the file, so they are rebuilt from SQL whenever
+  another connection has committed (`PRAGMA data_version` changed).
+  """
+
+  def __init__(self, path: str = TASK_DB):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    self._conn = sqlite3.connect(path, check_same_thread=False)
+    self._conn.execute("PRAGMA journal_mode=WAL")
+    self._conn.executescript(SCHEMA)
+    # Rows mirrored before statuses were normalized on decode
+    with self._conn:
+      self._conn.executemany(
+        "UPDATE tasks SET status = ? WHERE lower(trim(status)) = ? AND status != ?",
+        [(status, alias, status) for alias, status in STATUS_ALIASES.items()],
+      )
+    self._lock = threading.Lock()
+    self._aggregates = TaskAggregates()
+    self._version = None
+    with self._lock:
+      self._refresh_aggregates()
+
+  def _data_version(self):
+    return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+  def _refresh_aggregates(self):
+    """
+    Rebuild the totals if another connection wrote since we last looked. Caller holds the lock.
+    """
+    version = self._data_version()
+    if version != self._version:
+      self._aggregates.rebuild(TaskColumns.from_rows(
+        self._conn.execute("SELECT status, avatar, priority, xp FROM tasks").fetchall()
+      ))
+      self._version = version
+
+  @property
+  def aggregates(self):
+    with self._lock:
+      self._refresh_aggregates()
+    return self._aggregates
+
+  def _row(self, task, created_time, last_edited_time):
+    return (
+      task.id, task.name, task.name.lower(), task.avatar, task.priority, task.status,
+      task.suggested_time, task.xp or 0, created_time or "", last_edited_time or "",
+    )
+
+  def upsert(self, entries):
+    """
+    Insert or update tasks. `entries` is an iterable of (task, created_time, last_edited_time).
+    """
+    rows = [self._row(*entry) for entry in entries]
+    if not rows:
+      return 0
+    with self._lock, self._conn:
+      # Deltas must apply on top of totals that include other workers' writes
+      self._refresh_aggregates()
+      previous = self._existing([row[0] for row in rows])
+      self._conn.executemany(
+        """
+        INSERT INTO tasks (id, name, name_lower, avatar, priority, status, suggested_time, xp, created_time, last_edited_time)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+          name=excluded.name, name_lower=excluded.name_lower, avatar=excluded.avatar,
+          priority=excluded.priority, status=excluded.status, suggested_time=excluded.suggested_time,
+          xp=excluded.xp,
+          created_time=CASE WHEN excluded.created_time != '' THEN excluded.created_time ELSE tasks.created_time END,
+          last_edited_time=excluded.last_edited_time
+        """,
+        rows,
+      )
+      # Swap each task's old contribution to the report totals for the new one
+      for row in rows:
+        old = previous.get(row[0])
+        if old:
+          self._aggregates.apply(*old, sign=-1)
+        new = (row[5], row[3], row[4], row[7])
+        self._aggregates.apply(*new)
+        previous[row[0]] = new
+    return len(rows)
+
+  def _existing(self, ids):
+    """
+    (status, avatar, priority, xp) of the given ids already in the mirror. Caller holds the lock.
+    """
+    found = {}
+    for i in range(0, len(ids), 500):
+      chunk = ids[i:i + 500]
+      for row in self._conn.execute(
+        f"SELECT id, status, avatar, priority, xp FROM tasks WHERE id IN ({', '.join('?' * len(chunk))})",
+        chunk,
+      ):
+        found[row[0]] = row[1:]
+    return found
+
+  def replace_all(self, entries):
+    """
+    Swap the whole mirror for a fresh full download (drops pages deleted in Notion).
+    """
+    rows = [self._row(*entry) for entry in entries]
+    with self._lock, self._conn:
+      self._conn.execute("DELETE FROM tasks")
+      self._conn.executemany(
+        "INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        rows,
+      )
+      self._aggregates.rebuild(TaskColumns.from_rows(
+        self._conn.execute("SELECT status, avatar, priority, xp FROM tasks").fetchall()
+      ))
+    return len(rows)
+
+  @staticmethod
+  def _where(status=None, avatar=None, priority=None):
+    clauses, params = [], []
+    for column, value in (("status", status), ("avatar", avatar), ("priority", priority)):
+      if value:
+        clauses.append(f"{column} = ?")
+        params.append(value)
+    return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+  def query(self, status=None, avatar=None, priority=None):
+    where, params = self._where(status, avatar, priority)
+    with self._lock:
+      rows = self._conn.execute(
+        f"SELECT {', '.join(COLUMNS)} FROM tasks {where} ORDER BY created_time, id",
+        params,
+      ).fetchall()
+    return [Task(*row) for row in rows]
+
+  def columns(self, status=None, avatar=None, priority=None):
+    """
+    Aggregation columns straight from SQL, without building Task objects.
+    """
+    where, params = self._where(status, avatar, priority)
+    with self._lock:
+      rows = self._conn.execute(
+        f"SELECT status, avatar, priority, xp FROM tasks {where}", params
+      ).fetchall()
+    return TaskColumns.from_rows(rows)
+
+  def find_by_name(self, name: str):
+    with self._lock:
+      rows = self._conn.execute(
+        f"SELECT {', '.join(COLUMNS)} FROM tasks WHERE name_lower = ? ORDER BY created_time",
+        (name.lower(),),
+      ).fetchall()
+    return [Task(*row) for row in rows]
+
+  def get_meta(self, key: str, default=None):
+    with self._lock:
+      row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+  def set_meta(self, key: str, value):
+    with self._lock, self._conn:
+      self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+  def count(self) -> int:
+    with self._lock:
+      return self._conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+  def stats(self) -> dict:
+    last_sync = float(self.get_meta("last_sync", 0) or 0)
+    return {
+      "tasks": self.count(),
+      "last_sync_age_seconds": (time.time() - last_sync) if last_sync else None,
+      "last_full_sync": self.get_meta("last_full_sync"),
+      "cursor": self.get_meta("cursor"),
+    }
@@ -1,15 +1,11 @@
-from pinecone import Pinecone
-import os
 import uuid
 from dotenv import load_dotenv
+from backend.utils.metrics import timed
+from backend.utils import clients
 
 load_dotenv()
 
-index_name = "memory"
-pc = Pinecone(os.getenv("PINECONE_API_KEY"))
-
-index = pc.Index(index_name)
-
+@timed("pinecone", "add_memory")
 def add_memory(text:str,mem_type:str="conversational"):
   """
     Adds memory to Pinecone
@@ -22,15 +18,16 @@ def add_memory(text:str,mem_type:str="conversational"):
     "type": mem_type
   }
   try:
-    index.upsert_records("long_term",[record])
+    clients.pinecone_index().upsert_records("long_term",[record])
     print("\nLong term Memory added to PineconeDB ✅")
   except Exception as e:
     print(f"Could not add long term memory to PineconeDB ⚠️: {e}")
 
+@timed("pinecone", "search_memory")
 def search_memory(query:str, k=3):
   
   try:
-    results = index.search(
+    results = clients.pinecone_index().search(
       namespace="long_term",
       query={
           "top_k": k,
@@ -48,6 +45,7 @@ def search_memory(query:str, k=3):
   except Exception as e:
     print(f"Could'nt query pinecone: {e}")
     
+@timed("pinecone", "add_previous_convos")
 def add_previous_convos(convo:str):
   """
   Add short term memory to Pinecone
@@ -59,14 +57,17 @@ def add_previous_convos(convo:str):
     "text": convo,
   }
   try:
+    index = clients.pinecone_index()
     index.delete(namespace="short_term",delete_all=True)
     index.upsert_records("short_term",[record])
     print("\nShort Term Memory added to PineconeDB ✅")
   except Exception as e:
     print(f"Could not add short term memory to PineconeDB ⚠️: {e}")
     
+@timed("pinecone", "get_all_long_term_mems")
 def get_all_long_term_mems(num=5):
   
+  index = clients.pinecone_index()
   list_paginator = index.list(namespace="long_term", limit=num)
 
   all_ids = []
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+SESSION_DB = os.getenv("POS_SESSION_DB", os.path.join(DATA_DIR, "sessions.sqlite"))
+
+# Turns kept per session in the checkpointed state (ring buffer)
+HISTORY_MAX = int(os.getenv("POS_SESSION_HISTORY_MAX", "50"))
+# Turns handed to the agent as short-term context
+HISTORY_CONTEXT = int(os.getenv("POS_SESSION_CONTEXT", "5"))
+# Sessions whose bookkeeping stays in process memory
+MAX_ACTIVE_SESSIONS = int(os.getenv("POS_MAX_ACTIVE_SESSIONS", "1000"))
+
+DEFAULT_SESSION = "default"
+
+
+def bounded_history(left, right):
+  """
+  State reducer for `history`: append new turns, keep only the last HISTORY_MAX.
+  """
+  merged = (left or []) + (right or [])
+  return merged[-HISTORY_MAX:]
+
+
+def session_config(session_id: str) -> dict:
+  return {"configurable": {"thread_id": session_id or DEFAULT_SESSION}}
+
+
+class _Session:
+  __slots__ = ("lock", "last_used")
+
+  def __init__(self):
+    self.lock = asyncio.Lock()
+    self.last_used = time.monotonic()
+
+
+class SessionRegistry:
+  """
+  In-memory bookkeeping for active sessions.
+  Serializes turns within a session (the checkpointer expects one writer per thread)
+  and evicts the least recently used idle sessions once MAX_ACTIVE_SESSIONS is exceeded.
+  Evicting only drops the lock; the history itself lives in the checkpointer.
+  """
+
+  def __init__(self, max_sessions: int = MAX_ACTIVE_SESSIONS):
+    self.max_sessions = max_sessions
+    self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+    self.evicted = 0
+
+  def _touch(self, session_id: str) -> _Session:
+    session = self._sessions.get(session_id)
+    if session is None:
+      session = self._sessions[session_id] = _Session()
+    self._sessions.move_to_end(session_id)
+    session.last_used = time.monotonic()
+    self._evict()
+    return session
+
+  def _evict(self):
+    if len(self._sessions) <= self.max_sessions:
+      return
+    for session_id in list(self._sessions):
+      if len(self._sessions) <= self.max_sessions:
+        break
+      if not self._sessions[session_id].lock.locked():
+        del self._sessions[session_id]
+        self.evicted += 1
+
+  @asynccontextmanager
+  async def lock(self, session_id: str):
+    session = self._touch(session_id or DEFAULT_SESSION)
+    async with session.lock:
+      yield
+    session.last_used = time.monotonic()
+
+  def stats(self) -> dict:
+    return {
+      "active_sessions": len(self._sessions),
+      "max_sessions": self.max_sessions,
+      "evicted": self.evicted,
+    }
+
+
+async def open_checkpointer():
+  """
+  Open the SQLite-backed LangGraph checkpointer that persists per-session state.
+  Returns (checkpointer, connection); close the connection on shutdown.
+  """
+  import aiosqlite
+  from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+  os.makedirs(os.path.dirname(SESSION_DB), exist_ok=True)
+  conn = await aiosqlite.connect(SESSION_DB)
+  # WAL lets several uvicorn workers share the same file
+  await conn.execute("PRAGMA journal_mode=WAL")
+  checkpointer = AsyncSqliteSaver(conn)
+  await checkpointer.setup()
+  return checkpointer, conn
@@ -0,0 +1,142 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from backend.utils import clients
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+XP_DB = os.getenv("POS_XP_DB", os.path.join(DATA_DIR, "xp.sqlite"))
+# Pre-ledger storage, imported once on first start
+LEGACY_XP_FILE = os.path.join(DATA_DIR, "xp_memory.json")
+
+AVATARS = ("Producer", "Administrator", "Entrepreneur", "Integrator")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS xp_ledger (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  ts REAL NOT NULL,
+  avatar TEXT NOT NULL,
+  xp INTEGER NOT NULL,
+  task TEXT NOT NULL DEFAULT '',
+  reason TEXT NOT NULL DEFAULT '',
+  source TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_xp_ledger_avatar ON xp_ledger(avatar, id);
+CREATE TABLE IF NOT EXISTS xp_totals (
+  avatar TEXT PRIMARY KEY,
+  xp INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS meta (
+  key TEXT PRIMARY KEY,
+  value TEXT
+);
+"""
+
+
+class XpLedger:
+  """
+  Append-only XP ledger in SQLite (WAL), safe across threads and worker processes.
+  Every award is a ledger row; per-avatar totals are incremented in the same
+  transaction and cached in memory. The cache is reloaded only when another
+  connection has committed (`PRAGMA data_version` changed).
+  """
+
+  def __init__(self, path: str = XP_DB, legacy_file: str = LEGACY_XP_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+    self._conn.execute("PRAGMA journal_mode=WAL")
+    self._conn.executescript(SCHEMA)
+    self._lock = threading.Lock()
+    self._totals = None
+    self._version = None
+    self._migrate(legacy_file)
+
+  def _migrate(self, legacy_file):
+    """
+    Import xp_memory.json as one opening-balance entry per avatar (once).
+    """
+    with self._lock:
+      self._conn.execute("BEGIN IMMEDIATE")
+      try:
+        done = self._conn.execute("SELECT value FROM meta WHERE key = 'legacy_import'").fetchone()
+        if not done and legacy_file and os.path.exists(legacy_file):
+          with open(legacy_file, "r") as f:
+            legacy = json.load(f)
+          entries = [(a, int(xp or 0), "", "Imported from xp_memory.json") for a, xp in legacy.items() if xp]
+          self._insert(entries, "migration")
+          print(f"📦 Imported XP balances from {legacy_file}")
+        if not done:
+          self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_import', ?)", (str(time.time()),))
+        self._conn.execute("COMMIT")
+      except Exception:
+        self._conn.execute("ROLLBACK")
+        raise
+
+  def _insert(self, entries, source):
+    now = time.time()
+    self._conn.executemany(
+      "INSERT INTO xp_ledger (ts, avatar, xp, task, reason, source) VALUES (?, ?, ?, ?, ?, ?)",
+      [(now, avatar, xp, task, reason, source) for avatar, xp, task, reason in entries],
+    )
+    self._conn.executemany(
+      "INSERT INTO xp_totals (avatar, xp) VALUES (?, ?) "
+      "ON CONFLICT(avatar) DO UPDATE SET xp = xp + excluded.xp",
+      [(avatar, xp) for avatar, xp, _, _ in entries],
+    )
+
+  def record(self, entries, source: str = "task"):
+    """
+    Award XP atomically. `entries` is an iterable of (avatar, xp, task, reason).
+    Returns the updated totals.
+    """
+    entries = [(avatar or "Producer", int(xp or 0), task or "", reason or "") for avatar, xp, task, reason in entries]
+    if not entries:
+      return self.totals()
+    with self._lock:
+      self._conn.execute("BEGIN IMMEDIATE")
+      try:
+        self._insert(entries, source)
+        self._conn.execute("COMMIT")
+      except Exception:
+        self._conn.execute("ROLLBACK")
+        raise
+      # Our own commit doesn't bump data_version, so reload explicitly
+      self._reload()
+      return dict(self._totals)
+
+  def award(self, avatar, xp, task="", reason=""):
+    return self.record([(avatar, xp, task, reason)])
+
+  def _reload(self):
+    totals = {a: 0 for a in AVATARS}
+    totals.update(dict(self._conn.execute("SELECT avatar, xp FROM xp_totals").fetchall()))
+    self._totals = totals
+    self._version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+  def totals(self) -> dict:
+    """
+    XP per avatar, from memory unless another process has written since.
+    """
+    with self._lock:
+      version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+      if self._totals is None or version != self._version:
+        self._reload()
+      return dict(self._totals)
+
+  def history(self, avatar=None, limit: int = 50):
+    """
+    Most recent ledger entries, newest first.
+    """
+    where, params = ("WHERE avatar = ?", [avatar]) if avatar else ("", [])
+    with self._lock:
+      rows = self._conn.execute(
+        f"SELECT id, ts, avatar, xp, task, reason, source FROM xp_ledger {where} ORDER BY id DESC LIMIT ?",
+        params + [limit],
+      ).fetchall()
+    return [dict(zip(("id", "ts", "avatar", "xp", "task", "reason", "source"), row)) for row in rows]
+
+
+def xp_ledger():
+  return clients.get_or_create("xp_ledger", XpLedger)
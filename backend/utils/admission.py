@@ -0,0 +1,75 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request cannot get an execution slot (queue full or wait timed out).
+    """
+
+
+class AdmissionController:
+    """
+    Bounds how many graph runs execute at once.
+    Up to `max_inflight` requests run concurrently, up to `max_queue` more wait
+    for at most `queue_timeout` seconds, everything beyond that is rejected immediately.
+    """
+
+    def __init__(self, max_inflight: int, max_queue: int, queue_timeout: float):
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_inflight)
+        self.inflight = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    async def acquire(self):
+        """
+        Wait for an execution slot. Pair every successful call with release().
+        """
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected("Server is busy, too many queries in flight")
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise AdmissionRejected("Timed out waiting for a free query slot")
+        finally:
+            self.waiting -= 1
+
+        self.inflight += 1
+
+    def release(self):
+        self.inflight -= 1
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_inflight": self.max_inflight,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "inflight": self.inflight,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+        }
+
+
+def from_env() -> AdmissionController:
+    return AdmissionController(
+        max_inflight=int(os.getenv("POS_MAX_INFLIGHT", "8")),
+        max_queue=int(os.getenv("POS_MAX_QUEUE", "32")),
+        queue_timeout=float(os.getenv("POS_QUEUE_TIMEOUT", "10")),
+    )
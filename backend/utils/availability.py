@@ -0,0 +1,112 @@
+"""
+Interval algebra for calendar availability.
+
+Intervals are parallel int64 arrays of epoch seconds (starts, ends), half-open.
+Every operation is vectorized, so a two-week, multi-calendar query costs the
+same handful of numpy calls as a single day.
+"""
+import datetime
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+
+def _empty():
+    return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+
+def merge(starts, ends):
+    """
+    Union of possibly overlapping intervals, as sorted disjoint intervals.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    if not len(starts):
+        return _empty()
+    order = np.argsort(starts, kind="stable")
+    s, e = starts[order], ends[order]
+    reach = np.maximum.accumulate(e)
+    # A new group starts where an interval begins after everything before it ended
+    first = np.concatenate(([0], np.flatnonzero(s[1:] > reach[:-1]) + 1))
+    last = np.concatenate((first[1:] - 1, [len(s) - 1]))
+    return s[first], reach[last]
+
+
+def intersect(a_starts, a_ends, b_starts, b_ends):
+    """
+    Intersection of two sorted disjoint interval lists.
+    """
+    a_starts, a_ends = np.asarray(a_starts, dtype=np.int64), np.asarray(a_ends, dtype=np.int64)
+    b_starts, b_ends = np.asarray(b_starts, dtype=np.int64), np.asarray(b_ends, dtype=np.int64)
+    if not len(a_starts) or not len(b_starts):
+        return _empty()
+    # For each b, the run of a intervals that overlap it
+    lo = np.searchsorted(a_ends, b_starts, side="right")
+    hi = np.searchsorted(a_starts, b_ends, side="left")
+    counts = np.clip(hi - lo, 0, None)
+    b_idx = np.repeat(np.arange(len(b_starts)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    a_idx = np.repeat(lo, counts) + offsets
+    s = np.maximum(a_starts[a_idx], b_starts[b_idx])
+    e = np.minimum(a_ends[a_idx], b_ends[b_idx])
+    keep = s < e
+    return s[keep], e[keep]
+
+
+def complement(starts, ends, lower, upper):
+    """
+    Gaps between sorted disjoint intervals within [lower, upper).
+    """
+    gap_starts = np.concatenate(([lower], ends))
+    gap_ends = np.concatenate((starts, [upper]))
+    gap_starts = np.clip(gap_starts, lower, upper)
+    gap_ends = np.clip(gap_ends, lower, upper)
+    keep = gap_starts < gap_ends
+    return gap_starts[keep], gap_ends[keep]
+
+
+def working_windows(first_day, days, tz, work_start=datetime.time(9), work_end=datetime.time(18), weekdays=None):
+    """
+    Working-hour windows for `days` consecutive local dates from `first_day`.
+    `weekdays` limits them to those weekday numbers (Monday=0).
+    """
+    zone = ZoneInfo(tz) if isinstance(tz, str) else tz
+    dates = [first_day + datetime.timedelta(days=i) for i in range(days)]
+    if weekdays is not None:
+        dates = [d for d in dates if d.weekday() in weekdays]
+    # Per-day construction keeps DST transitions correct
+    starts = [datetime.datetime.combine(d, work_start, zone).timestamp() for d in dates]
+    ends = [
+        datetime.datetime.combine(d + datetime.timedelta(days=1) if work_end <= work_start else d, work_end, zone).timestamp()
+        for d in dates
+    ]
+    return np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64)
+
+
+def free_slots(windows, busy, buffer_seconds=0, min_seconds=0):
+    """
+    Free time inside `windows` not covered by `busy` (both (starts, ends)).
+    Busy intervals are padded by `buffer_seconds` on each side; slots shorter
+    than `min_seconds` are dropped.
+    """
+    win_starts, win_ends = merge(*windows)
+    if not len(win_starts):
+        return _empty()
+    busy_starts = np.asarray(busy[0], dtype=np.int64) - buffer_seconds
+    busy_ends = np.asarray(busy[1], dtype=np.int64) + buffer_seconds
+    busy_starts, busy_ends = merge(busy_starts, busy_ends)
+    gaps = complement(busy_starts, busy_ends, win_starts[0], win_ends[-1])
+    s, e = intersect(win_starts, win_ends, *gaps)
+    keep = (e - s) >= min_seconds
+    return s[keep], e[keep]
+
+
+def to_datetimes(starts, ends, tz):
+    """
+    [(start, end)] as aware datetimes in `tz`.
+    """
+    zone = ZoneInfo(tz) if isinstance(tz, str) else tz
+    return [
+        (datetime.datetime.fromtimestamp(int(s), zone), datetime.datetime.fromtimestamp(int(e), zone))
+        for s, e in zip(starts, ends)
+    ]
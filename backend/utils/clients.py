@@ -0,0 +1,164 @@
+"""
+Process-wide registry of upstream clients (Gemini, Notion, Pinecone, the ReAct agent).
+
+Clients are created on first use and shared by every module, so importing the
+app does no network I/O and workers can serve /health immediately. Heavy SDK
+imports happen inside the factories for the same reason.
+"""
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_clients = {}
+_timings = {}
+_locks = {}
+_lock = threading.Lock()
+_process_started = time.perf_counter()
+_ready_at = None
+
+# Models used across the agents
+DEFAULT_MODEL = "gemini-2.0-flash"
+PERSONA_MODEL = "gemini-2.5-flash"
+PINECONE_INDEX = "memory"
+
+
+def get_or_create(name: str, factory):
+    """
+    Return the shared client `name`, building it with `factory()` the first time.
+    """
+    client = _clients.get(name)
+    if client is not None:
+        return client
+    # One lock per client, so a slow Pinecone handshake doesn't hold up Notion
+    with _lock:
+        name_lock = _locks.setdefault(name, threading.Lock())
+    with name_lock:
+        client = _clients.get(name)
+        if client is None:
+            start = time.perf_counter()
+            client = factory()
+            _timings[name] = time.perf_counter() - start
+            _clients[name] = client
+    return client
+
+
+def override(name: str, client):
+    """
+    Replace a shared client (benchmarks, local runs).
+    """
+    with _lock:
+        _clients[name] = client
+
+
+def _configure_genai():
+    import google.generativeai as genai
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY")) #type: ignore
+    return genai
+
+
+def genai():
+    """
+    The configured `google.generativeai` module.
+    """
+    return get_or_create("genai", _configure_genai)
+
+
+def gemini_model(model_name: str = DEFAULT_MODEL):
+    def factory():
+        return genai().GenerativeModel(model_name) #type: ignore
+    return get_or_create(f"gemini:{model_name}", factory)
+
+
+def chat_llm():
+    def factory():
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        return ChatGoogleGenerativeAI(
+            model="gemini-2.5-flash",
+            google_api_key=os.getenv("GEMINI_API_KEY"),
+            temperature=0.7
+        )
+    return get_or_create("chat_llm", factory)
+
+
+def notion():
+    def factory():
+        from notion_client import Client
+        return Client(auth=os.getenv("NOTION_TOKEN"))
+    return get_or_create("notion", factory)
+
+
+def pinecone_index():
+    def factory():
+        from pinecone import Pinecone
+        pc = Pinecone(os.getenv("PINECONE_API_KEY"))
+        # Resolves the index host - a network round trip
+        return pc.Index(PINECONE_INDEX)
+    return get_or_create("pinecone_index", factory)
+
+
+def react_agent():
+    def factory():
+        # Imported here: the tools pull in every agent module
+        from backend.graphs.nodes.parent_node import build_agent
+        return build_agent(chat_llm())
+    return get_or_create("react_agent", factory)
+
+
+def google_credentials():
+    # Lives in google_clients with the per-thread service cache
+    from backend.utils import google_clients
+    return google_clients.credentials()
+
+
+WARMUP = {
+    "gemini": lambda: gemini_model(DEFAULT_MODEL),
+    "gemini_persona": lambda: gemini_model(PERSONA_MODEL),
+    "chat_llm": chat_llm,
+    "react_agent": react_agent,
+    "notion": notion,
+    "pinecone": pinecone_index,
+    "google": google_credentials,
+}
+
+
+def warmup(names=None):
+    """
+    Eagerly build the given clients (all by default). Failures are reported, not raised.
+    """
+    global _ready_at
+    errors = {}
+    for name in names or WARMUP:
+        try:
+            WARMUP[name]()
+        except Exception as e:
+            errors[name] = str(e)
+            print(f"[WARN] Warmup of {name} failed: {e}")
+    _ready_at = time.perf_counter()
+    return errors
+
+
+def startup_report(import_seconds: float = None) -> dict:
+    """
+    Cold-start timings: app import time, per-client init time, time to warm.
+    """
+    return {
+        "import_seconds": import_seconds,
+        "warmed_after_seconds": (_ready_at - _process_started) if _ready_at else None,
+        "uptime_seconds": time.perf_counter() - _process_started,
+        "clients": {name: round(seconds, 4) for name, seconds in sorted(_timings.items())},
+        "pending": sorted(k for k in WARMUP if not _is_built(k)),
+    }
+
+
+def _is_built(warmup_name: str) -> bool:
+    keys = {
+        "gemini": f"gemini:{DEFAULT_MODEL}",
+        "gemini_persona": f"gemini:{PERSONA_MODEL}",
+        "pinecone": "pinecone_index",
+        "google": "google_credentials",
+    }
+    return keys.get(warmup_name, warmup_name) in _clients
@@ -0,0 +1,282 @@
+"""
+Deterministic parser for simple scheduling requests, e.g.
+"meeting with Sarah tomorrow at 3pm for 30 minutes" or "dentist on Friday 10:30-11:15".
+
+`parse_event_prompt` returns the same fields the LLM parser produces plus a
+`confident` flag. Anything it can't fully account for (recurrence, vague
+ranges, leftover numbers) is marked not confident so the caller can fall back
+to the LLM.
+"""
+import datetime
+import re
+
+DEFAULT_DURATION = datetime.timedelta(hours=1)
+
+WEEKDAYS = {
+    "mon": 0, "monday": 0, "tue": 1, "tues": 1, "tuesday": 1, "wed": 2, "wednesday": 2,
+    "thu": 3, "thur": 3, "thurs": 3, "thursday": 3, "fri": 4, "friday": 4,
+    "sat": 5, "saturday": 5, "sun": 6, "sunday": 6,
+}
+MONTHS = {m: i + 1 for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+)}
+PARTS_OF_DAY = {"morning": 9, "afternoon": 14, "evening": 18, "tonight": 20}
+NUMBER_WORDS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "half an": 0.5, "half a": 0.5}
+
+_MONTH = r"(jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_WEEKDAY = r"(" + "|".join(sorted(WEEKDAYS, key=len, reverse=True)) + r")"
+_FULL_WEEKDAY = r"(monday|tuesday|wednesday|thursday|friday|saturday|sunday)"
+_CLOCK = r"(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm|a\.m\.|p\.m\.)?"
+_AMOUNT = r"(\d+(?:\.\d+)?|an?|one|two|three|half an?)"
+_HOURS = r"(?:hours?|hrs?|h)"
+_MINUTES = r"(?:minutes?|mins?|m)"
+
+# Words that mean the request says more than this parser understands
+_UNSURE = re.compile(
+    r"\b(every|each|daily|weekly|monthly|weekend|next week|next month|before|after|"
+    r"between|until|till|around|about|sometime|o'?clock|quarter|half past)\b|\d"
+)
+_LEADING = re.compile(
+    r"^\s*(?:please\s+)?(?:can you\s+)?(?:schedule|add|create|book|set up|setup|put|plan|arrange|make|block)"
+    r"(?:\s+(?:me\s+)?(?:an?|the|some)\b)?\s*",
+    re.I,
+)
+_TRAILING = re.compile(r"\b(?:on|to|in|into)\s+(?:my|the)\s+calendar\b", re.I)
+_DANGLING = re.compile(r"(?:\s+\b(?:on|at|for|from|by|in|and|,)\b)+\s*$|^\s*\b(?:on|at|for|from|by|and)\b\s+", re.I)
+
+
+def _amount(value):
+    value = value.lower()
+    return NUMBER_WORDS[value] if value in NUMBER_WORDS else float(value)
+
+
+def _to_24h(hour, minute, meridiem, part=None):
+    """
+    `part` is the part of day said alongside the time ("tonight", "morning"),
+    which decides am/pm for a bare hour.
+    """
+    hour, minute = int(hour), int(minute or 0)
+    if hour > 23 or minute > 59:
+        return None
+    meridiem = (meridiem or "").replace(".", "")
+    if meridiem == "pm" and hour < 12:
+        hour += 12
+    elif meridiem == "am" and hour == 12:
+        hour = 0
+    elif not meridiem and part in ("afternoon", "evening", "tonight") and 1 <= hour < 12:
+        hour += 12
+    elif not meridiem and part is None and 1 <= hour <= 7:
+        # "at 3" means 3pm in a working day
+        hour += 12
+    return datetime.time(hour, minute)
+
+
+class _Scan:
+    """
+    Runs patterns over the lowercased prompt, remembering which spans were consumed.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.lower = text.lower()
+        self.spans = []
+        # Set when a phrase was understood but could mean more than one thing
+        self.ambiguous = False
+
+    def find(self, pattern):
+        for m in re.finditer(pattern, self.lower):
+            if not any(s < m.end() and m.start() < e for s, e in self.spans):
+                self.spans.append(m.span())
+                return m
+        return None
+
+    def rest(self):
+        out, last = [], 0
+        for s, e in sorted(self.spans):
+            out.append(self.text[last:s])
+            last = e
+        out.append(self.text[last:])
+        return " ".join("".join(out).split())
+
+
+def _find_date(scan, today):
+    m = scan.find(r"\bday after tomorrow\b")
+    if m:
+        return today + datetime.timedelta(days=2)
+    m = scan.find(r"\btomorrow\b")
+    if m:
+        return today + datetime.timedelta(days=1)
+    m = scan.find(r"\btoday\b")
+    if m:
+        return today
+    m = scan.find(r"\bin\s+(\d+|an?|one|two|three)\s+(days?|weeks?)\b")
+    if m:
+        n = int(_amount(m.group(1)))
+        return today + datetime.timedelta(days=n * (7 if m.group(2).startswith("week") else 1))
+    m = scan.find(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+    if m:
+        try:
+            return datetime.date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        except ValueError:
+            return None
+    m = scan.find(rf"\b(?:on\s+)?(?:the\s+)?(\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?{_MONTH}(?:,?\s+(\d{{4}}))?")
+    if m:
+        return _month_day(today, m.group(2), m.group(1), m.group(3))
+    m = scan.find(rf"\b(?:on\s+)?{_MONTH}\s+(\d{{1,2}})(?:st|nd|rd|th)?\b(?:,?\s+(\d{{4}}))?")
+    if m:
+        return _month_day(today, m.group(1), m.group(2), m.group(3))
+    # Full names first, so "sat exam on saturday" takes "saturday"
+    m = scan.find(rf"\b(on\s+)?(?:(this|next|coming)\s+)?{_FULL_WEEKDAY}\b")
+    if not m:
+        m = scan.find(rf"\b(on\s+)?(?:(this|next|coming)\s+)?{_WEEKDAY}\b")
+        # A bare "sat"/"wed"/"sun" may just be a word of the title
+        if m and not (m.group(1) or m.group(2)):
+            scan.ambiguous = True
+    if m:
+        ahead = (WEEKDAYS[m.group(3)] - today.weekday()) % 7
+        if ahead == 0 and m.group(2) != "this":
+            ahead = 7
+        # "next friday" is this coming friday to some people and the week after to others
+        scan.ambiguous = scan.ambiguous or m.group(2) == "next"
+        return today + datetime.timedelta(days=ahead)
+    return None
+
+
+def _month_day(today, month, day, year):
+    try:
+        date = datetime.date(int(year) if year else today.year, MONTHS[month[:3]], int(day))
+    except ValueError:
+        return None
+    if not year and date < today:
+        date = date.replace(year=today.year + 1)
+    return date
+
+
+def _find_duration(scan):
+    m = scan.find(rf"\bfor\s+{_AMOUNT}\s*{_HOURS}(?:\s*(?:and\s+)?(\d+)\s*{_MINUTES})?\b")
+    if m:
+        return datetime.timedelta(hours=_amount(m.group(1)), minutes=int(m.group(2) or 0))
+    m = scan.find(rf"\bfor\s+{_AMOUNT}\s*{_MINUTES}\b")
+    if m:
+        return datetime.timedelta(minutes=_amount(m.group(1)))
+    m = scan.find(rf"(?<!in )\b(\d+)\s*(?:-\s*)?{_MINUTES}\b")
+    if m:
+        return datetime.timedelta(minutes=int(m.group(1)))
+    return None
+
+
+def _find_part_of_day(scan):
+    """
+    ("morning"|"afternoon"|"evening"|"tonight", said_today) or (None, False).
+    """
+    m = scan.find(r"\b(?:in the\s+|(this)\s+)?(morning|afternoon|evening|tonight)\b")
+    if not m:
+        return None, False
+    return m.group(2), bool(m.group(1)) or m.group(2) == "tonight"
+
+
+def _find_times(scan, now, part=None):
+    """
+    (start, end) times; end is None when only a start was given.
+    Relative starts ("in 2 hours") return a datetime instead of a time.
+    """
+    m = scan.find(rf"\b(?:from\s+|between\s+)?{_CLOCK}\s*(?:-|–|to|and)\s*{_CLOCK}(?=\s|$|[,.!?])")
+    if m and (m.group(3) or m.group(6) or m.group(2) or m.group(5) or re.match(r"\s*(from|between)", m.group(0))):
+        end_meridiem = m.group(6)
+        start_meridiem = m.group(3) or (end_meridiem if int(m.group(1)) <= int(m.group(4)) % 12 or int(m.group(4)) == 12 else None)
+        start = _to_24h(m.group(1), m.group(2), start_meridiem, part)
+        end = _to_24h(m.group(4), m.group(5), end_meridiem, part)
+        if start and end:
+            return start, end
+    elif m:
+        scan.spans.pop()
+
+    m = scan.find(rf"\bin\s+{_AMOUNT}\s*({_HOURS}|{_MINUTES})\b")
+    if m:
+        amount = _amount(m.group(1))
+        delta = datetime.timedelta(hours=amount) if m.group(2).startswith("h") else datetime.timedelta(minutes=amount)
+        start = now + delta
+        # Round up to the next 5 minutes
+        start = start.replace(second=0, microsecond=0) + datetime.timedelta(minutes=-start.minute % 5)
+        return start, None
+
+    m = scan.find(r"\b(?:at\s+)?(noon|midday|midnight)\b")
+    if m:
+        return (datetime.time(0) if m.group(1) == "midnight" else datetime.time(12)), None
+
+    m = scan.find(rf"\b(?:at|@|by)\s+{_CLOCK}(?=\s|$|[,.!?])")
+    if not m:
+        m = scan.find(r"\b(\d{1,2})(?:[:.](\d{2}))\s*(am|pm|a\.m\.|p\.m\.)?(?=\s|$|[,.!?])")
+    if not m:
+        m = scan.find(r"\b(\d{1,2})()\s*(am|pm|a\.m\.|p\.m\.)(?=\s|$|[,.!?])")
+    if m:
+        start = _to_24h(m.group(1), m.group(2), m.group(3), part)
+        if start:
+            return start, None
+        scan.spans.pop()
+
+    if part:
+        return datetime.time(PARTS_OF_DAY[part]), None
+    return None, None
+
+
+def _title(rest):
+    title = _TRAILING.sub(" ", rest)
+    title = _LEADING.sub("", title)
+    for _ in range(3):
+        title = _DANGLING.sub("", title).strip(" ,.-–!?")
+    title = re.sub(r"^(?:a|an)\s+(?=\S)", "", title, flags=re.I)
+    return title[:1].upper() + title[1:]
+
+
+def parse_event_prompt(prompt: str, now: datetime.datetime):
+    """
+    Parse `prompt` relative to `now` (an aware datetime in the user's timezone).
+    Returns {"title", "date", "start_time", "end_time", "confident"}, or None
+    when no date or time was found at all.
+    """
+    scan = _Scan(prompt or "")
+    today = now.date()
+    date = _find_date(scan, today)
+    duration = _find_duration(scan)
+    part, said_today = _find_part_of_day(scan)
+    if said_today and date is None:
+        # "this evening", "tonight"
+        date = today
+    start, end = _find_times(scan, now, part)
+
+    if date is None and start is None:
+        return None
+
+    if isinstance(start, datetime.datetime):
+        start_dt = start
+    else:
+        day = date or today
+        start_dt = datetime.datetime.combine(day, start or (now + datetime.timedelta(hours=1)).time().replace(second=0, microsecond=0), now.tzinfo)
+        if date is None and start_dt < now:
+            # A bare time that already passed today means tomorrow
+            start_dt += datetime.timedelta(days=1)
+
+    if end is not None:
+        end_dt = datetime.datetime.combine(start_dt.date(), end, now.tzinfo)
+        if end_dt <= start_dt:
+            end_dt += datetime.timedelta(days=1)
+    else:
+        end_dt = start_dt + (duration or DEFAULT_DURATION)
+
+    rest = scan.rest()
+    title = _title(rest)
+    # An explicit today/tonight that already passed was probably misread
+    in_past = date == today and start_dt < now
+    confident = bool(
+        start is not None and title and not scan.ambiguous and not in_past
+        and not _UNSURE.search(title.lower())
+    )
+    return {
+        "title": title or (prompt or "").strip().capitalize(),
+        "date": start_dt.date().isoformat(),
+        "start_time": start_dt.strftime("%H:%M"),
+        "end_time": end_dt.strftime("%H:%M"),
+        "end_date": end_dt.date().isoformat(),
+        "confident": confident,
+    }
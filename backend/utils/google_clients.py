@@ -0,0 +1,146 @@
+"""
+Shared Google API access for the calendar and email agents.
+
+Credentials are parsed from GOOGLE_TOKEN_JSON once and refreshed by a
+background thread shortly before they expire, so requests never wait on a
+token refresh. Service objects are built from the bundled discovery documents
+and cached per thread (httplib2 connections are not thread-safe), which keeps
+each worker thread's HTTP connection alive across calls.
+"""
+import datetime
+import json
+import os
+import threading
+import time
+
+from backend.utils import clients
+
+SCOPES = ["https://www.googleapis.com/auth/calendar",
+          "https://www.googleapis.com/auth/gmail.readonly",
+          "https://www.googleapis.com/auth/gmail.send",
+        ]
+
+# Refresh this long before the access token expires
+REFRESH_MARGIN = float(os.getenv("POS_GOOGLE_REFRESH_MARGIN", "300"))
+# How often the refresher re-checks when the token has no known expiry
+REFRESH_CHECK_INTERVAL = 300.0
+
+_local = threading.local()
+_refresh_lock = threading.Lock()
+_start_lock = threading.Lock()
+_refresher = None
+_creds = None
+_stats = {"refreshes": 0, "refresh_failures": 0, "services_built": 0}
+
+
+def _load_credentials():
+    global _creds
+    from google.oauth2.credentials import Credentials
+    creds_json = os.getenv("GOOGLE_CREDENTIALS_JSON")
+    token_json = os.getenv("GOOGLE_TOKEN_JSON")
+    if not (creds_json and token_json):
+        raise RuntimeError("Google credentials are not configured (GOOGLE_CREDENTIALS_JSON / GOOGLE_TOKEN_JSON)")
+    try:
+        creds = Credentials.from_authorized_user_info(json.loads(token_json), scopes=SCOPES)
+    except Exception as e:
+        print(f"[WARN] Failed to load Google credentials from env vars: {e}")
+        raise RuntimeError(f"Failed to load Google credentials from env vars: {e}")
+    _refresh_if_needed(creds)
+    _creds = creds
+    _start_refresher()
+    return creds
+
+
+def credentials():
+    """
+    The process-wide Google credentials (parsed once, kept fresh in the background).
+    """
+    return clients.get_or_create("google_credentials", _load_credentials)
+
+
+def _seconds_left(creds):
+    expiry = getattr(creds, "expiry", None)
+    if not expiry:
+        return None
+    # google-auth keeps `expiry` as naive UTC
+    if expiry.tzinfo is None:
+        expiry = expiry.replace(tzinfo=datetime.timezone.utc)
+    return (expiry - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+
+
+def _refresh_if_needed(creds, margin=REFRESH_MARGIN):
+    if not getattr(creds, "refresh_token", None):
+        return False
+    left = _seconds_left(creds)
+    if not creds.expired and (left is None or left > margin):
+        return False
+    from google.auth.transport.requests import Request
+    with _refresh_lock:
+        # Another thread may have refreshed while we waited
+        left = _seconds_left(creds)
+        if not creds.expired and left is not None and left > margin:
+            return False
+        try:
+            creds.refresh(Request())
+            _stats["refreshes"] += 1
+            return True
+        except Exception:
+            _stats["refresh_failures"] += 1
+            raise
+
+
+def _refresh_loop():
+    while True:
+        creds = credentials()
+        left = _seconds_left(creds)
+        wait = REFRESH_CHECK_INTERVAL if left is None else max(5.0, left - REFRESH_MARGIN)
+        time.sleep(min(wait, REFRESH_CHECK_INTERVAL))
+        try:
+            _refresh_if_needed(creds)
+        except Exception as e:
+            print(f"[WARN] Background Google token refresh failed: {e}")
+
+
+def _start_refresher():
+    global _refresher
+    with _start_lock:
+        if _refresher is None:
+            _refresher = threading.Thread(target=_refresh_loop, name="google-token-refresh", daemon=True)
+            _refresher.start()
+
+
+def service(name: str, version: str):
+    """
+    This thread's `name`/`version` service object, built on first use.
+    """
+    services = getattr(_local, "services", None)
+    if services is None:
+        services = _local.services = {}
+    key = (name, version)
+    svc = services.get(key)
+    if svc is None:
+        svc = services[key] = _build(name, version)
+    return svc
+
+
+def _build(name, version):
+    import googleapiclient.discovery
+    creds = credentials()
+    try:
+        try:
+            import google_auth_httplib2
+            import httplib2
+            # One persistent connection per thread, authorised with the shared credentials
+            http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http(timeout=30))
+            svc = googleapiclient.discovery.build(name, version, http=http, static_discovery=True)
+        except ImportError:
+            svc = googleapiclient.discovery.build(name, version, credentials=creds, static_discovery=True)
+    except Exception as e:
+        raise RuntimeError(f"Failed to build Google {name} service: {e}")
+    _stats["services_built"] += 1
+    return svc
+
+
+def stats() -> dict:
+    left = _seconds_left(_creds) if _creds is not None else None
+    return {**_stats, "token_seconds_left": left, "refresher_running": _refresher is not None}
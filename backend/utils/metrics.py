@@ -0,0 +1,214 @@
+import threading
+import time
+from collections import deque
+from contextlib import ContextDecorator
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUANTILES = (0.5, 0.95, 0.99)
+# Recent samples kept per series for the quantile gauges
+RESERVOIR_SIZE = 2048
+
+
+class _Series:
+    __slots__ = ("buckets", "count", "total", "errors", "recent")
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self.recent = deque(maxlen=RESERVOIR_SIZE)
+
+    def observe(self, seconds: float, error: bool):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+        self.count += 1
+        self.total += seconds
+        self.recent.append(seconds)
+        if error:
+            self.errors += 1
+
+    def quantile(self, q: float) -> float:
+        samples = sorted(self.recent)
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def _labels(**labels) -> str:
+    body = ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in labels.items())
+    return "{" + body + "}"
+
+
+class MetricsRegistry:
+    """
+    Latency histograms keyed by (component, name), e.g. ("tool", "task_tool"),
+    ("llm", "task_agent._parse_task") or ("notion", "get_all_tasks").
+    """
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, component: str, name: str, seconds: float, error: bool = False):
+        with self._lock:
+            series = self._series.get((component, name))
+            if series is None:
+                series = self._series[(component, name)] = _Series()
+            series.observe(seconds, error)
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                f"{component}:{name}": {
+                    "count": s.count,
+                    "errors": s.errors,
+                    **{f"p{int(q * 100)}": s.quantile(q) for q in QUANTILES},
+                }
+                for (component, name), s in sorted(self._series.items())
+            }
+
+    def render(self) -> str:
+        """
+        Prometheus text exposition of all series.
+        """
+        lines = [
+            "# HELP pos_latency_seconds Latency of graph nodes, tools, LLM and upstream API calls",
+            "# TYPE pos_latency_seconds histogram",
+        ]
+        quantile_lines = [
+            "# HELP pos_latency_quantile_seconds Latency quantiles over recent samples",
+            "# TYPE pos_latency_quantile_seconds gauge",
+        ]
+        error_lines = [
+            "# HELP pos_errors_total Calls that raised an error",
+            "# TYPE pos_errors_total counter",
+        ]
+        with self._lock:
+            for (component, name), s in sorted(self._series.items()):
+                cumulative = 0
+                for bound, n in zip(BUCKETS, s.buckets):
+                    cumulative += n
+                    lines.append(f"pos_latency_seconds_bucket{_labels(component=component, name=name, le=bound)} {cumulative}")
+                lines.append(f"pos_latency_seconds_bucket{_labels(component=component, name=name, le='+Inf')} {s.count}")
+                lines.append(f"pos_latency_seconds_sum{_labels(component=component, name=name)} {s.total}")
+                lines.append(f"pos_latency_seconds_count{_labels(component=component, name=name)} {s.count}")
+                for q in QUANTILES:
+                    quantile_lines.append(
+                        f"pos_latency_quantile_seconds{_labels(component=component, name=name, quantile=q)} {s.quantile(q)}"
+                    )
+                error_lines.append(f"pos_errors_total{_labels(component=component, name=name)} {s.errors}")
+        return "\n".join(lines + quantile_lines + error_lines) + "\n"
+
+
+def render_stats(prefix: str, stats: dict) -> str:
+    """
+    Expose the numeric fields of a stats dict (cache, admission, ...) as gauges.
+    """
+    lines = []
+    for key, value in stats.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        lines.append(f"# TYPE {prefix}_{key} gauge")
+        lines.append(f"{prefix}_{key} {value}")
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+metrics = MetricsRegistry()
+
+
+class timed(ContextDecorator):
+    """
+    Record the duration of a block or function call (sync code only):
+
+        @timed("notion", "get_all_tasks")
+        def get_all_tasks(): ...
+
+        with timed("llm", "task_agent._parse_task"):
+            model.generate_content(...)
+    """
+
+    def __init__(self, component: str, name: str):
+        self.component = component
+        self.name = name
+        self._starts = threading.local()
+
+    def __enter__(self):
+        stack = getattr(self._starts, "stack", None)
+        if stack is None:
+            stack = self._starts.stack = []
+        stack.append(time.perf_counter())
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        start = self._starts.stack.pop()
+        metrics.observe(self.component, self.name, time.perf_counter() - start, error=exc_type is not None)
+        return False
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain callback recording graph nodes, tools and LangChain LLM calls.
+    Pass it in the run config: `{"callbacks": [metrics_callbacks]}`.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self._runs = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, component, name):
+        with self._lock:
+            self._runs[run_id] = (component, name, time.perf_counter())
+
+    def _end(self, run_id, error=False):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run:
+            component, name, start = run
+            metrics.observe(component, name, time.perf_counter() - start, error=error)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name")
+        # Only the node runnables themselves, not every sub-chain inside a node
+        if metadata and name and metadata.get("langgraph_node") == name:
+            self._start(run_id, "node", name)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=True)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "tool"
+        self._start(run_id, "tool", name)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=True)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        name = (metadata or {}).get("ls_model_name") or kwargs.get("name") or "chat_model"
+        self._start(run_id, "llm", f"react_agent.{name}")
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        name = (metadata or {}).get("ls_model_name") or kwargs.get("name") or "llm"
+        self._start(run_id, "llm", f"react_agent.{name}")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=True)
+
+
+metrics_callbacks = MetricsCallbackHandler()
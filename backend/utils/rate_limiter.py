@@ -0,0 +1,119 @@
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` requests per second with bursts up to `capacity`.
+    Tracks how many callers are waiting (queue depth) and how often callers were throttled.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self.waiting = 0
+        self.acquired = 0
+        self.throttled = 0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """
+        Block until a token is available.
+        """
+        throttled = False
+        with self._lock:
+            self.waiting += 1
+        try:
+            while True:
+                with self._lock:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if now >= self._paused_until and self._tokens >= 1:
+                        self._tokens -= 1
+                        self.acquired += 1
+                        if throttled:
+                            self.throttled += 1
+                        return
+                    wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+                throttled = True
+                time.sleep(min(wait, 1.0))
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+    def pause(self, seconds: float):
+        """
+        Stop handing out tokens for `seconds` (server asked us to back off).
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "capacity": self.capacity,
+                "queue_depth": self.waiting,
+                "acquired": self.acquired,
+                "throttled": self.throttled,
+            }
+
+
+class RetryingLimiter:
+    """
+    Rate limit every call through a TokenBucket and retry transient failures with
+    jittered exponential backoff. `classify(error)` returns (retryable, retry_after_seconds).
+    A Retry-After from the server pauses the whole bucket, not just the failing caller.
+    `call_with` takes a per-call classifier, e.g. a stricter one for non-idempotent writes.
+    """
+
+    def __init__(self, bucket: TokenBucket, classify, max_retries: int = 5,
+                 base_delay: float = 0.5, max_delay: float = 30.0):
+        self.bucket = bucket
+        self.classify = classify
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def call(self, fn, *args, **kwargs):
+        return self.call_with(self.classify, fn, *args, **kwargs)
+
+    def call_with(self, classify, fn, *args, **kwargs):
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                retryable, retry_after = classify(e)
+                if not retryable or attempt >= self.max_retries:
+                    with self._lock:
+                        self.failures += 1
+                    raise
+                backoff = min(self.max_delay, self.base_delay * (2 ** attempt))
+                # Full jitter keeps concurrent retries from lining up
+                delay = random.uniform(0, backoff)
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                    self.bucket.pause(retry_after)
+                with self._lock:
+                    self.retries += 1
+                attempt += 1
+                time.sleep(delay)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = {"retries": self.retries, "failures": self.failures}
+        return {**self.bucket.stats(), **counters}
@@ -0,0 +1,164 @@
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Tool calls that change state; turns containing them are never cached,
+# and running them invalidates everything cached so far
+WRITE_TOOL_ACTIONS = {
+    "task_tool": {"add", "add_bulk", "set_complete", "set_complete_many"},
+    "calendar_tool": {"add", "add_bulk"},
+    "add_memory_tool": None,  # every call writes
+    "email_tool": {"send"},
+}
+# Default `action` of each tool when the agent omits it
+DEFAULT_ACTIONS = {"task_tool": "add", "calendar_tool": "add", "email_tool": "send"}
+
+
+def is_write_call(tool: str, args: dict = None) -> bool:
+    if tool not in WRITE_TOOL_ACTIONS:
+        return False
+    actions = WRITE_TOOL_ACTIONS[tool]
+    if actions is None:
+        return True
+    action = (args or {}).get("action") or DEFAULT_ACTIONS.get(tool, "")
+    return str(action).lower() in actions
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Case, punctuation and whitespace insensitive cache key.
+    """
+    text = re.sub(r"[^\w\s]", " ", prompt.lower())
+    return " ".join(text.split())
+
+
+def _cosine(a, b) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def _gemini_embed(text: str):
+    from backend.utils import clients
+    result = clients.genai().embed_content(
+        model="models/text-embedding-004",
+        content=text,
+        task_type="semantic_similarity"
+    )
+    return result["embedding"]
+
+
+class ResponseCache:
+    """
+    TTL + LRU cache of /query payloads keyed by (session, normalized prompt), so
+    one session is never served an answer built from another session's history.
+    With a similarity threshold, a miss on the exact key falls back to the
+    closest cached prompt by embedding cosine similarity.
+    Every write tool bumps the generation, which drops all entries; results of
+    runs that started before a write are not stored.
+    """
+
+    def __init__(self, ttl: float, max_entries: int, similarity_threshold: float = None, embed_fn=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.embed_fn = embed_fn or _gemini_embed
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def semantic(self) -> bool:
+        return self.similarity_threshold is not None
+
+    def _embed(self, key: str):
+        try:
+            return self.embed_fn(key)
+        except Exception as e:
+            print(f"[WARN] Could not embed prompt for cache lookup: {e}")
+            return None
+
+    def get(self, prompt: str, session_id: str = ""):
+        key = (session_id, normalize_prompt(prompt))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            if entry:
+                del self._entries[key]
+            if not self.semantic:
+                self.misses += 1
+                return None
+            candidates = [
+                (k, e) for k, e in self._entries.items()
+                if k[0] == session_id and e[0] > now and e[1] is not None
+            ]
+
+        embedding = self._embed(key[1]) if candidates else None
+        if embedding is not None:
+            best_key, best_entry = max(candidates, key=lambda c: _cosine(embedding, c[1][1]))
+            if _cosine(embedding, best_entry[1]) >= self.similarity_threshold:
+                with self._lock:
+                    self.hits += 1
+                    self.semantic_hits += 1
+                return best_entry[2]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, prompt: str, payload: dict, generation: int, session_id: str = ""):
+        """
+        Store a payload computed for `session_id` while the cache was at `generation`.
+        """
+        key = (session_id, normalize_prompt(prompt))
+        embedding = self._embed(key[1]) if self.semantic else None
+        with self._lock:
+            if generation != self.generation:
+                # A write happened while this response was being computed
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, embedding, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, reason: str = ""):
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            self._entries.clear()
+        if reason:
+            print(f"🧹 Response cache invalidated by {reason}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "generation": self.generation,
+                "ttl": self.ttl,
+                "max_entries": self.max_entries,
+            }
+
+
+_threshold = os.getenv("POS_CACHE_SIMILARITY")
+response_cache = ResponseCache(
+    ttl=float(os.getenv("POS_CACHE_TTL", "120")),
+    max_entries=int(os.getenv("POS_CACHE_MAX_ENTRIES", "256")),
+    similarity_threshold=float(_threshold) if _threshold else None,
+)
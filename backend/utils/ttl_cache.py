@@ -0,0 +1,76 @@
+import threading
+import time
+
+
+class TTLCache:
+    """
+    Small thread-safe TTL cache with single-flight loading: concurrent misses
+    on the same key wait for one loader call instead of each fetching.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 64):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_or_load(self, key, loader):
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and entry[0] > time.monotonic():
+                    self.hits += 1
+                    return entry[1]
+                pending = self._loading.get(key)
+                if pending is None:
+                    pending = self._loading[key] = threading.Event()
+                    self.misses += 1
+                    break
+            # Someone else is loading this key; wait and re-check
+            pending.wait()
+
+        try:
+            value = loader()
+            with self._lock:
+                if self._loading.get(key) is pending:
+                    self._entries[key] = (time.monotonic() + self.ttl, value)
+                    self._evict()
+            return value
+        finally:
+            with self._lock:
+                if self._loading.get(key) is pending:
+                    del self._loading[key]
+            pending.set()
+
+    def _evict(self):
+        now = time.monotonic()
+        for key in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            oldest = min(self._entries, key=lambda k: self._entries[k][0])
+            del self._entries[oldest]
+
+    def invalidate(self):
+        """
+        Drop everything; loads already in flight won't be stored.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._loading.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "ttl": self.ttl,
+            }